@@ -0,0 +1 @@
+"""Microbenchmarks for Contact's hot paths. Run one with ``python -m benchmarks.<name>``."""
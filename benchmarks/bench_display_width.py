@@ -0,0 +1,132 @@
+"""Compare the display-width engine with the per-character implementation it replaced.
+
+Run from the repository root with ``python -m benchmarks.bench_display_width``.
+"""
+
+import argparse
+import random
+import timeit
+from typing import Callable, Dict, List
+from unicodedata import east_asian_width
+
+from contact.ui import display_width
+
+# Shaped like real mesh traffic: mostly ASCII, with emoji, accents and CJK mixed in.
+SAMPLE_FRAGMENTS = [
+    "Good morning mesh!",
+    "Signal -7.25 dB, SNR 6.5",
+    "Heading to the trailhead 🚶‍♀️⛰️",
+    "Battery 87% 🔋 uptime 3d",
+    "こんにちは、メッシュ",
+    "天气很好 🌞 今天去爬山",
+    "Café à côté de la gare ☕",
+    "안녕하세요 👋",
+    "ping",
+    "📡 relay online, hops=3",
+]
+
+
+def legacy_text_width(text: str) -> int:
+    return sum(2 if east_asian_width(c) in "FW" else 1 for c in text)
+
+
+def legacy_slice_to_width(text: str, max_width: int) -> str:
+    if max_width <= 0:
+        return ""
+    width = 0
+    chars = []
+    for char in text:
+        char_width = legacy_text_width(char)
+        if width + char_width > max_width:
+            break
+        chars.append(char)
+        width += char_width
+    return "".join(chars)
+
+
+def legacy_pad_to_width(text: str, width: int) -> str:
+    clipped = legacy_slice_to_width(text, width)
+    return clipped + (" " * max(0, width - legacy_text_width(clipped)))
+
+
+def legacy_truncate_with_ellipsis(text: str, width: int) -> str:
+    if width <= 0:
+        return ""
+    if legacy_text_width(text) <= width:
+        return legacy_pad_to_width(text, width)
+    if width == 1:
+        return "…"
+    return legacy_pad_to_width(legacy_slice_to_width(text, width - 1) + "…", width)
+
+
+def legacy_split_text_to_width_chunks(text: str, width: int) -> List[str]:
+    if width <= 0:
+        return [""]
+    chunks = []
+    remaining = text
+    while remaining:
+        chunk = legacy_slice_to_width(remaining, width)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        remaining = remaining[len(chunk) :]
+    return chunks or [""]
+
+
+def build_corpus(lines: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(SAMPLE_FRAGMENTS) for _ in range(rng.randint(1, 4))) for _ in range(lines)]
+
+
+def measure(function: Callable[[List[str]], object], corpus: List[str], repeat: int) -> float:
+    """Best-of-repeat seconds for one pass over the corpus."""
+    return min(timeit.repeat(lambda: function(corpus), number=1, repeat=repeat))
+
+
+def run(lines: int = 5000, width: int = 40, repeat: int = 5, seed: int = 1) -> Dict[str, tuple]:
+    corpus = build_corpus(lines, seed)
+    cases = {
+        "text_width": (
+            lambda texts: [legacy_text_width(text) for text in texts],
+            lambda texts: [display_width.text_width(text) for text in texts],
+        ),
+        "slice_to_width": (
+            lambda texts: [legacy_slice_to_width(text, width) for text in texts],
+            lambda texts: [display_width.slice_to_width(text, width) for text in texts],
+        ),
+        "pad_to_width": (
+            lambda texts: [legacy_pad_to_width(text, width) for text in texts],
+            lambda texts: [display_width.pad_to_width(text, width) for text in texts],
+        ),
+        "truncate_with_ellipsis": (
+            lambda texts: [legacy_truncate_with_ellipsis(text, width) for text in texts],
+            lambda texts: [display_width.truncate_with_ellipsis(text, width) for text in texts],
+        ),
+        "split_text_to_width_chunks": (
+            lambda texts: [legacy_split_text_to_width_chunks(text, width) for text in texts],
+            lambda texts: [display_width.split_text_to_width_chunks(text, width) for text in texts],
+        ),
+    }
+    results = {}
+    for name, (legacy, current) in cases.items():
+        if legacy(corpus) != current(corpus):
+            raise AssertionError(f"{name} output differs from the legacy implementation")
+        results[name] = (measure(legacy, corpus, repeat), measure(current, corpus, repeat))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=5000, help="Lines of sample traffic per pass")
+    parser.add_argument("--width", type=int, default=40, help="Pane width in cells")
+    parser.add_argument("--repeat", type=int, default=5, help="Passes to take the best of")
+    args = parser.parse_args()
+
+    print(f"{args.lines} mixed ASCII/emoji/CJK lines, width {args.width}, best of {args.repeat}")
+    print(f"{'function':<28}{'legacy ms':>12}{'engine ms':>12}{'speedup':>10}")
+    for name, (legacy, current) in run(args.lines, args.width, args.repeat).items():
+        print(f"{name:<28}{legacy * 1000:>12.2f}{current * 1000:>12.2f}{legacy / current:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""Time the contact_ui pane draw functions against a virtual curses screen.
+
+Seeds N channels, M nodes and K messages, creates the panes with
+``handle_resize`` on stub windows that count calls instead of drawing, and
+times ``draw_channel_list``, ``draw_messages_window``, ``draw_node_list`` and
+``draw_packetlog_win``. For each it reports the first (cold-cache) frame,
+the median of repeated frames, ``addstr`` calls per frame and the memory
+allocated while drawing one frame.
+
+Run from the repository root with ``python -m benchmarks.bench_render``.
+"""
+
+import argparse
+import contextlib
+import curses
+import random
+import statistics
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Callable, Dict, Iterator, Tuple
+from unittest import mock
+
+from meshtastic.protobuf import telemetry_pb2
+
+import contact.ui.default_config as config
+from contact.message_handlers.rx_handler import packet_log_depth
+from contact.ui import contact_ui
+from contact.ui.ui_state import PacketLogEntry
+from contact.utilities.db_handler import close_db_connections, init_nodedb
+from contact.utilities.demo_data import DEMO_LOCAL_NODE_NUM, build_demo_interface, configure_demo_database
+from contact.utilities.singleton import app_state, interface_state, ui_state
+from contact.utilities.utils import add_new_message, get_node_list
+
+SAMPLE_TEXTS = [
+    "Good morning mesh!",
+    "Signal -7.25 dB, SNR 6.5",
+    "Heading to the trailhead 🚶‍♀️⛰️ and should be back before dark, will check in from the summit",
+    "こんにちは、メッシュ",
+    "ping",
+]
+
+
+class StubWindow:
+    """Stand-in for a curses window or pad that counts calls instead of drawing.
+
+    Every window shares one ``calls`` counter, so a frame's cost can be read as
+    the difference between two snapshots of it.
+    """
+
+    def __init__(self, calls: Counter, height: int, width: int, y: int = 0, x: int = 0) -> None:
+        self.calls = calls
+        self.height = height
+        self.width = width
+        self.y = y
+        self.x = x
+
+    def getmaxyx(self) -> Tuple[int, int]:
+        return self.height, self.width
+
+    def getbegyx(self) -> Tuple[int, int]:
+        return self.y, self.x
+
+    def getyx(self) -> Tuple[int, int]:
+        return 0, 0
+
+    def resize(self, height: int, width: int) -> None:
+        self.calls["resize"] += 1
+        self.height, self.width = height, width
+
+    def mvwin(self, y: int, x: int) -> None:
+        self.calls["mvwin"] += 1
+        self.y, self.x = y, x
+
+    def derwin(self, height: int, width: int, y: int, x: int) -> "StubWindow":
+        self.calls["derwin"] += 1
+        return StubWindow(self.calls, height, width, self.y + y, self.x + x)
+
+    def addstr(self, *args) -> None:
+        self.calls["addstr"] += 1
+
+    def chgat(self, *args) -> None:
+        self.calls["chgat"] += 1
+
+    def refresh(self, *args) -> None:
+        self.calls["refresh"] += 1
+
+    def noutrefresh(self, *args) -> None:
+        self.calls["noutrefresh"] += 1
+
+    def getch(self) -> int:
+        return -1
+
+    def __getattr__(self, name: str) -> Callable[..., None]:
+        # erase, box, attrset, bkgd, keypad and the rest only need counting.
+        def record(*args, **kwargs) -> None:
+            self.calls[name] += 1
+
+        return record
+
+
+@contextlib.contextmanager
+def virtual_screen(calls: Counter, height: int, width: int) -> Iterator[StubWindow]:
+    """Route curses window creation and screen updates to stub windows."""
+    patches = {
+        "newwin": lambda h, w, y=0, x=0: StubWindow(calls, h, w, y, x),
+        "newpad": lambda h, w: StubWindow(calls, h, w),
+        "doupdate": lambda: calls.update(["doupdate"]),
+        "curs_set": lambda visibility: None,
+        "color_pair": lambda pair: 0,
+        "update_lines_cols": lambda: None,
+    }
+    with contextlib.ExitStack() as stack:
+        for name, replacement in patches.items():
+            stack.enter_context(mock.patch.object(curses, name, replacement))
+        yield StubWindow(calls, height, width)
+
+
+def seed_state(db_dir: str, channels: int, nodes: int, messages: int, seed: int) -> None:
+    """Fill the UI state with channels, nodes, messages and a full packet log."""
+    rng = random.Random(seed)
+    configure_demo_database(db_dir)
+    app_state.lock = threading.Lock()
+    interface = build_demo_interface()
+    for index in range(nodes):
+        node_num = 0xB0000000 + index
+        interface.nodesByNum[node_num] = {
+            "num": node_num,
+            "user": {"id": f"!{node_num:08x}", "longName": f"Synthetic node {index}", "shortName": f"S{index % 1000:03d}"},
+            "lastHeard": int(time.time()) - rng.randint(0, 86400),
+            "hopsAway": rng.randint(0, 5),
+            "snr": rng.uniform(-15, 10),
+        }
+    interface_state.interface = interface
+    interface_state.myNodeNum = DEMO_LOCAL_NODE_NUM
+    init_nodedb()
+    ui_state.node_list = get_node_list()
+
+    ui_state.channel_list = [f"Channel {index}" for index in range(channels)]
+    ui_state.all_messages = {channel: [] for channel in ui_state.channel_list}
+    for index in range(messages):
+        # The selected first channel gets half the traffic, the rest is spread out.
+        channel = ui_state.channel_list[0 if index % 2 or channels == 1 else rng.randrange(1, channels)]
+        add_new_message(channel, f"{config.message_prefix} [1] S{index % 1000:03d}: ", rng.choice(SAMPLE_TEXTS))
+
+    ui_state.display_log = True
+    for index in range(packet_log_depth()):
+        metrics = telemetry_pb2.DeviceMetrics(battery_level=rng.randint(1, 100), voltage=rng.uniform(3.3, 4.2))
+        packet = {
+            "from": rng.choice(ui_state.node_list),
+            "to": 0xFFFFFFFF,
+            "decoded": {
+                "portnum": "TELEMETRY_APP",
+                "payload": telemetry_pb2.Telemetry(device_metrics=metrics).SerializeToString(),
+            },
+        }
+        ui_state.packet_buffer.append(PacketLogEntry(packet))
+
+
+def drop_channel_labels() -> None:
+    ui_state.channel_labels.clear()
+
+
+def drop_message_layout() -> None:
+    ui_state.message_layout = None
+
+
+def drop_packet_log_rows() -> None:
+    for entry in ui_state.packet_buffer:
+        entry.row = None
+
+
+# Each pane's draw function, and how to empty the caches it draws from.
+PANES: Dict[str, Tuple[Callable[[], None], Callable[[], None]]] = {
+    "draw_channel_list": (contact_ui.draw_channel_list, drop_channel_labels),
+    "draw_messages_window": (contact_ui.draw_messages_window, drop_message_layout),
+    "draw_node_list": (contact_ui.draw_node_list, contact_ui.invalidate_node_rows),
+    "draw_packetlog_win": (contact_ui.draw_packetlog_win, drop_packet_log_rows),
+}
+
+
+def measure(draw: Callable[[], None], invalidate: Callable[[], None], calls: Counter, frames: int) -> Dict[str, float]:
+    def frame() -> float:
+        started = time.perf_counter()
+        with contact_ui.batched_frame():
+            draw()
+        return time.perf_counter() - started
+
+    invalidate()
+    first = frame()
+    before = calls.copy()
+    times = [frame() for _ in range(frames)]
+    per_frame = {name: (calls[name] - before[name]) / frames for name in calls}
+
+    tracemalloc.start()
+    try:
+        frame()
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "first_ms": first * 1000,
+        "frame_ms": statistics.median(times) * 1000,
+        "addstr": per_frame.get("addstr", 0),
+        "calls": sum(per_frame.values()),
+        "alloc_kb": peak / 1024,
+    }
+
+
+def run(
+    channels: int = 50, nodes: int = 2000, messages: int = 5000, height: int = 50, width: int = 200, frames: int = 50
+) -> Dict[str, Dict[str, float]]:
+    calls: Counter = Counter()
+    with tempfile.TemporaryDirectory(prefix="contact_bench_") as db_dir:
+        try:
+            seed_state(db_dir, channels, nodes, messages, seed=1)
+            with virtual_screen(calls, height, width) as stdscr:
+                contact_ui.handle_resize(stdscr, True)
+                return {name: measure(draw, invalidate, calls, frames) for name, (draw, invalidate) in PANES.items()}
+        finally:
+            close_db_connections()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--channels", type=int, default=50, help="Channels (N)")
+    parser.add_argument("--nodes", type=int, default=2000, help="Synthetic nodes added to the demo mesh (M)")
+    parser.add_argument("--messages", type=int, default=5000, help="Messages across all channels (K)")
+    parser.add_argument("--height", type=int, default=50, help="Terminal rows")
+    parser.add_argument("--width", type=int, default=200, help="Terminal columns")
+    parser.add_argument("--frames", type=int, default=50, help="Repeated frames to take the median of")
+    args = parser.parse_args()
+
+    results = run(args.channels, args.nodes, args.messages, args.height, args.width, args.frames)
+    print(
+        f"{args.channels} channels, {args.nodes} extra nodes, {args.messages} messages, "
+        f"{args.width}x{args.height} terminal, median of {args.frames} frames"
+    )
+    print(f"{'function':<24}{'first ms':>10}{'frame ms':>10}{'addstr':>9}{'calls':>9}{'alloc KB':>10}")
+    for name, result in results.items():
+        print(
+            f"{name:<24}{result['first_ms']:>10.2f}{result['frame_ms']:>10.3f}"
+            f"{result['addstr']:>9.0f}{result['calls']:>9.0f}{result['alloc_kb']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""Measure how many received packets per second the RX path absorbs.
+
+Replays a synthetic packet storm (text, nodeinfo, telemetry, position and
+repeated copies) or a recorded stream through ``queue_packet`` against the
+demo interface and a temporary database, and reports handler latency,
+throughput, database writes and peak RSS.
+
+Run from the repository root with ``python -m benchmarks.bench_rx_throughput``.
+A recorded stream is a JSON-lines file of packet dicts; a string ``payload``
+under ``decoded`` is read as base64.
+"""
+
+import argparse
+import base64
+import json
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from meshtastic.protobuf import mesh_pb2, telemetry_pb2
+
+import contact.ui.default_config as config
+from contact.message_handlers import rx_handler
+from contact.message_handlers.packet_dedup import packet_deduplicator
+from contact.utilities.db_handler import close_db_connections, init_nodedb, load_messages_from_db
+from contact.utilities.db_writer import db_writer
+from contact.utilities.demo_data import DEMO_LOCAL_NODE_NUM, build_demo_interface, configure_demo_database
+from contact.utilities.singleton import app_state, interface_state, ui_state
+from contact.utilities.utils import get_channels, get_node_list
+
+try:
+    import resource
+except ImportError:  # Not available on Windows.
+    resource = None
+
+BROADCAST_NUM = 0xFFFFFFFF
+# Relative share of each kind of packet in a synthetic storm.
+PACKET_MIX = {"text": 30, "nodeinfo": 10, "telemetry": 25, "position": 20, "duplicate": 15}
+SAMPLE_TEXTS = ["Good morning mesh!", "ping", "Heading to the trailhead 🚶‍♀️⛰️", "Battery 87% 🔋", "こんにちは"]
+
+
+def _text_packet(rng: random.Random, sender: int) -> Dict[str, Any]:
+    direct = rng.random() < 0.1
+    return {
+        "to": DEMO_LOCAL_NODE_NUM if direct else BROADCAST_NUM,
+        "channel": 0 if direct else rng.randint(0, 1),
+        "decoded": {"portnum": "TEXT_MESSAGE_APP", "payload": rng.choice(SAMPLE_TEXTS).encode("utf-8")},
+    }
+
+
+def _nodeinfo_packet(rng: random.Random, sender: int) -> Dict[str, Any]:
+    user = {
+        "id": f"!{sender:08x}",
+        "longName": f"Bench node {sender & 0xFFFF:04x}",
+        "shortName": f"{sender & 0xFFFF:04x}",
+        "hwModel": "TBEAM",
+    }
+    return {"to": BROADCAST_NUM, "decoded": {"portnum": "NODEINFO_APP", "user": user, "payload": b""}}
+
+
+def _telemetry_packet(rng: random.Random, sender: int) -> Dict[str, Any]:
+    metrics = telemetry_pb2.DeviceMetrics(battery_level=rng.randint(1, 100), voltage=rng.uniform(3.3, 4.2))
+    payload = telemetry_pb2.Telemetry(device_metrics=metrics).SerializeToString()
+    return {"to": BROADCAST_NUM, "decoded": {"portnum": "TELEMETRY_APP", "payload": payload}}
+
+
+def _position_packet(rng: random.Random, sender: int) -> Dict[str, Any]:
+    position = mesh_pb2.Position(latitude_i=rng.randint(-900000000, 900000000), longitude_i=rng.randint(0, 1800000000))
+    return {"to": BROADCAST_NUM, "decoded": {"portnum": "POSITION_APP", "payload": position.SerializeToString()}}
+
+
+PACKET_BUILDERS = {
+    "text": _text_packet,
+    "nodeinfo": _nodeinfo_packet,
+    "telemetry": _telemetry_packet,
+    "position": _position_packet,
+}
+
+
+def synthetic_packets(count: int, node_nums: List[int], seed: int) -> Iterator[Dict[str, Any]]:
+    rng = random.Random(seed)
+    kinds = list(PACKET_MIX)
+    weights = list(PACKET_MIX.values())
+    recent: List[Dict[str, Any]] = []
+    for packet_id in range(1, count + 1):
+        kind = rng.choices(kinds, weights)[0]
+        if kind == "duplicate" and recent:
+            # Another path delivers a copy of a recent packet, usually with more hops.
+            packet = dict(rng.choice(recent))
+            packet["hopLimit"] = max(0, packet["hopLimit"] - 1)
+            packet["rxSnr"] = round(rng.uniform(-15, 10), 2)
+            yield packet
+            continue
+        kind = kind if kind != "duplicate" else "text"
+        sender = rng.choice(node_nums)
+        packet = PACKET_BUILDERS[kind](rng, sender)
+        packet.update(
+            {"from": sender, "id": packet_id, "hopStart": 3, "hopLimit": rng.randint(0, 3), "rxSnr": 0.0}
+        )
+        recent = (recent + [packet])[-50:]
+        yield packet
+
+
+def recorded_packets(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as stream:
+        for line in stream:
+            if not line.strip():
+                continue
+            packet = json.loads(line)
+            decoded = packet.get("decoded")
+            if decoded is not None and isinstance(decoded.get("payload"), str):
+                decoded["payload"] = base64.b64decode(decoded["payload"])
+            yield packet
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def setup_demo_state(db_dir: str, synthetic_nodes: int, seed: int) -> List[int]:
+    """Point Contact at the demo interface plus extra nodes, with an empty database in db_dir."""
+    configure_demo_database(db_dir)
+    config.notification_sound = "None"
+    config.ping_bot_enabled = "False"
+    app_state.lock = threading.Lock()
+    interface = build_demo_interface()
+    rng = random.Random(seed)
+    for index in range(synthetic_nodes):
+        node_num = 0xB0000000 + index
+        interface.nodesByNum[node_num] = {
+            "num": node_num,
+            "user": {"id": f"!{node_num:08x}", "longName": f"Synthetic {index}", "shortName": f"S{index % 1000:03d}"},
+            "lastHeard": int(time.time()) - rng.randint(0, 86400),
+            "hopsAway": rng.randint(0, 5),
+        }
+    interface_state.interface = interface
+    interface_state.myNodeNum = DEMO_LOCAL_NODE_NUM
+    ui_state.channel_list = get_channels()
+    ui_state.node_list = get_node_list()
+    init_nodedb()
+    load_messages_from_db()
+    return [node_num for node_num in interface.nodesByNum if node_num != DEMO_LOCAL_NODE_NUM]
+
+
+def run(packets: Iterator[Dict[str, Any]]) -> Dict[str, Any]:
+    """Feed packets through the RX listener the way the radio reader would and time each one.
+
+    The packet worker is left stopped so each packet is handled on this
+    thread and its latency covers deduplication and on_receive; database
+    writes go through the running write-behind queue.
+    """
+    writes = 0
+    submit = db_writer.submit
+
+    def counting_submit(write):
+        nonlocal writes
+        writes += 1
+        submit(write)
+
+    db_writer.submit = counting_submit
+    db_writer.start()
+    latencies = []
+    nodes = interface_state.interface.nodesByNum
+    try:
+        started = time.perf_counter()
+        for packet in packets:
+            node = nodes.get(packet.get("from"))
+            if node is not None:
+                # The meshtastic reader updates its node table before publishing.
+                node["lastHeard"] = int(time.time())
+            before = time.perf_counter()
+            rx_handler.queue_packet(packet, interface_state.interface)
+            latencies.append(time.perf_counter() - before)
+        handled = time.perf_counter()
+        db_writer.flush()
+        flushed = time.perf_counter()
+    finally:
+        db_writer.stop()
+        del db_writer.submit
+
+    percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "packets": len(latencies),
+        "duplicates_dropped": packet_deduplicator.hits,
+        "p50_ms": percentiles[49] * 1000,
+        "p99_ms": percentiles[98] * 1000,
+        "packets_per_second": len(latencies) / (handled - started),
+        "db_writes": writes,
+        "db_writes_per_second": writes / (flushed - started),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--packets", type=int, default=20000, help="Packets in a synthetic storm")
+    parser.add_argument("--nodes", type=int, default=500, help="Synthetic nodes added to the demo mesh")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--replay", metavar="FILE", help="Replay a recorded JSON-lines packet stream instead")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="contact_bench_") as db_dir:
+        node_nums = setup_demo_state(db_dir, args.nodes, args.seed)
+        if args.replay:
+            source = f"replayed from {args.replay}"
+            packets = recorded_packets(args.replay)
+        else:
+            source = f"synthetic storm over {len(node_nums)} nodes"
+            packets = synthetic_packets(args.packets, node_nums, args.seed)
+        try:
+            results = run(packets)
+        finally:
+            close_db_connections()
+
+    peak_rss = results["peak_rss_mb"]
+    print(f"{results['packets']} packets, {source}")
+    print(f"{'duplicates dropped':<22}{results['duplicates_dropped']:>12}")
+    print(f"{'handler p50 ms':<22}{results['p50_ms']:>12.3f}")
+    print(f"{'handler p99 ms':<22}{results['p99_ms']:>12.3f}")
+    print(f"{'packets/sec':<22}{results['packets_per_second']:>12.0f}")
+    print(f"{'db writes':<22}{results['db_writes']:>12}")
+    print(f"{'db writes/sec':<22}{results['db_writes_per_second']:>12.0f}")
+    print(f"{'peak RSS MB':<22}{peak_rss:>12.1f}" if peak_rss is not None else f"{'peak RSS MB':<22}{'n/a':>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -26,13 +26,14 @@ from pubsub import pub
 
 # Local application
 import contact.ui.default_config as config
-from contact.message_handlers.rx_handler import on_receive
+from contact.message_handlers.rx_handler import packet_worker, queue_packet
 from contact.settings import set_region
 from contact.ui.colors import setup_colors
 from contact.ui.contact_ui import main_ui
 from contact.ui.splash import draw_splash
 from contact.utilities.arg_parser import setup_parser
-from contact.utilities.db_handler import init_nodedb, load_messages_from_db
+from contact.utilities.db_handler import close_db_connections, init_nodedb, load_messages_from_db
+from contact.utilities.db_writer import db_writer
 from contact.utilities.demo_data import build_demo_interface, configure_demo_database, seed_demo_messages
 from contact.utilities.input_handlers import get_list_input
 from contact.utilities.i18n import t
@@ -40,6 +41,7 @@ from contact.ui.dialog import dialog
 from contact.utilities.interfaces import initialize_interface, reconnect_interface
 from contact.utilities.utils import get_channels, get_nodeNum, get_node_list
 from contact.utilities.singleton import ui_state, interface_state, app_state
+from contact.utilities.wakeup import ui_wakeup
 
 # ------------------------------------------------------------------------------
 # Environment & Logging Setup
@@ -144,7 +146,7 @@ def initialize_globals(seed_demo: bool = False) -> None:
     ui_state.channel_list = []
     ui_state.all_messages = {}
     ui_state.notifications = []
-    ui_state.packet_buffer = []
+    ui_state.packet_buffer.clear()
     ui_state.node_list = []
     ui_state.selected_channel = 0
     ui_state.selected_message = 0
@@ -154,7 +156,7 @@ def initialize_globals(seed_demo: bool = False) -> None:
     ui_state.channel_list = get_channels()
     ui_state.node_list = get_node_list()
     ui_state.single_pane_mode = config.single_pane_mode.lower() == "true"
-    pub.subscribe(on_receive, "meshtastic.receive")
+    pub.subscribe(queue_packet, "meshtastic.receive")
 
     init_nodedb()
     if seed_demo:
@@ -193,6 +195,8 @@ def main(stdscr: curses.window) -> None:
             if not getattr(args, "demo_screenshot", False) and interface_state.interface.localNode.localConfig.lora.region == 0:
                 prompt_region_if_unset(args, stdscr)
 
+            db_writer.start()
+            packet_worker.start()
             initialize_globals(seed_demo=getattr(args, "demo_screenshot", False))
             logging.info("Starting main UI")
 
@@ -255,6 +259,11 @@ def start() -> None:
             pass
     finally:
         close_interface(interface_state.interface)
+        # Handle packets already received, then commit the writes they queued.
+        packet_worker.stop()
+        ui_wakeup.close()
+        db_writer.stop()
+        close_db_connections()
 
     if fatal_error is not None:
         print("Fatal error:", fatal_error)
@@ -0,0 +1,126 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+
+PACKET_DEDUP_SIZE = 2048
+PACKET_DEDUP_TTL_SECONDS = 600.0
+
+PacketKey = Tuple[Any, Any]
+
+
+@dataclass
+class SeenPacket:
+    """Reception details gathered over every copy of one packet."""
+
+    first_seen: float
+    copies: int = 1
+    best_hops: Optional[int] = None
+    best_snr: Optional[float] = None
+
+    def record(self, packet: Dict[str, Any]) -> bool:
+        """Fold in one copy's reception and return True if it beat the best so far."""
+        improved = False
+        hops = packet_hops(packet)
+        if hops is not None and (self.best_hops is None or hops < self.best_hops):
+            self.best_hops = hops
+            improved = True
+        snr = packet.get("rxSnr")
+        if snr is not None and (self.best_snr is None or snr > self.best_snr):
+            self.best_snr = snr
+            improved = True
+        return improved
+
+
+class Sighting(NamedTuple):
+    """The outcome of receiving one copy of a packet."""
+
+    is_new: bool
+    # For a repeat, whether this copy came over a better path than any before it.
+    improved: bool = False
+    best_hops: Optional[int] = None
+    best_snr: Optional[float] = None
+
+
+def packet_hops(packet: Dict[str, Any]) -> Optional[int]:
+    if "hopStart" not in packet or "hopLimit" not in packet:
+        return None
+    return packet["hopStart"] - packet["hopLimit"]
+
+
+class PacketDeduplicator:
+    """Bounded seen-set of ``(from, id)`` pairs for dropping repeated copies of a packet.
+
+    MQTT downlink and multi-path relays deliver the same packet several
+    times. Entries expire ``ttl_seconds`` after the first copy, and the least
+    recently seen entry is evicted once ``max_entries`` are held. Repeats
+    still update the best hop count and SNR recorded for the packet.
+    """
+
+    def __init__(self, max_entries: int = PACKET_DEDUP_SIZE, ttl_seconds: float = PACKET_DEDUP_TTL_SECONDS) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._seen: "OrderedDict[PacketKey, SeenPacket]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def is_new(self, packet: Dict[str, Any], now: Optional[float] = None) -> bool:
+        """Record a received packet and return False if it repeats one seen recently."""
+        return self.observe(packet, now).is_new
+
+    def observe(self, packet: Dict[str, Any], now: Optional[float] = None) -> Sighting:
+        """Record a received packet and report whether it is new or a better copy of one seen recently.
+
+        Packets without a sender or id cannot be matched and always count as new.
+        """
+        packet_id = packet.get("id")
+        sender = packet.get("from")
+        if not packet_id or sender is None:
+            return Sighting(is_new=True)
+        key = (sender, packet_id)
+        now = time.monotonic() if now is None else now
+
+        with self._lock:
+            self._expire(now)
+            seen = self._seen.get(key)
+            if seen is not None and now - seen.first_seen < self.ttl_seconds:
+                seen.copies += 1
+                improved = seen.record(packet)
+                self._seen.move_to_end(key)
+                self.hits += 1
+                return Sighting(False, improved, seen.best_hops, seen.best_snr)
+
+            seen = SeenPacket(first_seen=now)
+            seen.record(packet)
+            self._seen[key] = seen
+            self._seen.move_to_end(key)
+            if len(self._seen) > self.max_entries:
+                self._seen.popitem(last=False)
+            self.misses += 1
+            return Sighting(is_new=True)
+
+    def reception(self, sender: Any, packet_id: Any) -> Optional[SeenPacket]:
+        """Return what has been seen of this packet, if it is still remembered."""
+        with self._lock:
+            return self._seen.get((sender, packet_id))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._seen.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def _expire(self, now: float) -> None:
+        # Entries are ordered by last sighting, so stop at the first one still live;
+        # any expired entry behind it is caught when it is next looked up.
+        while self._seen:
+            key, seen = next(iter(self._seen.items()))
+            if now - seen.first_seen < self.ttl_seconds:
+                return
+            del self._seen[key]
+
+
+packet_deduplicator = PacketDeduplicator()
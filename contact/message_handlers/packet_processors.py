@@ -0,0 +1,42 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+
+@dataclass(frozen=True)
+class PacketProcessor:
+    """How received packets of one portnum are handled.
+
+    Handling runs in up to three phases on the packet worker thread:
+
+    - ``decode(packet)`` always runs, before app_state.lock is taken, and must
+      not touch shared state. It may raise KeyError for malformed packets.
+    - ``apply(decoded)`` runs with app_state.lock held when the processor
+      ``needs_ui``, and should only move prepared values into the UI state.
+    - ``complete(packet, decoded, applied)`` runs after the lock is released
+      when the processor ``needs_db`` or ``needs_bot``.
+    """
+
+    decode: Callable[[Dict[str, Any]], Any]
+    apply: Optional[Callable[[Any], Any]] = None
+    complete: Optional[Callable[[Dict[str, Any], Any, Any], None]] = None
+    needs_db: bool = False
+    needs_ui: bool = False
+    needs_bot: bool = False
+
+    def __post_init__(self) -> None:
+        if self.needs_ui and self.apply is None:
+            raise ValueError("A processor that needs UI access must define apply")
+        if (self.needs_db or self.needs_bot) and self.complete is None:
+            raise ValueError("A processor that needs database or bot access must define complete")
+
+    @property
+    def runs_complete(self) -> bool:
+        return self.needs_db or self.needs_bot
+
+
+packet_processors: Dict[str, PacketProcessor] = {}
+
+
+def register_packet_processor(portnum: str, processor: PacketProcessor) -> None:
+    """Handle received packets with this portnum name (e.g. "TEXT_MESSAGE_APP") using ``processor``."""
+    packet_processors[portnum] = processor
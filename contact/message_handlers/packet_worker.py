@@ -0,0 +1,110 @@
+import logging
+import queue
+import threading
+from typing import Any, Callable, Dict, Optional
+
+
+PACKET_QUEUE_SIZE = 10000
+
+PacketHandler = Callable[[Dict[str, Any], Any], None]
+WorkerTask = Callable[[], None]
+
+
+class PacketWorker:
+    """Hands received packets from the radio reader thread to one background thread.
+
+    ``submit`` only queues the packet, so the reader never waits on the UI
+    lock, the node database or the message store; the worker calls
+    ``handler(packet, interface)`` for each packet in arrival order. While the
+    worker is not running, packets are handled immediately on the calling
+    thread.
+    """
+
+    def __init__(self, handler: PacketHandler, max_queue: int = PACKET_QUEUE_SIZE) -> None:
+        self.handler = handler
+        self._queue: "queue.Queue[object]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._stop_marker = object()
+        self._state_lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        with self._state_lock:
+            if self.running:
+                return
+            self._thread = threading.Thread(target=self._run, name="contact-packet-worker", daemon=True)
+            self._thread.start()
+
+    def submit(self, packet: Dict[str, Any], interface: Any) -> None:
+        """Queue a packet, handling it synchronously if the worker is stopped or saturated."""
+        if self.running:
+            try:
+                self._queue.put_nowait((packet, interface))
+                return
+            except queue.Full:
+                logging.warning("Packet queue is full; handling packet on the receiving thread")
+                # Drain first so this packet is still handled after everything already queued.
+                self.flush()
+        self._handle(packet, interface)
+
+    def run_later(self, task: WorkerTask) -> None:
+        """Run ``task`` on the worker after the packets already queued, or now if the worker is stopped."""
+        if self.running:
+            try:
+                self._queue.put_nowait(task)
+                return
+            except queue.Full:
+                logging.warning("Packet queue is full; running task on the calling thread")
+                self.flush()
+        self._run_task(task)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every packet queued before this call has been handled."""
+        if not self.running:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        """Handle the packets already queued and stop the background thread."""
+        with self._state_lock:
+            thread = self._thread
+            if thread is None:
+                return
+            if thread.is_alive():
+                self._queue.put(self._stop_marker)
+                thread.join(timeout)
+                if thread.is_alive():
+                    logging.warning("Packet worker did not stop within %s seconds", timeout)
+                    return
+            self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is self._stop_marker:
+                return
+            if isinstance(item, threading.Event):
+                item.set()
+                continue
+            if callable(item):
+                self._run_task(item)
+                continue
+            self._handle(*item)
+
+    def _run_task(self, task: WorkerTask) -> None:
+        try:
+            task()
+        except Exception:
+            logging.exception("Packet worker task failed")
+
+    def _handle(self, packet: Dict[str, Any], interface: Any) -> None:
+        try:
+            self.handler(packet, interface)
+        except Exception:
+            # One malformed packet must not stop the worker.
+            logging.exception("Failed to handle received packet")
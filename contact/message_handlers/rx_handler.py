@@ -5,7 +5,10 @@ import shutil
 import time
 import subprocess
 import threading
-from typing import Any, Dict, Optional
+from collections import deque
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Dict, Optional, Tuple, Union
  # Debounce notification sounds so a burst of queued messages only plays once.
 _SOUND_DEBOUNCE_SECONDS = 0.8
 _sound_timer: Optional[threading.Timer] = None
@@ -50,18 +53,27 @@ from contact.utilities.utils import (
 )
 from contact.ui.contact_ui import (
     add_notification,
+    packet_log_row,
     request_ui_redraw,
 )
-from contact.utilities.db_handler import (
-    save_message_to_db,
-    maybe_store_nodeinfo_in_db,
-    get_name_from_database,
-    update_node_info_in_db,
+from contact.ui.ui_state import PacketLogEntry
+from contact.utilities.db_handler import get_name_from_database
+from contact.utilities.db_writer import (
+    queue_message_save,
+    queue_node_info_update,
+    queue_nodeinfo_save,
 )
 import contact.ui.default_config as config
 
 from contact.utilities.singleton import ui_state, interface_state, app_state, menu_state
 from contact.message_handlers.bot_handler import bot_respond
+from contact.message_handlers.packet_dedup import packet_deduplicator
+from contact.message_handlers.packet_processors import (
+    PacketProcessor,
+    packet_processors,
+    register_packet_processor,
+)
+from contact.message_handlers.packet_worker import PacketWorker
 
 
 def play_sound():
@@ -101,112 +113,221 @@ def play_sound():
         logging.error(f"Unexpected error: {e}")
 
 
+DEFAULT_PACKET_LOG_DEPTH = 20
+
+
+def packet_log_depth() -> int:
+    try:
+        return max(1, int(config.packet_log_depth))
+    except (TypeError, ValueError):
+        return DEFAULT_PACKET_LOG_DEPTH
+
+
+def log_packet(entry: PacketLogEntry) -> None:
+    """Add an entry to the packet log ring, which drops the oldest entry once it is full."""
+    depth = packet_log_depth()
+    if getattr(ui_state.packet_buffer, "maxlen", None) != depth:
+        ui_state.packet_buffer = deque(ui_state.packet_buffer, maxlen=depth)
+    ui_state.packet_buffer.append(entry)
+
+
+@dataclass(frozen=True)
+class ReceivedText:
+    """A decoded text message, ready to be added to the UI state."""
+
+    sender: int
+    recipient: int
+    channel_number: int
+    prefix: str
+    text: str
+    packet_id: Optional[int]
+    reply_id: Optional[int]
+    # The timestamp the message is saved with.
+    timestamp: int
+
+
+def decode_text_message(packet: Dict[str, Any]) -> ReceivedText:
+    """Decode a TEXT_MESSAGE_APP packet. Touches no UI state, so it runs without app_state.lock."""
+    hops = packet.get("hopStart", 0) - packet.get("hopLimit", 0)
+    sender_name = get_name_from_database(packet["from"], type="short")
+    return ReceivedText(
+        sender=packet["from"],
+        recipient=packet["to"],
+        channel_number=packet.get("channel") or 0,
+        prefix=f"{config.message_prefix} [{hops}] {sender_name}: ",
+        text=packet["decoded"]["payload"].decode("utf-8"),
+        packet_id=packet.get("id"),
+        # replyId is a field of Meshtastic's decrypted Data payload.
+        reply_id=packet["decoded"].get("replyId"),
+        timestamp=int(time.time()),
+    )
+
+
+def add_received_text(message: ReceivedText) -> Tuple[Union[int, str], int, bool]:
+    """Add a received message to its channel. Call with app_state.lock held.
+
+    Returns the channel id and index, and whether a new direct-message chat was opened.
+    """
+    channel_number = message.channel_number
+    new_chat = False
+    if message.recipient == interface_state.myNodeNum:
+        if message.sender not in ui_state.channel_list:
+            ui_state.channel_list.append(message.sender)
+            ui_state.all_messages.setdefault(message.sender, [])
+            new_chat = True
+        channel_number = ui_state.channel_list.index(message.sender)
+
+    channel_id = ui_state.channel_list[channel_number]
+    reply_context = get_reply_context(message.reply_id) if message.reply_id is not None else ""
+    add_new_message(
+        channel_id,
+        message.prefix,
+        f"{reply_context}{message.text}",
+        packet_id=message.packet_id,
+        saved_as=(message.timestamp, message.sender, message.text),
+    )
+
+    if channel_id != ui_state.channel_list[ui_state.selected_channel]:
+        add_notification(channel_number)
+        request_ui_redraw(channels=True)
+    else:
+        if new_chat:
+            request_ui_redraw(channels=True)
+        request_ui_redraw(
+            messages=True,
+            scroll_messages_to_bottom=True,
+            preserve_message_selection=(ui_state.current_window == 1),
+        )
+    return channel_id, channel_number, new_chat
+
+
+def complete_text_message(
+    packet: Dict[str, Any], message: ReceivedText, added: Tuple[Union[int, str], int, bool]
+) -> None:
+    channel_id, channel_number, new_chat = added
+    if str(config.notification_sound).casefold() not in {"none", "false", ""}:
+        schedule_notification_sound()
+    if new_chat:
+        queue_node_info_update(message.sender, chat_archived=False)
+
+    bot_respond(packet, message.text, channel_number)
+
+    queue_message_save(
+        channel_id,
+        message.sender,
+        message.text,
+        packet_id=message.packet_id,
+        reply_id=message.reply_id,
+        timestamp=message.timestamp,
+    )
+
+
+def has_node_name(packet: Dict[str, Any]) -> bool:
+    return "longName" in packet["decoded"].get("user", {})
+
+
+def complete_nodeinfo(packet: Dict[str, Any], named: bool, _added: Any) -> None:
+    if named:
+        queue_nodeinfo_save(packet)
+
+
+register_packet_processor(
+    "TEXT_MESSAGE_APP",
+    PacketProcessor(
+        decode=decode_text_message,
+        apply=add_received_text,
+        complete=complete_text_message,
+        needs_db=True,
+        needs_ui=True,
+        needs_bot=True,
+    ),
+)
+register_packet_processor(
+    "NODEINFO_APP",
+    PacketProcessor(decode=has_node_name, complete=complete_nodeinfo, needs_db=True),
+)
+
+
 def on_receive(packet: Dict[str, Any], interface: Any) -> None:
     """
     Handles an incoming packet from a Meshtastic interface.
 
+    Runs on the packet worker thread. The packet's processor is found by
+    portnum in ``packet_processors``; decoding, name lookups and database
+    writes happen outside app_state.lock, which is only held while prepared
+    changes are applied to the UI state.
+
     Args:
         packet: The received Meshtastic packet as a dictionary.
         interface: The Meshtastic interface instance that received the packet.
     """
-    with app_state.lock:
-        # Update packet log
-        ui_state.packet_buffer.append(packet)
-        if len(ui_state.packet_buffer) > 20:
-            # Trim buffer to 20 packets
-            ui_state.packet_buffer = ui_state.packet_buffer[-20:]
+    entry = PacketLogEntry(packet)
+    if ui_state.display_log:
+        # Format the row once now; redraws only copy it to the screen.
+        packet_log_row(entry)
+
+    decoded = packet.get("decoded")
+    processor = packet_processors.get(decoded.get("portnum")) if decoded is not None else None
+    prepared = applied = None
+    if processor is not None:
+        try:
+            prepared = processor.decode(packet)
+        except KeyError as e:
+            logging.error(f"Error processing packet: {e}")
+            processor = None
 
+    with app_state.lock:
+        log_packet(entry)
         if ui_state.display_log:
             request_ui_redraw(packetlog=True)
-
             if ui_state.current_window == 4:
                 menu_state.need_redraw = True
-        try:
-            if "decoded" not in packet:
-                return
-
-            # Assume any incoming packet could update the last seen time for a node
-            changed = refresh_node_list()
-            if changed:
-                request_ui_redraw(nodes=True)
-
-            if packet["decoded"]["portnum"] == "NODEINFO_APP":
-                if "user" in packet["decoded"] and "longName" in packet["decoded"]["user"]:
-                    maybe_store_nodeinfo_in_db(packet)
-
-            elif packet["decoded"]["portnum"] == "TEXT_MESSAGE_APP":
-                hop_start = packet.get('hopStart', 0)
-                hop_limit = packet.get('hopLimit', 0)
-
-                hops = hop_start - hop_limit
-
-
-                if str(config.notification_sound).casefold() not in {"none", "false", ""}:
-                    schedule_notification_sound()
-
-                message_bytes = packet["decoded"]["payload"]
-                message_string = message_bytes.decode("utf-8")
-
-                refresh_channels = False
-                refresh_messages = False
-
-                if packet.get("channel"):
-                    channel_number = packet["channel"]
-                else:
-                    channel_number = 0
-
-                if packet["to"] == interface_state.myNodeNum:
-                    if packet["from"] in ui_state.channel_list:
-                        pass
-                    else:
-                        ui_state.channel_list.append(packet["from"])
-                        if packet["from"] not in ui_state.all_messages:
-                            ui_state.all_messages[packet["from"]] = []
-                        update_node_info_in_db(packet["from"], chat_archived=False)
-                        refresh_channels = True
-
-                    channel_number = ui_state.channel_list.index(packet["from"])
-
-                bot_respond(packet, message_string, channel_number)
-
-                channel_id = ui_state.channel_list[channel_number]
-
-                if channel_id != ui_state.channel_list[ui_state.selected_channel]:
-                    add_notification(channel_number)
-                    refresh_channels = True
-                else:
-                    refresh_messages = True
-
-                # Add received message to the messages list
-                message_from_id = packet["from"]
-                message_from_string = get_name_from_database(message_from_id, type="short") + ":"
-
-                # replyId is a field of Meshtastic's decrypted Data payload.
-                reply_id = packet["decoded"].get("replyId")
-                reply_context = get_reply_context(reply_id) if reply_id is not None else ""
-                add_new_message(
-                    channel_id,
-                    f"{config.message_prefix} [{hops}] {message_from_string} ",
-                    f"{reply_context}{message_string}",
-                    packet_id=packet.get("id"),
-                )
-
-                if refresh_channels:
-                    request_ui_redraw(channels=True)
-                if refresh_messages:
-                    request_ui_redraw(
-                        messages=True,
-                        scroll_messages_to_bottom=True,
-                        preserve_message_selection=(ui_state.current_window == 1),
-                    )
-
-                save_message_to_db(
-                    channel_id,
-                    message_from_id,
-                    message_string,
-                    packet_id=packet.get("id"),
-                    reply_id=reply_id,
-                )
 
-        except KeyError as e:
-            logging.error(f"Error processing packet: {e}")
+        if decoded is None:
+            return
+
+        # Assume any incoming packet could update the last seen time of its sender
+        if refresh_node_list(packet.get("from")):
+            request_ui_redraw(nodes=True)
+
+        if processor is not None and processor.needs_ui:
+            applied = processor.apply(prepared)
+
+    if processor is not None and processor.runs_complete:
+        processor.complete(packet, prepared, applied)
+
+
+packet_worker = PacketWorker(on_receive)
+
+
+def apply_best_reception(node_num: int, best_hops: Optional[int], best_snr: Optional[float]) -> None:
+    """Show the best path seen for a node's latest packet on its node entry.
+
+    The interface updates a node from every copy it receives, so a late copy
+    over a longer path would otherwise replace the better hop count and SNR.
+    """
+    interface = interface_state.interface
+    node = (getattr(interface, "nodesByNum", None) or {}).get(node_num)
+    if node is None:
+        return
+    with app_state.lock:
+        if best_hops is not None:
+            node["hopsAway"] = best_hops
+        if best_snr is not None:
+            node["snr"] = best_snr
+        if refresh_node_list(node_num):
+            request_ui_redraw(nodes=True)
+
+
+def queue_packet(packet: Dict[str, Any], interface: Any) -> None:
+    """Listener for meshtastic.receive: hand the packet to the worker and return at once.
+
+    Repeated copies of a packet are dropped here, before any database or UI
+    work. A copy that arrived over a better path only updates its sender's
+    hop count and SNR.
+    """
+    sighting = packet_deduplicator.observe(packet)
+    if sighting.is_new:
+        packet_worker.submit(packet, interface)
+    elif sighting.improved:
+        packet_worker.run_later(partial(apply_best_reception, packet["from"], sighting.best_hops, sighting.best_snr))
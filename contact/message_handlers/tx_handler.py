@@ -6,23 +6,40 @@ import google.protobuf.json_format
 from meshtastic import BROADCAST_NUM
 from meshtastic.protobuf import mesh_pb2, portnums_pb2
 
-from contact.utilities.db_handler import (
-    save_message_to_db,
-    update_ack_nak,
-    get_name_from_database,
-    is_chat_archived,
-    update_node_info_in_db,
+from contact.utilities.db_handler import get_name_from_database, is_chat_archived, load_newest_messages
+from contact.utilities.db_writer import (
+    db_writer,
+    queue_ack_nak_update,
+    queue_message_save,
+    queue_node_info_update,
 )
 import contact.ui.default_config as config
 
 from contact.utilities.singleton import ui_state, interface_state, app_state
 
-from contact.utilities.utils import add_new_message
+from contact.utilities.utils import add_new_message, find_message_by_packet_id
 
-ack_naks: Dict[str, Dict[str, Any]] = {}  # requestId -> {channel, messageIndex, timestamp}
+ack_naks: Dict[str, Dict[str, Any]] = {}  # requestId -> {channel, messageIndex}
 
 
 # Note "onAckNak" has special meaning to the API, thus the nonstandard naming convention
+def _sent_message_index(acknak: Dict[str, Any], request: Any) -> Optional[int]:
+    """Find a sent message among those loaded; history paging shifts it from its original index."""
+    channel = acknak["channel"]
+    messages = ui_state.all_messages.get(channel, [])
+    packet_ids = ui_state.message_packet_ids.get(channel, [])
+    index = acknak["messageIndex"]
+    if not packet_ids:
+        return index if 0 <= index < len(messages) else None
+    if index < len(packet_ids) and packet_ids[index] == request:
+        return index
+    location = find_message_by_packet_id(request)
+    if location is not None and location[0] == channel:
+        return location[1]
+    # Evicted from the loaded window; the database update is all that is needed.
+    return None
+
+
 # See https://github.com/meshtastic/python/blob/master/meshtastic/mesh_interface.py#L462
 def onAckNak(packet: Dict[str, Any]) -> None:
     """
@@ -36,7 +53,7 @@ def onAckNak(packet: Dict[str, Any]) -> None:
             return
 
         acknak = ack_naks.pop(request)
-        message = ui_state.all_messages[acknak["channel"]][acknak["messageIndex"]][1]
+        message_index = _sent_message_index(acknak, request)
 
         confirm_string = " "
         ack_type = None
@@ -51,13 +68,17 @@ def onAckNak(packet: Dict[str, Any]) -> None:
             confirm_string = config.nak_str
             ack_type = "Nak"
 
-        ui_state.all_messages[acknak["channel"]][acknak["messageIndex"]] = (
+        # The request id is the sent packet's id, which is indexed in the messages table.
+        queue_ack_nak_update(request, ack_type)
+        if message_index is None:
+            return
+
+        message = ui_state.all_messages[acknak["channel"]][message_index][1]
+        ui_state.all_messages[acknak["channel"]][message_index] = (
             time.strftime("[%H:%M:%S] ") + config.sent_message_prefix + confirm_string + ": ",
             message,
         )
 
-        update_ack_nak(acknak["channel"], acknak["timestamp"], acknak["dbMessage"], ack_type)
-
         channel_number = ui_state.channel_list.index(acknak["channel"])
         if ui_state.channel_list[channel_number] == ui_state.channel_list[ui_state.selected_channel]:
             request_ui_redraw(messages=True)
@@ -142,7 +163,7 @@ def on_response_traceroute(packet: Dict[str, Any]) -> None:
             refresh_channels = True
 
         if is_chat_archived(packet["from"]):
-            update_node_info_in_db(packet["from"], chat_archived=False)
+            queue_node_info_update(packet["from"], chat_archived=False)
 
         channel_number = ui_state.channel_list.index(packet["from"])
         channel_id = ui_state.channel_list[channel_number]
@@ -155,14 +176,20 @@ def on_response_traceroute(packet: Dict[str, Any]) -> None:
 
         message_from_string = get_name_from_database(packet["from"], type="short") + ":\n"
 
-        add_new_message(channel_id, f"{config.message_prefix} {message_from_string}", msg_str)
+        timestamp = int(time.time())
+        add_new_message(
+            channel_id,
+            f"{config.message_prefix} {message_from_string}",
+            msg_str,
+            saved_as=(timestamp, packet["from"], msg_str),
+        )
 
         if refresh_channels:
             request_ui_redraw(channels=True)
         if refresh_messages:
             request_ui_redraw(messages=True, scroll_messages_to_bottom=True)
 
-        save_message_to_db(channel_id, packet["from"], msg_str)
+        queue_message_save(channel_id, packet["from"], msg_str, timestamp=timestamp)
 
 def send_message(
     message: str,
@@ -195,20 +222,27 @@ def send_message(
         send_kwargs["replyId"] = reply_id
     sent_message_data = interface_state.interface.sendText(**send_kwargs)
 
+    if ui_state.has_newer_messages.get(channel_id, False):
+        # Scrolled back past evicted pages; jump to the newest so the sent message is shown after them.
+        db_writer.flush(timeout=1.0)
+        load_newest_messages(channel_id)
+
+    timestamp = int(time.time())
     add_new_message(
         channel_id,
         config.sent_message_prefix + config.ack_unknown_str + ": ",
         f"{reply_context}{message}",
         packet_id=sent_message_data.id,
+        saved_as=(timestamp, myid, message),
     )
 
-    timestamp = save_message_to_db(channel_id, myid, message, packet_id=sent_message_data.id, reply_id=reply_id)
+    queue_message_save(
+        channel_id, myid, message, packet_id=sent_message_data.id, reply_id=reply_id, timestamp=timestamp
+    )
 
     ack_naks[sent_message_data.id] = {
         "channel": channel_id,
         "messageIndex": len(ui_state.all_messages[channel_id]) - 1,
-        "timestamp": timestamp,
-        "dbMessage": message,
     }
 
 
@@ -1,9 +1,16 @@
 import curses
 import logging
+import math
 import os
-from typing import Optional
+import sys
+import threading
+from typing import Iterator, List, Optional, Tuple
 import time
 import traceback
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
 from numbers import Real
 from typing import Union
 
@@ -12,8 +19,10 @@ from contact.utilities.utils import (
     get_readable_duration,
     get_time_ago,
     refresh_node_list,
+    remove_from_node_list,
     add_new_message,
     build_reply_prefix,
+    live_message_key,
 )
 from contact.settings import settings_menu
 from contact.ui.control_ui import RemoteAdminCancelled, verify_remote_admin
@@ -21,11 +30,23 @@ from contact.ui.user_config import load_log_tail
 from contact.message_handlers.tx_handler import send_message, send_traceroute
 from contact.utilities.utils import parse_protobuf
 from contact.ui.colors import get_color
-from contact.utilities.db_handler import get_name_from_database, update_node_info_in_db, is_chat_archived, load_older_messages
+from contact.utilities.db_handler import (
+    MessageSearchHit,
+    get_name_from_database,
+    node_cache,
+    is_chat_archived,
+    load_messages_through,
+    load_newer_messages,
+    load_newest_messages,
+    load_older_messages,
+    search_messages,
+)
+from contact.utilities.db_writer import db_writer, queue_node_info_update
 from contact.utilities.input_handlers import get_list_input
 from contact.utilities.interfaces import interface_is_connected
 from contact.utilities.i18n import t
 from contact.utilities.emoji_utils import normalize_message_text
+from contact.utilities.wakeup import TERMINAL_WAIT_SUPPORTED, InputWaiter, ui_wakeup
 import contact.ui.default_config as config
 import contact.ui.dialog
 from contact.ui.nav_utils import (
@@ -37,10 +58,30 @@ from contact.ui.nav_utils import (
     pad_to_width,
 )
 from contact.utilities.singleton import ui_state, interface_state, menu_state, app_state
+from contact.ui.ui_state import MessageLayout, PacketLogEntry
 
 
 MIN_COL = 1  # "effectively zero" without breaking curses
 RESIZE_DEBOUNCE_MS = 250
+MESSAGE_LAYOUT_CACHE_SIZE = 4096
+PACKET_LOG_COLUMNS = (10, 10, 15, 30)
+LIST_OVERSCAN_ROWS = 10  # List rows drawn beyond the visible ones in each direction
+FRAME_INTERVAL_SECONDS = 1 / 20  # Repaint damaged panes at most 20 times a second
+# Terminal resizes and dropped connections don't signal the wakeup pipe, so
+# an idle loop still looks for them this often.
+IDLE_WAIT_SECONDS = 1.0
+# Without a wakeup pipe to wait on, redraws requested by other threads are
+# noticed this often.
+POLL_INPUT_SECONDS = 0.2
+PANE_CHANNELS = "channels"
+PANE_MESSAGES = "messages"
+PANE_NODES = "nodes"
+PANE_PACKETLOG = "packetlog"
+PANE_FULL = "full"
+frame_depth = 0
+frame_pending = False
+# Guards ui_state.changed_node_nums, which node cache listeners fill from any thread.
+changed_node_nums_lock = threading.Lock()
 root_win = None
 nodes_pad = None
 
@@ -164,49 +205,101 @@ def request_ui_redraw(
     scroll_messages_to_bottom: bool = False,
     preserve_message_selection: bool = False,
 ) -> None:
-    ui_state.redraw_channels = ui_state.redraw_channels or channels
-    ui_state.redraw_messages = ui_state.redraw_messages or messages
-    ui_state.redraw_nodes = ui_state.redraw_nodes or nodes
-    ui_state.redraw_packetlog = ui_state.redraw_packetlog or packetlog
-    ui_state.redraw_full_ui = ui_state.redraw_full_ui or full
+    """Mark panes as damaged; the main loop repaints them on its next frame."""
+    for pane, damaged in (
+        (PANE_CHANNELS, channels),
+        (PANE_MESSAGES, messages),
+        (PANE_NODES, nodes),
+        (PANE_PACKETLOG, packetlog),
+        (PANE_FULL, full),
+    ):
+        if damaged:
+            ui_state.damaged_panes.add(pane)
     ui_state.scroll_messages_to_bottom = ui_state.scroll_messages_to_bottom or scroll_messages_to_bottom
     ui_state.preserve_message_selection = ui_state.preserve_message_selection or preserve_message_selection
+    ui_wakeup.notify()
+
+
+@contextmanager
+def batched_frame() -> Iterator[None]:
+    """Collect the window refreshes made inside into a single terminal update."""
+    global frame_depth, frame_pending
+    frame_depth += 1
+    try:
+        yield
+    finally:
+        frame_depth -= 1
+        if not frame_depth and frame_pending:
+            frame_pending = False
+            curses.doupdate()
+
+
+def refresh_window(win: curses.window, *args: int) -> None:
+    """Refresh a window or pad now, or stage it for the enclosing batched frame."""
+    global frame_pending
+    if frame_depth:
+        win.noutrefresh(*args)
+        frame_pending = True
+    else:
+        win.refresh(*args)
+
+
+def next_frame_delay(now: Optional[float] = None) -> float:
+    """Seconds until damaged panes may be repainted, or 0 when a frame is due."""
+    now = time.monotonic() if now is None else now
+    return max(0.0, ui_state.last_frame_time + FRAME_INTERVAL_SECONDS - now)
 
 
-def process_pending_ui_updates(stdscr: curses.window) -> None:
-    if ui_state.redraw_full_ui:
-        ui_state.redraw_full_ui = False
-        ui_state.redraw_channels = False
-        ui_state.redraw_messages = False
-        ui_state.redraw_nodes = False
-        ui_state.redraw_packetlog = False
-        ui_state.scroll_messages_to_bottom = False
-        ui_state.preserve_message_selection = False
+def input_wait_seconds() -> float:
+    """How long the main loop may wait for input before it has work to do."""
+    if not ui_state.damaged_panes:
+        return IDLE_WAIT_SECONDS
+    return min(IDLE_WAIT_SECONDS, next_frame_delay())
+
+
+def polled_input_timeout_ms() -> int:
+    """How long get_wch may block when the terminal cannot be waited on with the wakeup pipe."""
+    return max(1, int(min(POLL_INPUT_SECONDS, input_wait_seconds()) * 1000))
+
+
+def process_pending_ui_updates(stdscr: curses.window, now: Optional[float] = None) -> None:
+    """Repaint the damaged panes, at most once per frame interval, in one terminal update."""
+    apply_node_record_changes()
+    if not ui_state.damaged_panes:
+        return
+    now = time.monotonic() if now is None else now
+    if next_frame_delay(now) > 0:
+        # Packet storms damage panes faster than the terminal can show them;
+        # leave the damage pending so it is coalesced into the next frame.
+        return
+    ui_state.last_frame_time = now
+
+    damaged = ui_state.damaged_panes
+    ui_state.damaged_panes = set()
+    scroll_to_bottom = ui_state.scroll_messages_to_bottom
+    preserve_selection = ui_state.preserve_message_selection
+    ui_state.scroll_messages_to_bottom = False
+    ui_state.preserve_message_selection = False
+
+    if PANE_FULL in damaged:
         handle_resize(stdscr, False)
         return
 
-    if ui_state.redraw_channels:
-        ui_state.redraw_channels = False
-        draw_channel_list()
+    with batched_frame():
+        if PANE_CHANNELS in damaged:
+            draw_channel_list()
 
-    if ui_state.redraw_nodes:
-        ui_state.redraw_nodes = False
-        draw_node_list()
+        if PANE_NODES in damaged:
+            draw_node_list()
 
-    if ui_state.redraw_messages:
-        scroll_to_bottom = ui_state.scroll_messages_to_bottom
-        preserve_selection = ui_state.preserve_message_selection
-        ui_state.redraw_messages = False
-        ui_state.scroll_messages_to_bottom = False
-        ui_state.preserve_message_selection = False
-        if preserve_selection:
-            draw_messages_window(scroll_to_bottom, preserve_selection=True)
-        else:
-            draw_messages_window(scroll_to_bottom)
+        if PANE_MESSAGES in damaged:
+            if preserve_selection:
+                draw_messages_window(scroll_to_bottom, preserve_selection=True)
+            else:
+                draw_messages_window(scroll_to_bottom)
 
-    if ui_state.redraw_packetlog:
-        ui_state.redraw_packetlog = False
-        draw_packetlog_win()
+        if PANE_PACKETLOG in damaged:
+            draw_packetlog_win()
 
 
 # Draw arrows for a specific window id (0=channel,1=messages,2=nodes).
@@ -214,7 +307,7 @@ def draw_window_arrows(window_id: int) -> None:
 
     if window_id == 0:
         draw_main_arrows(channel_win, len(ui_state.channel_list), window=0)
-        channel_win.refresh()
+        refresh_window(channel_win)
     elif window_id == 1:
         msg_line_count = messages_pad.getmaxyx()[0]
         draw_main_arrows(
@@ -223,10 +316,10 @@ def draw_window_arrows(window_id: int) -> None:
             window=1,
             log_height=packetlog_win.getmaxyx()[0],
         )
-        messages_win.refresh()
+        refresh_window(messages_win)
     elif window_id == 2:
         draw_main_arrows(nodes_win, len(ui_state.node_list), window=2)
-        nodes_win.refresh()
+        refresh_window(nodes_win)
 
 
 def compute_widths(total_w: int, focus: int):
@@ -246,7 +339,7 @@ def paint_frame(win, selected: bool) -> None:
     win.attrset(get_color("window_frame_selected") if selected else get_color("window_frame"))
     win.box()
     win.attrset(get_color("window_frame"))
-    win.refresh()
+    refresh_window(win)
 
 
 def get_channel_row_color(index: int) -> int:
@@ -274,6 +367,7 @@ def refresh_node_selection(old_index: int = -1, highlight: bool = False) -> None
         return
 
     width = max(0, nodes_pad.getmaxyx()[1] - 4)
+    render_node_rows_around(ui_state.selected_node)
 
     if 0 <= old_index < len(ui_state.node_list):
         try:
@@ -358,6 +452,8 @@ def handle_resize(stdscr: curses.window, firstrun: bool) -> None:
 
     # Calculate window max dimensions
     height, width = stdscr.getmaxyx()
+    # Colors and widths may have changed; the next draw lays out every message again.
+    ui_state.message_layout = None
 
     if ui_state.single_pane_mode:
         channel_width = width
@@ -448,7 +544,7 @@ def handle_resize(stdscr: curses.window, firstrun: bool) -> None:
 
     for win in windows_to_draw:
         win.box()
-        win.refresh()
+        refresh_window(win)
 
     entry_win.keypad(True)
     entry_win.timeout(200)
@@ -457,6 +553,7 @@ def handle_resize(stdscr: curses.window, firstrun: bool) -> None:
     try:
         draw_channel_list()
         draw_messages_window(True)
+        draw_packetlog_win()
         draw_node_list()
         draw_window_arrows(ui_state.current_window)
 
@@ -486,12 +583,25 @@ def drain_resize_events(input_win: curses.window) -> Union[str, int, None]:
 
 def main_ui(stdscr: curses.window) -> None:
     """Main UI loop for the curses interface."""
-    global input_text
     global root_win
 
     root_win = stdscr
+    # Sleep until a key arrives or another thread requests a redraw. Where the
+    # terminal cannot be waited on, the loop polls get_wch on a timeout instead.
+    input_waiter = InputWaiter(sys.stdin.fileno(), ui_wakeup) if TERMINAL_WAIT_SUPPORTED else None
+    try:
+        run_main_loop(stdscr, input_waiter)
+    finally:
+        if input_waiter is not None:
+            input_waiter.close()
+
+
+def run_main_loop(stdscr: curses.window, input_waiter: Optional[InputWaiter]) -> None:
+    global input_text
+
     input_text = ""
     queued_char = None
+    input_pending = False
     stdscr.keypad(True)
     get_channels()
     handle_resize(stdscr, True)
@@ -553,20 +663,29 @@ def main_ui(stdscr: curses.window) -> None:
                 handle_resize(stdscr, False)
             continue
 
-        with app_state.lock:
-            process_pending_ui_updates(stdscr)
-        entry_display = f"{ui_state.reply_context}{input_text or ''}"
-        draw_text_field(entry_win, f"Message: {entry_display[-(stdscr.getmaxyx()[1] - 10):]}", get_color("input"))
+        with batched_frame():
+            with app_state.lock:
+                process_pending_ui_updates(stdscr)
+            entry_display = f"{ui_state.reply_context}{input_text or ''}"
+            draw_text_field(entry_win, f"Message: {entry_display[-(stdscr.getmaxyx()[1] - 10):]}", get_color("input"))
+
+        if queued_char is None and not input_pending and input_waiter is not None:
+            input_waiter.wait(input_wait_seconds())
 
-        # Get user input from entry window
+        # Get user input from entry window. Curses may hold more keys than the
+        # terminal has left to read, so keep reading without waiting until it
+        # runs dry.
         try:
             if queued_char is None:
+                entry_win.timeout(0 if input_waiter is not None or input_pending else polled_input_timeout_ms())
                 char = entry_win.get_wch()
             else:
                 char = queued_char
                 queued_char = None
         except curses.error:
+            input_pending = False
             continue
+        input_pending = True
 
         # draw_debug(f"Keypress: {char}")
 
@@ -691,6 +810,13 @@ def handle_end() -> None:
     if ui_state.current_window == 0:
         select_channel(len(ui_state.channel_list) - 1)
     elif ui_state.current_window == 1:
+        channel = ui_state.channel_list[ui_state.selected_channel] if ui_state.channel_list else None
+        if ui_state.has_newer_messages.get(channel, False):
+            # The newest pages were evicted while scrolling back; jump straight to them.
+            db_writer.flush(timeout=1.0)
+            if load_newest_messages(channel):
+                draw_messages_window(scroll_to_bottom=True)
+                return
         set_message_selection(messages_pad.getmaxyx()[0] - 1)
         refresh_message_highlight()
         refresh_pad(1)
@@ -791,7 +917,7 @@ def handle_enter(input_text: str) -> str:
         ui_state.selected_channel = ui_state.channel_list.index(node_list[ui_state.selected_node])
 
         if is_chat_archived(ui_state.channel_list[ui_state.selected_channel]):
-            update_node_info_in_db(ui_state.channel_list[ui_state.selected_channel], chat_archived=False)
+            queue_node_info_update(ui_state.channel_list[ui_state.selected_channel], chat_archived=False)
 
         ui_state.selected_node = 0
         ui_state.current_window = 0
@@ -1274,24 +1400,33 @@ def handle_ctrl_p() -> None:
     if ui_state.display_log is False:
         ui_state.display_log = True
         draw_messages_window(True)
+        draw_packetlog_win()
     else:
         ui_state.display_log = False
         packetlog_win.erase()
         draw_messages_window(True)
 
 
-def get_message_at_display_line(channel, display_line: int):
-    """Return the message containing a rendered line in a channel, if any."""
-    line = 0
-    for prefix, message in ui_state.all_messages.get(channel, []):
-        wrapped_lines = wrap_text(
-            normalize_message_text(f"{prefix}{message}"),
-            messages_win.getmaxyx()[1] - 2,
-        )
-        if line <= display_line < line + len(wrapped_lines):
-            return None if prefix.startswith("--") else (prefix, message)
-        line += len(wrapped_lines)
-    return None
+def get_message_index_at_display_line(channel, display_line: int) -> Optional[int]:
+    """Return the index of the message containing a rendered line in a channel, if any."""
+    messages = ui_state.all_messages.get(channel, [])
+    width = messages_win.getmaxyx()[1] - 2
+    layout = ui_state.message_layout
+    if layout is not None and layout.channel == channel and layout.width == width and layout.entries == messages:
+        # The pad already knows where each entry starts.
+        index = bisect_right(layout.entry_lines, display_line) - 1
+        if index < 0 or display_line >= layout.line_count:
+            return None
+    else:
+        index, line = None, 0
+        for entry_index, (prefix, message) in enumerate(messages):
+            line += len(wrap_message(prefix, message, width))
+            if display_line < line:
+                index = entry_index
+                break
+        if index is None:
+            return None
+    return None if messages[index][0].startswith("--") else index
 
 
 def handle_ctrl_r(input_text: str) -> str:
@@ -1306,17 +1441,12 @@ def handle_ctrl_r(input_text: str) -> str:
         return input_text
 
     channel = ui_state.channel_list[ui_state.selected_channel]
-    selected = get_message_at_display_line(channel, ui_state.selected_message)
-    if selected is None:
+    message_index = get_message_index_at_display_line(channel, ui_state.selected_message)
+    if message_index is None:
         return input_text
 
-    message_index = next(
-        index
-        for index, entry in enumerate(ui_state.all_messages[channel])
-        if entry == selected
-    )
     packet_ids = ui_state.message_packet_ids.get(channel, [])
-    prefix, message = selected
+    prefix, message = ui_state.all_messages[channel][message_index]
     ui_state.reply_context = build_reply_prefix(prefix, message)
     ui_state.reply_id = packet_ids[message_index] if message_index < len(packet_ids) else None
     ui_state.reply_id_unavailable = ui_state.reply_id is None
@@ -1343,6 +1473,7 @@ def handle_ctrl_k(stdscr: curses.window) -> None:
         t("ui.help.favorite", default="Ctrl+F = Favorite"),
         t("ui.help.ignore", default="Ctrl+G = Ignore"),
         t("ui.help.search", default="Ctrl+/ = Search"),
+        t("ui.help.search_messages", default="Ctrl+/ in Messages = Search message history"),
         t("ui.help.help", default="Ctrl+K = Help"),
     ]
 
@@ -1355,7 +1486,7 @@ def handle_ctrl_k(stdscr: curses.window) -> None:
 def handle_ctrl_d() -> None:
     if ui_state.current_window == 0:
         if isinstance(ui_state.channel_list[ui_state.selected_channel], int):
-            update_node_info_in_db(ui_state.channel_list[ui_state.selected_channel], chat_archived=True)
+            queue_node_info_update(ui_state.channel_list[ui_state.selected_channel], chat_archived=True)
 
             # Shift notifications up to account for deleted item
             for i in range(len(ui_state.notifications)):
@@ -1389,7 +1520,7 @@ def handle_ctrl_d() -> None:
             hexid = f"!{hex(ui_state.node_list[ui_state.selected_node])[2:]}"
             del interface_state.interface.nodes[hexid]
 
-            ui_state.node_list.pop(ui_state.selected_node)
+            remove_from_node_list(ui_state.node_list[ui_state.selected_node])
 
             draw_messages_window()
             draw_node_list()
@@ -1402,6 +1533,8 @@ def handle_ctrl_fslash() -> None:
     """Handle Ctrl + / key events to search in the current window."""
     if ui_state.current_window == 2 or ui_state.current_window == 0:
         search(ui_state.current_window)
+    elif ui_state.current_window == 1:
+        search_message_history()
 
 
 def handle_ctrl_f(stdscr: curses.window) -> None:
@@ -1485,33 +1618,79 @@ def handle_ctlr_g(stdscr: curses.window) -> None:
         handle_resize(stdscr, False)
 
 
-def draw_channel_list() -> None:
-    """Update the channel list window and pad based on the current state."""
+def channel_label(channel: Union[str, int]) -> Optional[str]:
+    """Name shown for a channel, or None for a direct chat that is archived or unnamed.
 
-    if ui_state.current_window != 0 and ui_state.single_pane_mode:
-        return
+    Direct chat labels are cached until the node cache reports a change to the node.
+    """
+    if not isinstance(channel, int):
+        return channel
+    try:
+        return ui_state.channel_labels[channel]
+    except KeyError:
+        pass
+    # Convert node number to long name
+    label = None if is_chat_archived(channel) else get_name_from_database(channel, type="long")
+    ui_state.channel_labels[channel] = label
+    return label
+
+
+def handle_node_records_changed(user_ids: Optional[List[str]]) -> None:
+    """Node cache listener, called on whichever thread changed the cache.
+
+    Only records the changed nodes and wakes the UI thread, which drops the
+    affected labels in apply_node_record_changes.
+    """
+    with changed_node_nums_lock:
+        if user_ids is None:
+            ui_state.changed_node_nums = None
+        elif ui_state.changed_node_nums is not None:
+            for user_id in user_ids:
+                try:
+                    ui_state.changed_node_nums.add(int(user_id))
+                except ValueError:
+                    continue
+    ui_wakeup.notify()
 
-    channel_pad.erase()
-    win_width = channel_win.getmaxyx()[1]
 
-    channel_pad.resize(max(1, len(ui_state.channel_list)), channel_win.getmaxyx()[1])
+def apply_node_record_changes() -> None:
+    """Forget labels derived from changed node records and repaint the lists showing them.
 
-    idx = 0
-    for channel in ui_state.channel_list:
-        # Convert node number to long name if it's an integer
-        if isinstance(channel, int):
-            if is_chat_archived(channel):
-                continue
-            channel_name = get_name_from_database(channel, type="long")
-            if channel_name is None:
-                continue
-            channel = channel_name
+    Runs on the UI thread with app_state.lock held.
+    """
+    with changed_node_nums_lock:
+        node_nums, ui_state.changed_node_nums = ui_state.changed_node_nums, set()
+    if node_nums is None:
+        ui_state.channel_labels.clear()
+        invalidate_node_rows()
+        request_ui_redraw(channels=True, nodes=True)
+        return
+
+    channels_changed = nodes_changed = False
+    for node_num in node_nums:
+        channels_changed |= node_num in ui_state.channel_labels
+        nodes_changed |= node_num in ui_state.node_row_labels
+        ui_state.channel_labels.pop(node_num, None)
+        ui_state.node_row_labels.pop(node_num, None)
+    if channels_changed or nodes_changed:
+        request_ui_redraw(channels=channels_changed, nodes=nodes_changed)
+
+
+def render_channel_rows_around(index: int) -> None:
+    """Draw the channel rows that can be on screen while row ``index`` is, plus an overscan."""
+    height, win_width = channel_win.getmaxyx()
+    reach = max(1, height - 2) + LIST_OVERSCAN_ROWS
+    rendered = ui_state.rendered_channel_rows
+    rows = ui_state.channel_rows
+    for idx in range(max(0, index - reach), min(len(rows), index + reach)):
+        if idx in rendered:
+            continue
 
         # Determine whether to add the notification
         notification = " " + config.notification_symbol if idx in ui_state.notifications else ""
 
         # Truncate the channel name if it's too long to fit in the window
-        truncated_channel = truncate_with_ellipsis(f"{channel}{notification}", win_width - 4)
+        truncated_channel = truncate_with_ellipsis(f"{rows[idx]}{notification}", win_width - 4)
 
         color = get_color("channel_list")
         if idx == ui_state.selected_channel:
@@ -1521,12 +1700,108 @@ def draw_channel_list() -> None:
             else:
                 color = get_color("channel_selected")
         channel_pad.addstr(idx, 1, truncated_channel, color)
-        idx += 1
+        rendered.add(idx)
+
+
+def draw_channel_list() -> None:
+    """Update the channel list window and pad based on the current state."""
+
+    if ui_state.current_window != 0 and ui_state.single_pane_mode:
+        return
+
+    channel_pad.erase()
+    channel_pad.resize(max(1, len(ui_state.channel_list)), channel_win.getmaxyx()[1])
+
+    labels = map(channel_label, ui_state.channel_list)
+    ui_state.channel_rows = [label for label in labels if label is not None]
+    ui_state.rendered_channel_rows = set()
+    render_channel_rows_around(ui_state.selected_channel)
 
     paint_frame(channel_win, selected=(ui_state.current_window == 0))
     refresh_pad(0)
     draw_window_arrows(0)
-    channel_win.refresh()
+    refresh_window(channel_win)
+
+
+@lru_cache(maxsize=MESSAGE_LAYOUT_CACHE_SIZE)
+def wrap_message(prefix: str, message: str, width: int) -> Tuple[str, ...]:
+    """Wrapped display lines of one message entry, memoized per pane width."""
+    return tuple(wrap_text(normalize_message_text(f"{prefix}{message}"), width))
+
+
+def message_color(prefix: str) -> int:
+    if prefix.startswith("--"):
+        return get_color("timestamps")
+    if prefix.find(config.sent_message_prefix) != -1:
+        return get_color("tx_messages")
+    return get_color("rx_messages")
+
+
+def first_changed_message(previous: List[tuple], current: List[tuple]) -> int:
+    """Index of the first entry that differs between two versions of a channel's messages."""
+    if len(current) >= len(previous) and current[: len(previous)] == previous:
+        return len(previous)
+    for index, (old, new) in enumerate(zip(previous, current)):
+        if old is not new and old != new:
+            return index
+    return min(len(previous), len(current))
+
+
+def render_message_lines(channel) -> int:
+    """Draw a channel's messages into the pad and return its line count.
+
+    Only entries from the first one that changed since the last draw are
+    wrapped and drawn again, so a new message costs one message's layout.
+    Switching channels, resizing, and loading older history lay out everything.
+    """
+    messages = ui_state.all_messages[channel]
+    pad_width = messages_win.getmaxyx()[1]
+    wrap_width = pad_width - 2
+    layout = ui_state.message_layout
+
+    if layout is not None and layout.width != wrap_width:
+        # Lines wrapped for the old width will not be asked for again.
+        wrap_message.cache_clear()
+
+    start = 0
+    if layout is not None and layout.channel == channel and layout.width == wrap_width and layout.pad is messages_pad:
+        start = first_changed_message(layout.entries, messages)
+        if start == len(messages) == len(layout.entries):
+            return layout.line_count
+    if start == 0:
+        messages_pad.erase()
+        layout = MessageLayout(channel=channel, width=wrap_width, pad=messages_pad)
+        message_ranges = []
+        first_line = 0
+    else:
+        first_line = layout.entry_lines[start] if start < len(layout.entry_lines) else layout.line_count
+        del layout.entry_lines[start:]
+        message_ranges = ui_state.message_line_ranges.get(channel, [])
+        message_ranges = message_ranges[: bisect_left(message_ranges, (first_line,))]
+        if first_line < layout.line_count:
+            messages_pad.move(first_line, 0)
+            messages_pad.clrtobot()
+
+    rendered_lines = []
+    for prefix, message in messages[start:]:
+        start_line = first_line + len(rendered_lines)
+        layout.entry_lines.append(start_line)
+        color = message_color(prefix)
+        rendered_lines.extend((line, color) for line in wrap_message(prefix, message, wrap_width))
+        if not prefix.startswith("--"):
+            message_ranges.append((start_line, first_line + len(rendered_lines), color))
+
+    line_count = first_line + len(rendered_lines)
+    if start == 0 or line_count != layout.line_count:
+        messages_pad.resize(max(1, line_count), pad_width)
+    for row, (line, color) in enumerate(rendered_lines, start=first_line):
+        messages_pad.addstr(row, 1, line, color)
+
+    layout.entries = list(messages)
+    layout.line_count = line_count
+    ui_state.message_layout = layout
+    ui_state.message_line_ranges[channel] = message_ranges
+    return line_count
 
 
 def draw_messages_window(scroll_to_bottom: bool = False, preserve_selection: bool = False) -> None:
@@ -1535,37 +1810,14 @@ def draw_messages_window(scroll_to_bottom: bool = False, preserve_selection: boo
     if ui_state.current_window != 1 and ui_state.single_pane_mode:
         return
 
-    messages_pad.erase()
-
     channel = ui_state.channel_list[ui_state.selected_channel]
 
     msg_line_count = 0
-    message_ranges = []
     if channel in ui_state.all_messages:
-        messages = ui_state.all_messages[channel]
-        rendered_lines = []
-        for prefix, message in messages:
-            start_line = len(rendered_lines)
-            full_message = normalize_message_text(f"{prefix}{message}")
-            wrapped_lines = wrap_text(full_message, messages_win.getmaxyx()[1] - 2)
-            for line in wrapped_lines:
-                if prefix.startswith("--"):
-                    color = get_color("timestamps")
-                elif prefix.find(config.sent_message_prefix) != -1:
-                    color = get_color("tx_messages")
-                else:
-                    color = get_color("rx_messages")
-
-                rendered_lines.append((line, color))
-
-            if not prefix.startswith("--"):
-                message_ranges.append((start_line, len(rendered_lines), color))
-
-        msg_line_count = len(rendered_lines)
-        messages_pad.resize(max(1, msg_line_count), messages_win.getmaxyx()[1])
-        for row, (line, color) in enumerate(rendered_lines):
-            messages_pad.addstr(row, 1, line, color)
-        ui_state.message_line_ranges[channel] = message_ranges
+        msg_line_count = render_message_lines(channel)
+    else:
+        messages_pad.erase()
+        ui_state.message_layout = None
 
     paint_frame(messages_win, selected=(ui_state.current_window == 1))
 
@@ -1582,11 +1834,9 @@ def draw_messages_window(scroll_to_bottom: bool = False, preserve_selection: boo
 
     refresh_message_highlight()
 
-    messages_win.refresh()
+    refresh_window(messages_win)
     refresh_pad(1)
-    draw_packetlog_win()
     draw_window_arrows(1)
-    messages_win.refresh()
     if ui_state.current_window == 4:
         menu_state.need_redraw = True
 
@@ -1606,10 +1856,8 @@ def refresh_message_highlight() -> None:
 
     channel = ui_state.channel_list[ui_state.selected_channel]
     ranges = ui_state.message_line_ranges.get(channel, [])
-    selected_range = next(
-        (line_range for line_range in ranges if line_range[0] <= ui_state.selected_message < line_range[1]),
-        None,
-    )
+    range_index = message_range_at(ranges, ui_state.selected_message)
+    selected_range = ranges[range_index] if range_index is not None else None
 
     if previous_range and previous_range != selected_range:
         start, end, color = previous_range
@@ -1629,6 +1877,8 @@ def draw_node_list() -> None:
     global nodes_pad
 
     if ui_state.current_window != 2 and ui_state.single_pane_mode:
+        # The order may have changed; rows are redrawn when the pane is shown.
+        ui_state.rendered_node_rows = set()
         return
 
     if nodes_pad is None:
@@ -1642,26 +1892,19 @@ def draw_node_list() -> None:
         logging.error(f"Error Drawing Nodes List: {e}")
         logging.error("Traceback: %s", traceback.format_exc())
 
-    for i, node_num in enumerate(ui_state.node_list):
-        node = interface_state.interface.nodesByNum[node_num]
-        secure = "user" in node and "publicKey" in node["user"] and node["user"]["publicKey"]
-        status_icon = "🔐" if secure else "🔓"
-        node_name = get_node_display_name(node_num, node)
-
-        # Future node name custom formatting possible
-        node_str = truncate_with_ellipsis(f"{status_icon} {node_name}", box_width - 4)
-        nodes_pad.addstr(i, 1, node_str, get_node_row_color(i))
+    ui_state.rendered_node_rows = set()
+    render_node_rows_around(ui_state.selected_node)
 
     paint_frame(nodes_win, selected=(ui_state.current_window == 2))
-    nodes_win.refresh()
+    refresh_window(nodes_win)
     refresh_pad(2)
     draw_window_arrows(2)
-    nodes_win.refresh()
+    refresh_window(nodes_win)
 
     # Restore cursor to input field
     entry_win.keypad(True)
     curses.curs_set(1)
-    entry_win.refresh()
+    refresh_window(entry_win)
 
     if ui_state.current_window == 4:
         menu_state.need_redraw = True
@@ -1671,6 +1914,7 @@ def select_channel(idx: int) -> None:
     """Select a channel by index and update the UI state accordingly."""
     old_selected_channel = ui_state.selected_channel
     ui_state.selected_channel = max(0, min(idx, len(ui_state.channel_list) - 1))
+    render_channel_rows_around(ui_state.selected_channel)
     draw_messages_window(True)
 
     # For now just re-draw channel list when clearing notifications, we can probably make this more efficient
@@ -1703,25 +1947,67 @@ def scroll_channels(direction: int) -> None:
 
 def scroll_messages(direction: int) -> None:
     """Scroll through the messages in the current channel by a given direction."""
-    if direction < 0 and ui_state.selected_message == 0 and ui_state.channel_list:
+    if ui_state.channel_list:
         channel = ui_state.channel_list[ui_state.selected_channel]
-        previous_height = messages_pad.getmaxyx()[0]
-        if load_older_messages(channel):
-            draw_messages_window()
-            added_height = max(0, messages_pad.getmaxyx()[0] - previous_height)
-            ui_state.selected_message = added_height
-            ui_state.start_index[1] = added_height
-            refresh_pad(1)
-            return
+        if direction < 0 and ui_state.selected_message == 0:
+            anchor_rowid = ui_state.oldest_message_rowid.get(channel)
+            if load_older_messages(channel):
+                draw_messages_window()
+                # Keep the message that was at the top in place above the loaded page.
+                anchor_line = message_line_for_rowid(channel, anchor_rowid) or 0
+                ui_state.selected_message = anchor_line
+                ui_state.start_index[1] = anchor_line
+                refresh_pad(1)
+                return
+        elif (
+            direction > 0
+            and ui_state.has_newer_messages.get(channel, False)
+            and ui_state.selected_message >= messages_pad.getmaxyx()[0] - 1
+        ):
+            anchor_rowid = ui_state.newest_message_rowid.get(channel)
+            # Messages received meanwhile may still be queued for saving.
+            db_writer.flush(timeout=1.0)
+            if load_newer_messages(channel):
+                draw_messages_window()
+                anchor_line = message_line_for_rowid(channel, anchor_rowid)
+                if anchor_line is not None:
+                    set_message_selection(anchor_line)
 
     move_message_selection(direction)
 
     refresh_message_highlight()
-    messages_win.refresh()
+    refresh_window(messages_win)
     refresh_pad(1)
     draw_window_arrows(ui_state.current_window)
 
 
+def message_range_at(ranges: List[tuple], line: int) -> Optional[int]:
+    """Index of the (start, end, color) message range containing a rendered line, found by bisection."""
+    index = bisect_right(ranges, (line, math.inf)) - 1
+    if index >= 0 and line < ranges[index][1]:
+        return index
+    return None
+
+
+def message_line_for_index(channel, message_index: int) -> Optional[int]:
+    """Return the first rendered line of an entry in a channel's message list."""
+    messages = ui_state.all_messages.get(channel, [])
+    layout = ui_state.message_layout
+    if layout is not None and layout.channel == channel and len(layout.entry_lines) == len(messages):
+        # The channel was just drawn, so its layout already knows where each entry starts.
+        return layout.entry_lines[message_index] if 0 <= message_index < len(messages) else None
+    ordinal = sum(1 for prefix, _message in messages[:message_index] if not prefix.startswith("--"))
+    ranges = ui_state.message_line_ranges.get(channel, [])
+    return ranges[ordinal][0] if ordinal < len(ranges) else None
+
+
+def message_line_for_rowid(channel, rowid: Optional[int]) -> Optional[int]:
+    rowids = ui_state.message_rowids.get(channel, [])
+    if rowid is None or rowid not in rowids:
+        return None
+    return message_line_for_index(channel, rowids.index(rowid))
+
+
 def set_message_selection(line: int) -> None:
     """Select a rendered message line and keep it visible without limiting selection to the viewport."""
     msg_line_count = messages_pad.getmaxyx()[0]
@@ -1748,10 +2034,7 @@ def move_message_selection(direction: int) -> None:
         set_message_selection(ui_state.selected_message + direction)
         return
 
-    current_index = next(
-        (index for index, line_range in enumerate(ranges) if line_range[0] <= ui_state.selected_message < line_range[1]),
-        None,
-    )
+    current_index = message_range_at(ranges, ui_state.selected_message)
     if current_index is None:
         current_index = 0 if direction > 0 else len(ranges) - 1
     else:
@@ -1775,10 +2058,52 @@ def select_last_message() -> None:
         set_message_selection(0)
 
 
+def node_row_label(node_num: int) -> str:
+    """Lock icon and display name shown for a node, cached until the node changes."""
+    label = ui_state.node_row_labels.get(node_num)
+    if label is None:
+        node = interface_state.interface.nodesByNum.get(node_num, {})
+        user = node.get("user") or {}
+        status_icon = "🔐" if user.get("publicKey") else "🔓"
+        # Future node name custom formatting possible
+        label = f"{status_icon} {get_node_display_name(node_num, node)}"
+        ui_state.node_row_labels[node_num] = label
+    return label
+
+
+def invalidate_node_rows(*node_nums: int) -> None:
+    """Drop cached row labels for the given nodes, or for every node when none are given."""
+    if not node_nums:
+        ui_state.node_row_labels.clear()
+        return
+    for node_num in node_nums:
+        ui_state.node_row_labels.pop(node_num, None)
+
+
+def render_node_rows_around(index: int) -> None:
+    """Draw the node rows that can be on screen while row ``index`` is, plus an overscan.
+
+    Only rows the pad does not already hold are drawn, so large meshes cost
+    a screenful of rows per redraw rather than one row per node.
+    """
+    if nodes_pad is None:
+        return
+    height, box_width = nodes_win.getmaxyx()
+    reach = max(1, height - 2) + LIST_OVERSCAN_ROWS
+    rendered = ui_state.rendered_node_rows
+    for row in range(max(0, index - reach), min(len(ui_state.node_list), index + reach)):
+        if row in rendered:
+            continue
+        node_str = truncate_with_ellipsis(node_row_label(ui_state.node_list[row]), box_width - 4)
+        nodes_pad.addstr(row, 1, node_str, get_node_row_color(row))
+        rendered.add(row)
+
+
 def select_node(idx: int) -> None:
     """Select a node by index and update the UI state accordingly."""
     old_selected_node = ui_state.selected_node
     ui_state.selected_node = max(0, min(idx, len(ui_state.node_list) - 1))
+    render_node_rows_around(ui_state.selected_node)
 
     move_main_highlight(
         old_idx=old_selected_node,
@@ -1802,9 +2127,38 @@ def scroll_nodes(direction: int) -> None:
     select_node(new_selected_node)
 
 
+def packet_log_node_name(node_num: Optional[int]) -> str:
+    if node_num is None:
+        return "UNKNOWN"
+    if str(node_num) == "4294967295":
+        return "BROADCAST"
+    return get_name_from_database(node_num, "short")
+
+
+def format_packet_log_row(packet: dict) -> str:
+    """Format one packet log line: sender, recipient, port and decoded payload."""
+    columns = PACKET_LOG_COLUMNS
+    from_id = packet_log_node_name(packet.get("from")).ljust(columns[0])
+    to_id = packet_log_node_name(packet.get("to")).ljust(columns[1])
+    if "decoded" in packet:
+        port = str(packet["decoded"].get("portnum", "")).ljust(columns[2])
+        parsed_payload = parse_protobuf(packet)
+    else:
+        port = "NO KEY".ljust(columns[2])
+        parsed_payload = "NO KEY"
+    return f"{from_id} {to_id} {port} {parsed_payload}"
+
+
+def packet_log_row(entry: PacketLogEntry) -> str:
+    """Return the entry's row, formatting it on first use."""
+    if entry.row is None:
+        entry.row = format_packet_log_row(entry.packet)
+    return entry.row
+
+
 def draw_packetlog_win() -> None:
     """Draw the packet log window with the latest packets."""
-    columns = [10, 10, 15, 30]
+    columns = PACKET_LOG_COLUMNS
     span = 0
 
     if ui_state.current_window != 1 and ui_state.single_pane_mode:
@@ -1823,37 +2177,18 @@ def draw_packetlog_win() -> None:
             1, 1, headers[: width - 2], get_color("log_header", underline=True)
         )  # Truncate headers if they exceed window width
 
-        for i, packet in enumerate(reversed(ui_state.packet_buffer)):
+        color = get_color("log")
+        for i, entry in enumerate(reversed(ui_state.packet_buffer)):
             if i >= height - 3:  # Skip if exceeds the window height
                 break
-
-            # Format each field
-            from_id = get_name_from_database(packet["from"], "short").ljust(columns[0])
-            to_id = (
-                "BROADCAST".ljust(columns[1])
-                if str(packet["to"]) == "4294967295"
-                else get_name_from_database(packet["to"], "short").ljust(columns[1])
-            )
-            if "decoded" in packet:
-                port = str(packet["decoded"].get("portnum", "")).ljust(columns[2])
-                parsed_payload = parse_protobuf(packet)
-            else:
-                port = "NO KEY".ljust(columns[2])
-                parsed_payload = "NO KEY"
-
-            # Combine and truncate if necessary
-            logString = f"{from_id} {to_id} {port} {parsed_payload}"
-            logString = logString[: width - 3]
-
-            # Add to the window
-            packetlog_win.addstr(i + 2, 1, logString, get_color("log"))
+            packetlog_win.addstr(i + 2, 1, packet_log_row(entry)[: width - 3], color)
 
         paint_frame(packetlog_win, selected=False)
 
     # Restore cursor to input field
     entry_win.keypad(True)
     curses.curs_set(1)
-    entry_win.refresh()
+    refresh_window(entry_win)
 
 
 def search(win: int) -> None:
@@ -1912,6 +2247,119 @@ def search(win: int) -> None:
     entry_win.erase()
 
 
+def read_search_text(prompt: str) -> str:
+    """Read a line of search text in the entry field. Escape cancels and returns an empty string."""
+    search_text = ""
+    entry_win.erase()
+    entry_win.timeout(-1)
+
+    try:
+        while True:
+            draw_centered_text_field(entry_win, f"{prompt}{search_text}", 0, get_color("input"))
+            try:
+                char = entry_win.get_wch()
+            except curses.error:
+                break
+
+            if char == chr(27):
+                search_text = ""
+                break
+            elif char in (chr(curses.KEY_ENTER), chr(10), chr(13)):
+                break
+            elif char in (curses.KEY_BACKSPACE, chr(127)):
+                search_text = search_text[:-1]
+                entry_win.erase()
+            elif isinstance(char, str):
+                search_text += char
+    finally:
+        entry_win.timeout(200)
+
+    entry_win.erase()
+    return search_text
+
+
+def format_search_hit(number: int, hit: MessageSearchHit) -> str:
+    """Render a message search result as one list row."""
+    when = datetime.fromtimestamp(hit.timestamp).strftime("%Y-%m-%d %H:%M") if hit.timestamp else ""
+    channel = get_name_from_database(hit.channel, "short") if isinstance(hit.channel, int) else hit.channel
+    if hit.user_id == str(interface_state.myNodeNum):
+        sender = config.sent_message_prefix.strip()
+    else:
+        sender = get_name_from_database(int(hit.user_id), "short") if str(hit.user_id).isdigit() else hit.user_id
+    text = " ".join(str(hit.message_text).split())
+    return f"{number}. {when} [{channel}] {sender}: {text}"
+
+
+def search_message_history() -> None:
+    """Search stored messages in every channel and jump to the chosen result."""
+    search_text = read_search_text(t("ui.prompt.search_messages", default="Search messages: "))
+    if not search_text.strip():
+        return
+
+    # Include messages that are still waiting in the write queue.
+    db_writer.flush(timeout=1.0)
+    hits = search_messages(search_text)
+    if not hits:
+        contact.ui.dialog.dialog(
+            t("ui.dialog.no_search_results_title", default="No matches"),
+            t("ui.dialog.no_search_results_body", default="No stored messages match {query}.", query=search_text),
+        )
+        return
+
+    options = [format_search_hit(number, hit) for number, hit in enumerate(hits, start=1)]
+    choice = get_list_input(
+        t("ui.prompt.search_results", default="Messages matching {query}", query=search_text), None, options
+    )
+    if choice in options:
+        jump_to_message(hits[options.index(choice)])
+
+
+def find_message_index(channel, hit: MessageSearchHit) -> Optional[int]:
+    """Locate a stored message among the messages shown for a channel."""
+    rowids = ui_state.message_rowids.get(channel, [])
+    if hit.message_id in rowids:
+        return rowids.index(hit.message_id)
+
+    # Messages added this session are shown without a row id; find them by what they were saved with.
+    live_key = live_message_key(hit.timestamp, hit.user_id, hit.message_text)
+    entry = ui_state.live_messages.get(channel, {}).get(live_key)
+    if entry is None:
+        return None
+    messages = ui_state.all_messages.get(channel, [])
+    for index in range(len(messages) - 1, -1, -1):
+        if messages[index] is entry:
+            return index
+    return None
+
+
+def jump_to_message(hit: MessageSearchHit) -> None:
+    """Open the channel holding a search result and select that message."""
+    channel = hit.channel
+    if channel not in ui_state.channel_list:
+        # Results can come from archived chats; opening one restores it like selecting the node does.
+        ui_state.channel_list.append(channel)
+        ui_state.all_messages.setdefault(channel, [])
+        if is_chat_archived(channel):
+            queue_node_info_update(channel, chat_archived=False)
+        draw_channel_list()
+
+    load_messages_through(channel, hit.message_id)
+    message_index = find_message_index(channel, hit)
+
+    ui_state.current_window = 1
+    select_channel(ui_state.channel_list.index(channel))
+    if message_index is None:
+        return
+
+    line = message_line_for_index(channel, message_index)
+    if line is not None:
+        set_message_selection(line)
+        refresh_message_highlight()
+        refresh_window(messages_win)
+        refresh_pad(1)
+        draw_window_arrows(1)
+
+
 def refresh_pad(window: int) -> None:
 
     # If in single-pane mode and this isn't the focused window, skip refreshing its (collapsed) pad
@@ -1928,8 +2376,10 @@ def refresh_pad(window: int) -> None:
         start_index = ui_state.start_index[1]
 
         if ui_state.display_log:
+            # The log overlays the messages pane; show it again on top without re-rendering it.
             packetlog_win.box()
-            packetlog_win.refresh()
+            packetlog_win.touchwin()
+            refresh_window(packetlog_win)
 
     elif window == 2:
         pad = nodes_pad
@@ -1972,9 +2422,10 @@ def refresh_pad(window: int) -> None:
         return
 
     draw_frame_title(box, get_window_title(window))
-    box.refresh()
+    refresh_window(box)
 
-    pad.refresh(
+    refresh_window(
+        pad,
         start_index,
         0,
         top,
@@ -2025,3 +2476,6 @@ def draw_centered_text_field(win: curses.window, text: str, y_offset: int, color
     y = (height // 2) + y_offset
     win.addstr(y, x, text, color)
     win.refresh()
+
+
+node_cache.add_listener(handle_node_records_changed)
@@ -279,6 +279,7 @@ def redraw_main_ui_after_reconnect(stdscr: object) -> None:
 
         get_channels()
         refresh_node_list()
+        contact_ui.invalidate_node_rows()
         if not contact_ui.ui_state.log_viewer_open:
             contact_ui.handle_resize(stdscr, False)
     except Exception:
@@ -234,6 +234,8 @@ def initialize_config() -> Dict[str, object]:
         "language": default_language,
         "message_prefix": ">>",
         "sent_message_prefix": ">> Sent",
+        "max_loaded_messages": "1000",
+        "packet_log_depth": "20",
         "notification_symbol": "*",
         "notification_sound": "alert.mp3",
         "ack_implicit_str": "[◌]",
@@ -247,6 +249,11 @@ def initialize_config() -> Dict[str, object]:
             "catch_words": "ping; test",
             "response_word": "Pong!",
         },
+        "message_retention": {
+            "max_age_days": "0",
+            "max_rows_per_channel": "0",
+            "archive_file_path": "",
+        },
         "COLOR_CONFIG_DARK": COLOR_CONFIG_DARK,
         "COLOR_CONFIG_LIGHT": COLOR_CONFIG_LIGHT,
         "COLOR_CONFIG_GREEN": COLOR_CONFIG_GREEN,
@@ -287,10 +294,11 @@ def assign_config_variables(loaded_config: Dict[str, object]) -> None:
     # Assign values to local variables
 
     global db_file_path, log_file_path, node_configs_file_path, message_prefix, sent_message_prefix
-    global notification_symbol, ack_implicit_str, ack_str, nak_str, ack_unknown_str
+    global max_loaded_messages, packet_log_depth, notification_symbol, ack_implicit_str, ack_str, nak_str, ack_unknown_str
     global node_list_16ths, channel_list_16ths, single_pane_mode
     global theme, COLOR_CONFIG, language
     global node_sort, notification_sound, ping_bot_enabled, ping_bot_catch_words, ping_bot_response_word
+    global retention_max_age_days, retention_max_rows_per_channel, retention_archive_file_path
 
     channel_list_16ths = loaded_config["channel_list_16ths"]
     node_list_16ths = loaded_config["node_list_16ths"]
@@ -301,6 +309,8 @@ def assign_config_variables(loaded_config: Dict[str, object]) -> None:
     language = loaded_config["language"]
     message_prefix = loaded_config["message_prefix"]
     sent_message_prefix = loaded_config["sent_message_prefix"]
+    max_loaded_messages = loaded_config.get("max_loaded_messages", "1000")
+    packet_log_depth = loaded_config.get("packet_log_depth", "20")
     notification_symbol = loaded_config["notification_symbol"]
     notification_sound = loaded_config["notification_sound"]
     ack_implicit_str = loaded_config["ack_implicit_str"]
@@ -313,6 +323,10 @@ def assign_config_variables(loaded_config: Dict[str, object]) -> None:
     ping_bot_enabled = ping_bot.get("enabled", "False")
     ping_bot_catch_words = ping_bot.get("catch_words", "ping; test")
     ping_bot_response_word = ping_bot.get("response_word", "Pong!")
+    message_retention = loaded_config.get("message_retention", {})
+    retention_max_age_days = message_retention.get("max_age_days", "0")
+    retention_max_rows_per_channel = message_retention.get("max_rows_per_channel", "0")
+    retention_archive_file_path = message_retention.get("archive_file_path", "")
     if theme == "dark":
         COLOR_CONFIG = loaded_config["COLOR_CONFIG_DARK"]
     elif theme == "light":
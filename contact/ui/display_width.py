@@ -0,0 +1,89 @@
+"""Terminal cell widths for the text drawn in Contact's panes.
+
+Every pane measures, clips or pads each line it draws, so these helpers
+avoid per-character Python work: ASCII text is measured by length, and other
+text goes through a per-character width table that is consulted with C-level
+``map``/``accumulate``/``bisect`` rather than a Python loop.
+"""
+
+from bisect import bisect_right
+from itertools import accumulate
+from typing import List, Tuple
+from unicodedata import east_asian_width
+
+
+class _CharWidths(dict):
+    """Cell width per character, filled in on first sight of each character."""
+
+    def __missing__(self, char: str) -> int:
+        width = 2 if east_asian_width(char) in "FW" else 1
+        self[char] = width
+        return width
+
+
+_char_widths = _CharWidths()
+_char_width = _char_widths.__getitem__
+
+
+def char_width(char: str) -> int:
+    return _char_width(char)
+
+
+def text_width(text: str) -> int:
+    if text.isascii():
+        # Every ASCII character is one cell wide.
+        return len(text)
+    return sum(map(_char_width, text))
+
+
+def _fit_to_width(text: str, max_width: int) -> Tuple[int, int]:
+    """Return how many leading characters of text fit in max_width cells, and their width."""
+    if max_width <= 0:
+        return 0, 0
+    if text.isascii():
+        count = min(len(text), max_width)
+        return count, count
+    cumulative = list(accumulate(map(_char_width, text)))
+    count = bisect_right(cumulative, max_width)
+    return count, cumulative[count - 1] if count else 0
+
+
+def slice_to_width(text: str, max_width: int) -> str:
+    count, _width = _fit_to_width(text, max_width)
+    return text[:count]
+
+
+def pad_to_width(text: str, width: int) -> str:
+    count, used = _fit_to_width(text, width)
+    return text[:count] + " " * max(0, width - used)
+
+
+def truncate_with_ellipsis(text: str, width: int) -> str:
+    if width <= 0:
+        return ""
+    used = text_width(text)
+    if used <= width:
+        return text + " " * (width - used)
+    if width == 1:
+        return "…"
+    count, used = _fit_to_width(text, width - 1)
+    return text[:count] + "…" + " " * max(0, width - used - char_width("…"))
+
+
+def split_text_to_width_chunks(text: str, width: int) -> List[str]:
+    if width <= 0:
+        return [""]
+    if text.isascii():
+        return [text[start : start + width] for start in range(0, len(text), width)] or [""]
+
+    cumulative = list(accumulate(map(_char_width, text)))
+    chunks = []
+    start, used = 0, 0
+    while start < len(text):
+        end = bisect_right(cumulative, used + width, lo=start)
+        if end == start:
+            # A character wider than the chunk can never be placed.
+            break
+        chunks.append(text[start:end])
+        start, used = end, cumulative[end - 1]
+    return chunks or [""]
@@ -1,8 +1,14 @@
 import curses
 import re
-from unicodedata import east_asian_width
 
 from contact.ui.colors import get_color
+from contact.ui.display_width import (
+    pad_to_width,
+    slice_to_width,
+    split_text_to_width_chunks,
+    text_width,
+    truncate_with_ellipsis,
+)
 from contact.utilities.i18n import t
 from contact.utilities.control_utils import transform_menu_path
 from typing import Any, Optional, List, Dict
@@ -327,55 +333,6 @@ def get_wrapped_help_text(
     return wrapped_help
 
 
-def text_width(text: str) -> int:
-    return sum(2 if east_asian_width(c) in "FW" else 1 for c in text)
-
-
-def slice_to_width(text: str, max_width: int) -> str:
-    if max_width <= 0:
-        return ""
-
-    width = 0
-    chars = []
-    for char in text:
-        char_width = text_width(char)
-        if width + char_width > max_width:
-            break
-        chars.append(char)
-        width += char_width
-    return "".join(chars)
-
-
-def pad_to_width(text: str, width: int) -> str:
-    clipped = slice_to_width(text, width)
-    return clipped + (" " * max(0, width - text_width(clipped)))
-
-
-def truncate_with_ellipsis(text: str, width: int) -> str:
-    if width <= 0:
-        return ""
-    if text_width(text) <= width:
-        return pad_to_width(text, width)
-    if width == 1:
-        return "…"
-    return pad_to_width(slice_to_width(text, width - 1) + "…", width)
-
-
-def split_text_to_width_chunks(text: str, width: int) -> List[str]:
-    if width <= 0:
-        return [""]
-
-    chunks = []
-    remaining = text
-    while remaining:
-        chunk = slice_to_width(remaining, width)
-        if not chunk:
-            break
-        chunks.append(chunk)
-        remaining = remaining[len(chunk) :]
-    return chunks or [""]
-
-
 def wrap_text(text: str, wrap_width: int) -> List[str]:
     """Wraps text while preserving spaces and breaking long words."""
 
@@ -1,4 +1,5 @@
-from typing import Any, Union, List, Dict
+from typing import Any, Deque, Union, List, Dict, Optional, Set, Tuple
+from collections import deque
 from dataclasses import dataclass, field
 
 
@@ -13,13 +14,33 @@ class MenuState:
     need_redraw: bool = False
 
 
+@dataclass
+class PacketLogEntry:
+    """A packet in the packet log, with its display row once it has been formatted."""
+
+    packet: Dict[str, Any]
+    row: Optional[str] = None
+
+
+@dataclass
+class MessageLayout:
+    """What the messages pad currently shows, so new messages can be drawn without a full re-wrap."""
+
+    channel: Any = None
+    width: int = 0
+    pad: Any = None
+    entries: List[Any] = field(default_factory=list)
+    entry_lines: List[int] = field(default_factory=list)
+    line_count: int = 0
+
+
 @dataclass
 class ChatUIState:
     display_log: bool = False
     channel_list: List[str] = field(default_factory=list)
     all_messages: Dict[str, List[str]] = field(default_factory=dict)
     notifications: List[str] = field(default_factory=list)
-    packet_buffer: List[str] = field(default_factory=list)
+    packet_buffer: Deque[PacketLogEntry] = field(default_factory=deque)
     node_list: List[str] = field(default_factory=list)
     selected_channel: int = 0
     selected_message: int = 0
@@ -32,11 +53,8 @@ class ChatUIState:
     show_save_option: bool = False
     menu_path: List[str] = field(default_factory=list)
     single_pane_mode: bool = False
-    redraw_channels: bool = False
-    redraw_messages: bool = False
-    redraw_nodes: bool = False
-    redraw_packetlog: bool = False
-    redraw_full_ui: bool = False
+    damaged_panes: Set[str] = field(default_factory=set)
+    last_frame_time: float = 0.0
     scroll_messages_to_bottom: bool = False
     preserve_message_selection: bool = False
     reconnect_attempted: bool = False
@@ -49,9 +67,23 @@ class ChatUIState:
     log_viewer_loaded: bool = False
     oldest_message_rowid: Dict[Union[str, int], int] = field(default_factory=dict)
     has_older_messages: Dict[Union[str, int], bool] = field(default_factory=dict)
+    newest_message_rowid: Dict[Union[str, int], int] = field(default_factory=dict)
+    has_newer_messages: Dict[Union[str, int], bool] = field(default_factory=dict)
     message_line_ranges: Dict[Union[str, int], List[tuple]] = field(default_factory=dict)
+    message_layout: Optional[MessageLayout] = None
     highlighted_message_range: tuple = field(default_factory=tuple)
     message_packet_ids: Dict[Union[str, int], List[Any]] = field(default_factory=dict)
+    message_rowids: Dict[Union[str, int], List[Optional[int]]] = field(default_factory=dict)
+    # Messages added this session that have no row id yet, by (timestamp, user_id, text) as they are saved.
+    live_messages: Dict[Union[str, int], Dict[Tuple[int, str, str], Tuple[str, str]]] = field(default_factory=dict)
+    message_index_by_packet_id: Dict[Any, Tuple[Union[str, int], int]] = field(default_factory=dict)
+    channel_labels: Dict[int, Optional[str]] = field(default_factory=dict)
+    channel_rows: List[str] = field(default_factory=list)
+    rendered_channel_rows: Set[int] = field(default_factory=set)
+    node_row_labels: Dict[int, str] = field(default_factory=dict)
+    # Nodes whose cache records changed since the UI thread last applied them; None means every node.
+    changed_node_nums: Optional[Set[int]] = field(default_factory=set)
+    rendered_node_rows: Set[int] = field(default_factory=set)
     reply_id: Any = None
     reply_context: str = ""
     reply_id_unavailable: bool = False
@@ -1,10 +1,22 @@
+import re
 import sqlite3
+import threading
 import time
 import logging
+from contextlib import contextmanager
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional, Union, Dict
-
-from contact.utilities.utils import build_reply_prefix, decimal_to_hex
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from contact.utilities.db_schema import (
+    has_message_search_index,
+    migrate_schema,
+    node_table_name,
+    prepare_node_table,
+    request_incremental_vacuum,
+)
+from contact.utilities.node_cache import NodeCache, NodeRecord
+from contact.utilities.utils import build_reply_prefix, decimal_to_hex, set_message_packet_ids
 import contact.ui.default_config as config
 
 
@@ -12,21 +24,155 @@ from contact.utilities.singleton import ui_state, interface_state
 
 
 MESSAGE_PAGE_SIZE = 100
+DEFAULT_LOADED_MESSAGES = 1000
+MESSAGE_SEARCH_LIMIT = 50
+SEARCH_CONTEXT_MESSAGES = 10
+STATEMENT_CACHE_SIZE = 256
+
+# One long-lived connection per thread. The meshtastic reader thread and the
+# curses thread each get their own, so neither waits on the other's cursor.
+_connection_state = threading.local()
+_open_connections: List[sqlite3.Connection] = []
+_open_connections_lock = threading.Lock()
+_connection_generation = 0
+# Database paths whose schema has already been migrated by this process.
+_migrated_paths = set()
+# Held while a path is migrated, so two threads opening it never migrate it at once.
+_migration_lock = threading.Lock()
+
+# Node names/flags are read on every redraw, so they are served from memory.
+node_cache = NodeCache()
+
+
+def _configure_connection(db_connection: sqlite3.Connection) -> None:
+    db_connection.execute("PRAGMA busy_timeout=10000")
+    # Before the WAL switch and the first table, so new databases start out incremental.
+    request_incremental_vacuum(db_connection)
+    try:
+        # WAL lets readers proceed while another thread commits, and NORMAL
+        # sync is durable across application crashes in WAL mode.
+        db_connection.execute("PRAGMA journal_mode=WAL")
+        db_connection.execute("PRAGMA synchronous=NORMAL")
+    except sqlite3.Error as e:
+        logging.warning(f"Could not enable WAL mode for {config.db_file_path}: {e}")
+
+
+def get_db_connection() -> sqlite3.Connection:
+    """Return this thread's pooled connection, reopening it if the database path changed.
+
+    sqlite3 caches prepared statements per connection, so reusing the
+    connection also reuses the compiled INSERT/UPDATE/SELECT statements.
+    """
+    db_path = config.db_file_path
+    db_connection = getattr(_connection_state, "connection", None)
+    if (
+        db_connection is not None
+        and _connection_state.path == db_path
+        and _connection_state.generation == _connection_generation
+    ):
+        return db_connection
+
+    if db_connection is not None:
+        _discard_connection(db_connection)
+
+    db_connection = sqlite3.connect(
+        db_path,
+        timeout=10.0,
+        check_same_thread=False,
+        cached_statements=STATEMENT_CACHE_SIZE,
+    )
+    _configure_connection(db_connection)
+    with _migration_lock:
+        if db_path not in _migrated_paths:
+            migrate_schema(db_connection)
+            _migrated_paths.add(db_path)
+
+    _connection_state.connection = db_connection
+    _connection_state.path = db_path
+    _connection_state.generation = _connection_generation
+    with _open_connections_lock:
+        _open_connections.append(db_connection)
+    return db_connection
+
+
+def _discard_connection(db_connection: sqlite3.Connection) -> None:
+    with _open_connections_lock:
+        if db_connection in _open_connections:
+            _open_connections.remove(db_connection)
+    try:
+        db_connection.close()
+    except sqlite3.Error:
+        pass
+
+
+def close_db_connections() -> None:
+    """Close every pooled connection and drop the node cache. Threads reconnect lazily."""
+    global _connection_generation
+
+    node_cache.clear()
+    _migrated_paths.clear()
+
+    with _open_connections_lock:
+        connections = list(_open_connections)
+        _open_connections.clear()
+        _connection_generation += 1
+
+    for db_connection in connections:
+        try:
+            db_connection.close()
+        except sqlite3.Error as e:
+            logging.warning(f"Error closing database connection: {e}")
+
+
+@contextmanager
+def db_transaction() -> Iterator[sqlite3.Cursor]:
+    """Yield a cursor on the pooled connection, committing on success and rolling back on error."""
+    db_connection = get_db_connection()
+    with db_connection:
+        yield db_connection.cursor()
 
 
-def get_table_name(channel: str) -> str:
-    # Construct the table name
-    table_name = f"{str(interface_state.myNodeNum)}_{channel}_messages"
-    quoted_table_name = f'"{table_name}"'  # Quote the table name becuase we begin with numerics and contain spaces
-    return quoted_table_name
+def channel_key(channel: Union[str, int]) -> str:
+    """Messages store channels as text; direct-message channels are the peer's node number."""
+    return str(channel)
 
 
-def _ensure_message_columns(db_cursor, quoted_table_name: str) -> None:
-    """Add fields introduced after the original message-history schema."""
-    table_columns = {row[1] for row in db_cursor.execute(f"PRAGMA table_info({quoted_table_name})")}
-    for column, definition in (("ack_type", "TEXT"), ("packet_id", "INTEGER"), ("reply_id", "INTEGER")):
-        if column not in table_columns:
-            db_cursor.execute(f"ALTER TABLE {quoted_table_name} ADD COLUMN {column} {definition}")
+def channel_from_key(key: str) -> Union[str, int]:
+    # Convert the channel to an integer if it's numeric, otherwise keep it as a string (nodenum vs channel name)
+    return int(key) if key.isdigit() else key
+
+
+MESSAGE_COLUMNS = "id, user_id, message_text, timestamp, ack_type, packet_id, reply_id"
+
+
+def write_message(
+    db_cursor: sqlite3.Cursor,
+    channel: str,
+    user_id: str,
+    message_text: str,
+    timestamp: int,
+    packet_id: Optional[int] = None,
+    reply_id: Optional[int] = None,
+) -> None:
+    """Insert a message using an open cursor so callers control the transaction."""
+    insert_query = """
+        INSERT INTO messages
+            (my_node, channel, user_id, message_text, timestamp, ack_type, packet_id, reply_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    db_cursor.execute(
+        insert_query,
+        (
+            interface_state.myNodeNum,
+            channel_key(channel),
+            user_id,
+            message_text,
+            timestamp,
+            None,
+            packet_id,
+            reply_id,
+        ),
+    )
 
 
 def save_message_to_db(
@@ -36,36 +182,12 @@ def save_message_to_db(
     packet_id: Optional[int] = None,
     reply_id: Optional[int] = None,
 ) -> Optional[int]:
-    """Save messages to the database, ensuring the table exists."""
+    """Save a message to the database now and return the timestamp it was stored with."""
     try:
-        quoted_table_name = get_table_name(channel)
-
-        schema = """
-            user_id TEXT,
-            message_text TEXT,
-            timestamp INTEGER,
-            ack_type TEXT,
-            packet_id INTEGER,
-            reply_id INTEGER
-        """
-        ensure_table_exists(quoted_table_name, schema)
-
-        with sqlite3.connect(config.db_file_path, timeout=10.0) as db_connection:
-            db_connection.execute("PRAGMA busy_timeout=10000")
-            db_cursor = db_connection.cursor()
-            _ensure_message_columns(db_cursor, quoted_table_name)
-            timestamp = int(time.time())
-
-            # Insert the message
-            insert_query = f"""
-                INSERT INTO {quoted_table_name}
-                    (user_id, message_text, timestamp, ack_type, packet_id, reply_id)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """
-            db_cursor.execute(insert_query, (user_id, message_text, timestamp, None, packet_id, reply_id))
-            db_connection.commit()
-
-            return timestamp
+        timestamp = int(time.time())
+        with db_transaction() as db_cursor:
+            write_message(db_cursor, channel, user_id, message_text, timestamp, packet_id, reply_id)
+        return timestamp
 
     except sqlite3.Error as e:
         logging.error(f"SQLite error in save_message_to_db: {e}")
@@ -73,21 +195,23 @@ def save_message_to_db(
         logging.error(f"Unexpected error in save_message_to_db: {e}")
 
 
-def update_ack_nak(channel: str, timestamp: int, message: str, ack: str) -> None:
+def write_ack_naks(db_cursor: sqlite3.Cursor, updates: Iterable[Tuple[int, str]]) -> None:
+    """Record the ACK state of sent messages, given (packet_id, ack) pairs, using an open cursor."""
+    update_query = """
+        UPDATE messages
+        SET ack_type = ?
+        WHERE packet_id = ? AND
+              my_node = ? AND
+              user_id = ?
+    """
+    my_node = interface_state.myNodeNum
+    db_cursor.executemany(update_query, [(ack, packet_id, my_node, str(my_node)) for packet_id, ack in updates])
+
+
+def update_ack_nak(packet_id: int, ack: str) -> None:
     try:
-        with sqlite3.connect(config.db_file_path, timeout=10.0) as db_connection:
-            db_connection.execute("PRAGMA busy_timeout=10000")
-            db_cursor = db_connection.cursor()
-            update_query = f"""
-                UPDATE {get_table_name(channel)}
-                SET ack_type = ?
-                WHERE user_id = ? AND
-                      timestamp = ? AND
-                      message_text = ?
-            """
-
-            db_cursor.execute(update_query, (ack, str(interface_state.myNodeNum), timestamp, message))
-            db_connection.commit()
+        with db_transaction() as db_cursor:
+            write_ack_naks(db_cursor, [(packet_id, ack)])
 
     except sqlite3.Error as e:
         logging.error(f"SQLite error in update_ack_nak: {e}")
@@ -97,10 +221,10 @@ def update_ack_nak(channel: str, timestamp: int, message: str, ack: str) -> None
 
 
 def _format_db_messages(db_messages, node_names):
-    """Format database rows and packet IDs, adding one timestamp separator per hour."""
+    """Format database rows with their packet IDs and row IDs, adding one timestamp separator per hour."""
     hourly_messages = {}
     known_messages = {}
-    for _rowid, user_id, message, timestamp, ack_type, packet_id, reply_id in db_messages:
+    for rowid, user_id, message, timestamp, ack_type, packet_id, reply_id in db_messages:
         if user_id is None or message is None or timestamp is None:
             logging.warning(f"Skipping row with NULL required field(s): {(user_id, message, timestamp, ack_type)}")
             continue
@@ -132,170 +256,434 @@ def _format_db_messages(db_messages, node_names):
             referenced_prefix, referenced_message = known_messages[reply_id]
             formatted_message = (formatted_message[0], build_reply_prefix(referenced_prefix, referenced_message) + sanitized_message)
 
-        hourly_messages.setdefault(hour, []).append((formatted_message, packet_id))
+        hourly_messages.setdefault(hour, []).append((formatted_message, packet_id, rowid))
         if packet_id is not None:
             known_messages[packet_id] = formatted_message
 
     formatted = []
     packet_ids = []
+    rowids = []
     for hour, messages in sorted(hourly_messages.items()):
         formatted.append((f"-- {hour} --", ""))
         packet_ids.append(None)
-        for formatted_message, packet_id in messages:
+        rowids.append(None)
+        for formatted_message, packet_id, rowid in messages:
             formatted.append(formatted_message)
             packet_ids.append(packet_id)
-    return formatted, packet_ids
+            rowids.append(rowid)
+    return formatted, packet_ids, rowids
+
 
+def _load_node_names():
+    return get_node_cache().short_names()
 
-def _load_node_names(db_cursor):
-    table_name = f'"{interface_state.myNodeNum}_nodedb"'
+
+def loaded_message_limit() -> int:
+    """Entries kept in memory per channel before pages far from the view are evicted."""
     try:
-        return {str(row[0]): row[1] for row in db_cursor.execute(f"SELECT user_id, short_name FROM {table_name}")}
-    except sqlite3.Error:
-        return {}
+        limit = int(config.max_loaded_messages)
+    except (TypeError, ValueError):
+        limit = DEFAULT_LOADED_MESSAGES
+    # Room for the page being loaded plus the page being looked at.
+    return max(limit, 2 * MESSAGE_PAGE_SIZE)
+
+
+def _fetch_message_page(
+    db_cursor: sqlite3.Cursor, key: str, bound: str, params: tuple, page_size: int, newest_first: bool
+) -> Tuple[List[tuple], bool]:
+    """Fetch up to page_size rows past a keyset bound on id, in id order, and whether more lie beyond."""
+    db_cursor.execute(
+        f"""
+        SELECT {MESSAGE_COLUMNS}
+        FROM messages
+        WHERE my_node = ? AND channel = ? {bound}
+        ORDER BY id {"DESC" if newest_first else "ASC"} LIMIT ?
+        """,
+        (interface_state.myNodeNum, key, *params, page_size + 1),
+    )
+    rows = db_cursor.fetchall()
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if newest_first:
+        rows.reverse()
+    return rows, has_more
+
+
+def _set_message_window(channel, db_messages, has_older: bool, has_newer: bool, node_names=None) -> None:
+    """Replace the messages shown for a channel with one contiguous run of stored rows."""
+    formatted_messages, packet_ids, rowids = _format_db_messages(
+        db_messages, _load_node_names() if node_names is None else node_names
+    )
+    ui_state.all_messages[channel] = formatted_messages
+    set_message_packet_ids(channel, packet_ids)
+    ui_state.message_rowids[channel] = rowids
+    # Every message shown now came from the database with its row id.
+    ui_state.live_messages.pop(channel, None)
+    if db_messages:
+        ui_state.oldest_message_rowid[channel] = db_messages[0][0]
+        ui_state.newest_message_rowid[channel] = db_messages[-1][0]
+    ui_state.has_older_messages[channel] = has_older
+    ui_state.has_newer_messages[channel] = has_newer
 
 
 def load_messages_from_db(page_size: int = MESSAGE_PAGE_SIZE) -> None:
     """Load messages from the database for all channels and update ui_state.all_messages and ui_state.channel_list."""
     try:
-        with sqlite3.connect(config.db_file_path, timeout=10.0) as db_connection:
-            db_connection.execute("PRAGMA busy_timeout=10000")
-            db_cursor = db_connection.cursor()
-
-            query = "SELECT name FROM sqlite_master WHERE type='table' AND name LIKE ?"
-            db_cursor.execute(query, (f"{str(interface_state.myNodeNum)}_%_messages",))
-            tables = [row[0] for row in db_cursor.fetchall()]
-            node_names = _load_node_names(db_cursor)
-
-            # Iterate through each table and fetch its messages
-            for table_name in tables:
-                quoted_table_name = (
-                    f'"{table_name}"'  # Quote the table name because we begin with numerics and contain spaces
-                )
-                _ensure_message_columns(db_cursor, quoted_table_name)
-
-                query = f"""
-                    SELECT rowid, user_id, message_text, timestamp, ack_type, packet_id, reply_id
-                    FROM {quoted_table_name}
-                    ORDER BY rowid DESC LIMIT ?
-                """
-
-                try:
-                    # Fetch all messages from the table
-                    db_cursor.execute(query, (page_size + 1,))
-                    rows = db_cursor.fetchall()
-                    has_older = len(rows) > page_size
-                    db_messages = list(reversed(rows[:page_size]))
-
-                    # Extract the channel name from the table name
-                    prefix = f"{interface_state.myNodeNum}_"
-                    channel = table_name[len(prefix) : -len("_messages")]
-
-                    # Convert the channel to an integer if it's numeric, otherwise keep it as a string (nodenum vs channel name)
-                    channel = int(channel) if channel.isdigit() else channel
-
-                    # Add the channel to ui_state.channel_list if not already present
-                    if channel not in ui_state.channel_list and not is_chat_archived(channel):
-                        ui_state.channel_list.append(channel)
-
-                    # Replace the channel's messages with the freshly loaded page to avoid duplicates
-                    formatted_messages, packet_ids = _format_db_messages(db_messages, node_names)
-                    ui_state.all_messages[channel] = formatted_messages
-                    ui_state.message_packet_ids[channel] = packet_ids
-                    if db_messages:
-                        ui_state.oldest_message_rowid[channel] = db_messages[0][0]
-                    ui_state.has_older_messages[channel] = has_older
-
-                except sqlite3.Error as e:
-                    logging.error(f"SQLite error while loading messages from table '{table_name}': {e}")
+        with db_transaction() as db_cursor:
+            db_cursor.execute("SELECT DISTINCT channel FROM messages WHERE my_node = ?", (interface_state.myNodeNum,))
+            channel_keys = [row[0] for row in db_cursor.fetchall()]
+            node_names = _load_node_names()
+
+            # Fetch the newest page of each channel
+            for key in channel_keys:
+                db_messages, has_older = _fetch_message_page(db_cursor, key, "", (), page_size, newest_first=True)
+
+                channel = channel_from_key(key)
+
+                # Add the channel to ui_state.channel_list if not already present
+                if channel not in ui_state.channel_list and not is_chat_archived(channel):
+                    ui_state.channel_list.append(channel)
+
+                # Replace the channel's messages with the freshly loaded page to avoid duplicates
+                _set_message_window(channel, db_messages, has_older, has_newer=False, node_names=node_names)
 
     except sqlite3.Error as e:
         logging.error(f"SQLite error in load_messages_from_db: {e}")
 
 
+def _loaded_message_lists(channel) -> Tuple[list, list, list]:
+    current = ui_state.all_messages.setdefault(channel, [])
+    current_packet_ids = ui_state.message_packet_ids.setdefault(channel, [])
+    current_rowids = ui_state.message_rowids.setdefault(channel, [])
+    while len(current_packet_ids) < len(current):
+        current_packet_ids.append(None)
+    while len(current_rowids) < len(current):
+        current_rowids.append(None)
+    return current, current_packet_ids, current_rowids
+
+
+def _prepend_message_rows(channel, db_messages, has_older: bool) -> None:
+    """Format older rows and put them in front of the messages already shown for a channel."""
+    older, older_packet_ids, older_rowids = _format_db_messages(db_messages, _load_node_names())
+    current, current_packet_ids, current_rowids = _loaded_message_lists(channel)
+    # Keep the existing page's leading separator even when the older page
+    # falls in the same hour. Removing it makes a timestamp that the user
+    # is looking at jump out of view as soon as another page is loaded.
+    ui_state.all_messages[channel] = older + current
+    set_message_packet_ids(channel, older_packet_ids + current_packet_ids)
+    ui_state.message_rowids[channel] = older_rowids + current_rowids
+    ui_state.oldest_message_rowid[channel] = db_messages[0][0]
+    ui_state.has_older_messages[channel] = has_older
+
+
+def _append_message_rows(channel, db_messages, has_newer: bool) -> None:
+    """Format newer rows and put them after the messages already shown for a channel."""
+    newer, newer_packet_ids, newer_rowids = _format_db_messages(db_messages, _load_node_names())
+    current, current_packet_ids, current_rowids = _loaded_message_lists(channel)
+    last_separator = next((prefix for prefix, _message in reversed(current) if prefix.startswith("--")), None)
+    if newer and newer[0][0] == last_separator:
+        # The first newer message continues the hour already on screen.
+        del newer[0], newer_packet_ids[0], newer_rowids[0]
+    ui_state.all_messages[channel] = current + newer
+    set_message_packet_ids(channel, current_packet_ids + newer_packet_ids)
+    ui_state.message_rowids[channel] = current_rowids + newer_rowids
+    ui_state.newest_message_rowid[channel] = db_messages[-1][0]
+    ui_state.has_newer_messages[channel] = has_newer
+
+
+def _evict_oldest_messages(channel, limit: int) -> int:
+    """Drop entries from the top of a channel's window down to ``limit`` and return how many went."""
+    messages, packet_ids, rowids = _loaded_message_lists(channel)
+    cut = len(messages) - limit
+    if cut <= 0:
+        return 0
+    kept_messages, kept_packet_ids, kept_rowids = messages[cut:], packet_ids[cut:], rowids[cut:]
+    if not kept_messages[0][0].startswith("--"):
+        # Carry the hour separator of the first kept message over the cut.
+        separator = next((prefix for prefix, _message in reversed(messages[:cut]) if prefix.startswith("--")), None)
+        if separator is not None:
+            kept_messages.insert(0, (separator, ""))
+            kept_packet_ids.insert(0, None)
+            kept_rowids.insert(0, None)
+    oldest_rowid = next((rowid for rowid in kept_rowids if rowid is not None), None)
+    if oldest_rowid is None:
+        return 0
+
+    ui_state.all_messages[channel] = kept_messages
+    set_message_packet_ids(channel, kept_packet_ids)
+    ui_state.message_rowids[channel] = kept_rowids
+    ui_state.oldest_message_rowid[channel] = oldest_rowid
+    ui_state.has_older_messages[channel] = True
+    return len(messages) - len(kept_messages)
+
+
+def _evict_newest_messages(channel, limit: int) -> int:
+    """Drop entries from the bottom of a channel's window down to ``limit`` and return how many went."""
+    messages, packet_ids, rowids = _loaded_message_lists(channel)
+    if len(messages) <= limit:
+        return 0
+    cut = limit
+    # Messages received this session have no row id yet; they are the newest
+    # rows, so drop them all and let load_newer_messages bring them back.
+    live_index = next(
+        (index for index, rowid in enumerate(rowids) if rowid is None and not messages[index][0].startswith("--")),
+        None,
+    )
+    if live_index is not None:
+        cut = min(cut, live_index)
+    while cut > 0 and messages[cut - 1][0].startswith("--"):
+        cut -= 1
+    newest_rowid = next((rowid for rowid in reversed(rowids[:cut]) if rowid is not None), None)
+    if newest_rowid is None:
+        return 0
+
+    ui_state.all_messages[channel] = messages[:cut]
+    set_message_packet_ids(channel, packet_ids[:cut])
+    ui_state.message_rowids[channel] = rowids[:cut]
+    ui_state.newest_message_rowid[channel] = newest_rowid
+    ui_state.has_newer_messages[channel] = True
+    return len(messages) - cut
+
+
 def load_older_messages(channel, page_size: int = MESSAGE_PAGE_SIZE) -> int:
-    """Prepend one older page for a channel and return the number of messages loaded."""
+    """Prepend one older page for a channel and return the number of messages loaded.
+
+    Once the channel holds more than loaded_message_limit() entries, the
+    newest ones are evicted; load_newer_messages reloads them.
+    """
     before_rowid = ui_state.oldest_message_rowid.get(channel)
     if before_rowid is None or not ui_state.has_older_messages.get(channel, False):
         return 0
 
     try:
-        with sqlite3.connect(config.db_file_path, timeout=10.0) as db_connection:
-            db_connection.execute("PRAGMA busy_timeout=10000")
-            db_cursor = db_connection.cursor()
-            query = f"""
-                SELECT rowid, user_id, message_text, timestamp, ack_type, packet_id, reply_id
-                FROM {get_table_name(channel)}
-                WHERE rowid < ? ORDER BY rowid DESC LIMIT ?
-            """
-            db_cursor.execute(query, (before_rowid, page_size + 1))
-            rows = db_cursor.fetchall()
-            has_older = len(rows) > page_size
-            db_messages = list(reversed(rows[:page_size]))
-            if not db_messages:
-                ui_state.has_older_messages[channel] = False
-                return 0
-
-            older, older_packet_ids = _format_db_messages(db_messages, _load_node_names(db_cursor))
-            current = ui_state.all_messages.setdefault(channel, [])
-            current_packet_ids = ui_state.message_packet_ids.setdefault(channel, [])
-            while len(current_packet_ids) < len(current):
-                current_packet_ids.append(None)
-            # Keep the existing page's leading separator even when the older page
-            # falls in the same hour. Removing it makes a timestamp that the user
-            # is looking at jump out of view as soon as another page is loaded.
-            ui_state.all_messages[channel] = older + current
-            ui_state.message_packet_ids[channel] = older_packet_ids + current_packet_ids
-            ui_state.oldest_message_rowid[channel] = db_messages[0][0]
-            ui_state.has_older_messages[channel] = has_older
-            return len(db_messages)
+        with db_transaction() as db_cursor:
+            db_messages, has_older = _fetch_message_page(
+                db_cursor, channel_key(channel), "AND id < ?", (before_rowid,), page_size, newest_first=True
+            )
     except sqlite3.Error as e:
         logging.error(f"SQLite error loading older messages for channel '{channel}': {e}")
         return 0
 
+    if not db_messages:
+        ui_state.has_older_messages[channel] = False
+        return 0
+    _prepend_message_rows(channel, db_messages, has_older)
+    _evict_newest_messages(channel, loaded_message_limit())
+    return len(db_messages)
+
+
+def load_newer_messages(channel, page_size: int = MESSAGE_PAGE_SIZE) -> int:
+    """Append one newer page to a channel whose newest pages were evicted, evicting the oldest instead.
+
+    Returns the number of messages loaded.
+    """
+    after_rowid = ui_state.newest_message_rowid.get(channel)
+    if after_rowid is None or not ui_state.has_newer_messages.get(channel, False):
+        return 0
+
+    try:
+        with db_transaction() as db_cursor:
+            db_messages, has_newer = _fetch_message_page(
+                db_cursor, channel_key(channel), "AND id > ?", (after_rowid,), page_size, newest_first=False
+            )
+    except sqlite3.Error as e:
+        logging.error(f"SQLite error loading newer messages for channel '{channel}': {e}")
+        return 0
+
+    if not db_messages:
+        ui_state.has_newer_messages[channel] = False
+        return 0
+    _append_message_rows(channel, db_messages, has_newer)
+    _evict_oldest_messages(channel, loaded_message_limit())
+    return len(db_messages)
+
+
+def load_newest_messages(channel, page_size: int = MESSAGE_PAGE_SIZE) -> bool:
+    """Reset a channel's window to its newest page. Returns False if nothing was reloaded."""
+    if not ui_state.has_newer_messages.get(channel, False):
+        return False
+
+    try:
+        with db_transaction() as db_cursor:
+            db_messages, has_older = _fetch_message_page(
+                db_cursor, channel_key(channel), "", (), page_size, newest_first=True
+            )
+    except sqlite3.Error as e:
+        logging.error(f"SQLite error loading newest messages for channel '{channel}': {e}")
+        return False
+
+    _set_message_window(channel, db_messages, has_older, has_newer=False)
+    return True
+
+
+def load_messages_through(channel, message_id: int, context: int = SEARCH_CONTEXT_MESSAGES) -> bool:
+    """Make sure a stored message is in a channel's loaded window, with a few messages of context.
+
+    Nearby history is extended; a message far outside the window gets a new
+    window centred on it. Returns False if the message could not be loaded.
+    """
+    oldest_rowid = ui_state.oldest_message_rowid.get(channel)
+    newest_rowid = ui_state.newest_message_rowid.get(channel)
+    if oldest_rowid is None or (
+        oldest_rowid <= message_id
+        and (not ui_state.has_newer_messages.get(channel, False) or message_id <= newest_rowid)
+    ):
+        # Already shown: either inside the loaded window or among messages
+        # received this session, which are newer than anything loaded.
+        return True
+
+    limit = loaded_message_limit()
+    key = channel_key(channel)
+    try:
+        with db_transaction() as db_cursor:
+            older_rows, has_older = _fetch_message_page(
+                db_cursor, key, "AND id < ?", (message_id,), context, newest_first=True
+            )
+            if message_id < oldest_rowid:
+                gap_rows, gap_is_wide = _fetch_message_page(
+                    db_cursor, key, "AND id >= ? AND id < ?", (message_id, oldest_rowid), limit, newest_first=False
+                )
+                if not gap_rows or gap_rows[0][0] != message_id:
+                    return False
+                if not gap_is_wide:
+                    _prepend_message_rows(channel, older_rows + gap_rows, has_older)
+                    _evict_newest_messages(channel, limit)
+                    return True
+
+            newer_rows, has_newer = _fetch_message_page(
+                db_cursor, key, "AND id >= ?", (message_id,), MESSAGE_PAGE_SIZE, newest_first=False
+            )
+            if not newer_rows or newer_rows[0][0] != message_id:
+                return False
+            _set_message_window(channel, older_rows + newer_rows, has_older, has_newer)
+            return True
+    except sqlite3.Error as e:
+        logging.error(f"SQLite error loading history for channel '{channel}': {e}")
+        return False
+
+
+@dataclass(frozen=True)
+class MessageSearchHit:
+    message_id: int
+    channel: Union[str, int]
+    user_id: str
+    message_text: str
+    timestamp: int
+
+
+def _search_terms(query: str) -> List[str]:
+    return re.findall(r"\w+", query)
+
+
+def search_messages(query: str, limit: int = MESSAGE_SEARCH_LIMIT) -> List[MessageSearchHit]:
+    """Search stored messages of every channel, best matches first.
+
+    Every word must match, and the last word also matches as a prefix so
+    results appear while typing. Uses the FTS5 index ranked by bm25 when
+    available, otherwise a LIKE scan ordered newest first.
+    """
+    terms = _search_terms(query)
+    if not terms:
+        return []
+
+    try:
+        with db_transaction() as db_cursor:
+            if has_message_search_index(db_cursor):
+                match = " ".join(f'"{term}"' for term in terms) + "*"
+                db_cursor.execute(
+                    """
+                    SELECT m.id, m.channel, m.user_id, m.message_text, m.timestamp
+                    FROM messages_fts
+                    JOIN messages AS m ON m.id = messages_fts.rowid
+                    WHERE messages_fts MATCH ? AND m.my_node = ?
+                    ORDER BY bm25(messages_fts), m.id DESC
+                    LIMIT ?
+                    """,
+                    (match, interface_state.myNodeNum, limit),
+                )
+            else:
+                # Terms are word characters, so "_" is the only LIKE wildcard they can contain.
+                conditions = " AND ".join("message_text LIKE ? ESCAPE '\\'" for _ in terms)
+                patterns = ["%" + term.replace("_", "\\_") + "%" for term in terms]
+                db_cursor.execute(
+                    f"""
+                    SELECT id, channel, user_id, message_text, timestamp
+                    FROM messages
+                    WHERE my_node = ? AND {conditions}
+                    ORDER BY id DESC
+                    LIMIT ?
+                    """,
+                    (interface_state.myNodeNum, *patterns, limit),
+                )
+            return [
+                MessageSearchHit(rowid, channel_from_key(key), user_id, message_text, timestamp)
+                for rowid, key, user_id, message_text, timestamp in db_cursor.fetchall()
+            ]
+    except sqlite3.Error as e:
+        logging.error(f"SQLite error in search_messages: {e}")
+        return []
+
 
 def init_nodedb() -> None:
     """Initialize the node database and update it with nodes from the interface."""
 
     try:
+        # Migrates the schema, prepares the node table and warms the cache so
+        # neither writes nor UI lookups need to touch the schema afterwards.
+        get_node_cache()
         if not interface_state.interface.nodes:
             return  # No nodes to initialize
 
-        ensure_node_table_exists()  # Ensure the table exists before insertion
         nodes_snapshot = list(interface_state.interface.nodes.values())
 
-        # Insert or update all nodes
-        for node in nodes_snapshot:
-            update_node_info_in_db(
-                user_id=node["num"],
-                long_name=node["user"].get("longName", ""),
-                short_name=node["user"].get("shortName", ""),
-                hw_model=node["user"].get("hwModel", ""),
-                is_licensed=node["user"].get("isLicensed", "0"),
-                role=node["user"].get("role", "CLIENT"),
-                public_key=node["user"].get("publicKey", ""),
+        # Merge every node against the cache in memory, then write only the
+        # rows that actually changed in a single statement.
+        changed_records = get_node_cache().merge_many(
+            (
+                node["num"],
+                {
+                    "long_name": node["user"].get("longName", ""),
+                    "short_name": node["user"].get("shortName", ""),
+                    "hw_model": node["user"].get("hwModel", ""),
+                    "is_licensed": node["user"].get("isLicensed", "0"),
+                    "role": node["user"].get("role", "CLIENT"),
+                    "public_key": node["user"].get("publicKey", ""),
+                },
             )
+            for node in nodes_snapshot
+            if "user" in node
+        )
+        if changed_records:
+            with db_transaction() as db_cursor:
+                write_node_records(db_cursor, changed_records)
 
-        logging.info("Node database initialized successfully.")
+        logging.info(f"Node database initialized successfully ({len(changed_records)} nodes updated).")
 
     except sqlite3.Error as e:
         logging.error(f"SQLite error in init_nodedb: {e}")
+        node_cache.clear()  # The merged records were not saved; reload from disk next time
     except Exception as e:
         logging.error(f"Unexpected error in init_nodedb: {e}")
 
 
+def nodeinfo_from_packet(packet: Dict[str, object]) -> Dict[str, object]:
+    """Extract the node-table fields carried by a NODEINFO_APP packet."""
+    user = packet["decoded"]["user"]
+    return {
+        "user_id": packet["from"],
+        "long_name": user["longName"],
+        "short_name": user["shortName"],
+        "hw_model": user["hwModel"],
+        "is_licensed": user.get("isLicensed", "0"),
+        "role": user.get("role", "CLIENT"),
+        "public_key": user.get("publicKey", ""),
+    }
+
+
 def maybe_store_nodeinfo_in_db(packet: Dict[str, object]) -> None:
     """Save nodeinfo unless that record is already there, updating if necessary."""
     try:
-        user_id = packet["from"]
-        long_name = packet["decoded"]["user"]["longName"]
-        short_name = packet["decoded"]["user"]["shortName"]
-        hw_model = packet["decoded"]["user"]["hwModel"]
-        is_licensed = packet["decoded"]["user"].get("isLicensed", "0")
-        role = packet["decoded"]["user"].get("role", "CLIENT")
-        public_key = packet["decoded"]["user"].get("publicKey", "")
-
-        update_node_info_in_db(user_id, long_name, short_name, hw_model, is_licensed, role, public_key)
+        update_node_info_in_db(**nodeinfo_from_packet(packet))
 
     except sqlite3.Error as e:
         logging.error(f"SQLite error in maybe_store_nodeinfo_in_db: {e}")
@@ -303,6 +691,78 @@ def maybe_store_nodeinfo_in_db(packet: Dict[str, object]) -> None:
         logging.error(f"Unexpected error in maybe_store_nodeinfo_in_db: {e}")
 
 
+def get_node_cache() -> NodeCache:
+    """Return the node cache, loading it from the node table on first use for this database/node."""
+    cache_key = (config.db_file_path, interface_state.myNodeNum)
+    if node_cache.is_loaded_for(cache_key):
+        return node_cache
+
+    with node_cache.lock:
+        if not node_cache.is_loaded_for(cache_key):
+            try:
+                with db_transaction() as db_cursor:
+                    # Preparing the table here means node writes never need to check the schema.
+                    prepare_node_table(db_cursor, interface_state.myNodeNum)
+                    db_cursor.execute(f"SELECT * FROM {node_table_name(interface_state.myNodeNum)}")
+                    columns = [description[0] for description in db_cursor.description]
+                    rows = [dict(zip(columns, row)) for row in db_cursor.fetchall()]
+            except sqlite3.Error as e:
+                # Leave the cache unbound so the next lookup retries the load.
+                logging.error(f"SQLite error loading node cache: {e}")
+                return node_cache
+            node_cache.load(cache_key, rows)
+    return node_cache
+
+
+def merge_node_info(user_id: Union[int, str], **fields: object) -> NodeRecord:
+    """Merge field updates into the cached node record, preserving fields passed as None."""
+    return get_node_cache().merge(user_id, **fields)
+
+
+def write_node_records(db_cursor: sqlite3.Cursor, records: Iterable[Tuple[Union[int, str], NodeRecord]]) -> None:
+    """Upsert fully merged (user_id, record) pairs with one executemany on an open cursor.
+
+    The node table is created when the node cache is loaded, which happens
+    before any record can be merged.
+    """
+    table_name = node_table_name(interface_state.myNodeNum)
+
+    # Upsert logic
+    upsert_query = f"""
+        INSERT INTO {table_name} (user_id, long_name, short_name, hw_model, is_licensed, role, public_key, chat_archived)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(user_id) DO UPDATE SET
+            long_name = excluded.long_name,
+            short_name = excluded.short_name,
+            hw_model = excluded.hw_model,
+            is_licensed = excluded.is_licensed,
+            role = excluded.role,
+            public_key = excluded.public_key,
+            chat_archived = excluded.chat_archived
+    """
+    db_cursor.executemany(
+        upsert_query,
+        [
+            (
+                user_id,
+                record.long_name,
+                record.short_name,
+                record.hw_model,
+                record.is_licensed,
+                record.role,
+                record.public_key,
+                record.chat_archived,
+            )
+            for user_id, record in records
+        ],
+    )
+
+
+def write_node_record(db_cursor: sqlite3.Cursor, user_id: Union[int, str], record: NodeRecord) -> None:
+    """Upsert a single fully merged node record using an open cursor."""
+    write_node_records(db_cursor, [(user_id, record)])
+
+
 def update_node_info_in_db(
     user_id: Union[int, str],
     long_name: Optional[str] = None,
@@ -315,67 +775,18 @@ def update_node_info_in_db(
 ) -> None:
     """Update or insert node information into the database, preserving unchanged fields."""
     try:
-        ensure_node_table_exists()  # Ensure the table exists before any operation
-
-        with sqlite3.connect(config.db_file_path, timeout=10.0) as db_connection:
-            db_connection.execute("PRAGMA busy_timeout=10000")
-            db_cursor = db_connection.cursor()
-            table_name = f'"{interface_state.myNodeNum}_nodedb"'  # Quote in case of numeric names
-
-            table_columns = [i[1] for i in db_cursor.execute(f"PRAGMA table_info({table_name})")]
-            if "chat_archived" not in table_columns:
-                update_table_query = f"ALTER TABLE {table_name} ADD COLUMN chat_archived INTEGER"
-                db_cursor.execute(update_table_query)
-                db_connection.commit()
-
-            # Fetch existing values to preserve unchanged fields
-            db_cursor.execute(f"SELECT * FROM {table_name} WHERE user_id = ?", (user_id,))
-            existing_record = db_cursor.fetchone()
-
-            if existing_record:
-                (
-                    existing_long_name,
-                    existing_short_name,
-                    existing_hw_model,
-                    existing_is_licensed,
-                    existing_role,
-                    existing_public_key,
-                    existing_chat_archived,
-                ) = existing_record[1:]
-
-                long_name = long_name if long_name is not None else existing_long_name
-                short_name = short_name if short_name is not None else existing_short_name
-                hw_model = hw_model if hw_model is not None else existing_hw_model
-                is_licensed = is_licensed if is_licensed is not None else existing_is_licensed
-                role = role if role is not None else existing_role
-                public_key = public_key if public_key is not None else existing_public_key
-                chat_archived = chat_archived if chat_archived is not None else existing_chat_archived
-
-            long_name = long_name if long_name is not None else "Meshtastic " + str(decimal_to_hex(user_id)[-4:])
-            short_name = short_name if short_name is not None else str(decimal_to_hex(user_id)[-4:])
-            hw_model = hw_model if hw_model is not None else "UNSET"
-            is_licensed = is_licensed if is_licensed is not None else 0
-            role = role if role is not None else "CLIENT"
-            public_key = public_key if public_key is not None else ""
-            chat_archived = chat_archived if chat_archived is not None else 0
-
-            # Upsert logic
-            upsert_query = f"""
-                INSERT INTO {table_name} (user_id, long_name, short_name, hw_model, is_licensed, role, public_key, chat_archived)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(user_id) DO UPDATE SET
-                    long_name = excluded.long_name,
-                    short_name = excluded.short_name,
-                    hw_model = excluded.hw_model,
-                    is_licensed = excluded.is_licensed,
-                    role = excluded.role,
-                    public_key = excluded.public_key,
-                    chat_archived = excluded.chat_archived
-            """
-            db_cursor.execute(
-                upsert_query, (user_id, long_name, short_name, hw_model, is_licensed, role, public_key, chat_archived)
-            )
-            db_connection.commit()
+        record = merge_node_info(
+            user_id,
+            long_name=long_name,
+            short_name=short_name,
+            hw_model=hw_model,
+            is_licensed=is_licensed,
+            role=role,
+            public_key=public_key,
+            chat_archived=chat_archived,
+        )
+        with db_transaction() as db_cursor:
+            write_node_record(db_cursor, user_id, record)
 
     except sqlite3.Error as e:
         logging.error(f"SQLite error in update_node_info_in_db: {e}")
@@ -385,65 +796,26 @@ def update_node_info_in_db(
 
 def ensure_node_table_exists() -> None:
     """Ensure the node database table exists."""
-    table_name = f'"{interface_state.myNodeNum}_nodedb"'  # Quote for safety
-    schema = """
-        user_id TEXT PRIMARY KEY,
-        long_name TEXT,
-        short_name TEXT,
-        hw_model TEXT,
-        is_licensed TEXT,
-        role TEXT,
-        public_key TEXT,
-        chat_archived INTEGER
-    """
-    ensure_table_exists(table_name, schema)
-
-
-def ensure_table_exists(table_name: str, schema: str) -> None:
-    """Ensure the given table exists in the database."""
     try:
-        with sqlite3.connect(config.db_file_path, timeout=10.0) as db_connection:
-            db_connection.execute("PRAGMA busy_timeout=10000")
-            db_cursor = db_connection.cursor()
-            create_table_query = f"CREATE TABLE IF NOT EXISTS {table_name} ({schema})"
-            db_cursor.execute(create_table_query)
-            db_connection.commit()
+        with db_transaction() as db_cursor:
+            prepare_node_table(db_cursor, interface_state.myNodeNum)
     except sqlite3.Error as e:
-        logging.error(f"SQLite error in ensure_table_exists({table_name}): {e}")
-    except Exception as e:
-        logging.error(f"Unexpected error in ensure_table_exists({table_name}): {e}")
+        logging.error(f"SQLite error in ensure_node_table_exists: {e}")
 
 
 def get_name_from_database(user_id: int, type: str = "long") -> str:
     """
-    Retrieve a user's name (long or short) from the node database.
+    Retrieve a user's name (long or short) from the node cache.
 
     :param user_id: The user ID to look up.
     :param type: "long" for long name, "short" for short name.
     :return: The retrieved name or the hex of the user id
     """
     try:
-        with sqlite3.connect(config.db_file_path, timeout=10.0) as db_connection:
-            db_connection.execute("PRAGMA busy_timeout=10000")
-            db_cursor = db_connection.cursor()
-
-            # Construct table name
-            table_name = f"{str(interface_state.myNodeNum)}_nodedb"
-            nodeinfo_table = f'"{table_name}"'  # Quote table name for safety
-
-            # Determine the correct column to fetch
-            column_name = "long_name" if type == "long" else "short_name"
-
-            # Query the database
-            query = f"SELECT {column_name} FROM {nodeinfo_table} WHERE user_id = ?"
-            db_cursor.execute(query, (user_id,))
-            result = db_cursor.fetchone()
-
-            return result[0] if result else decimal_to_hex(user_id)
-
-    except sqlite3.Error as e:
-        logging.error(f"SQLite error in get_name_from_database: {e}")
-        return "Unknown"
+        record = get_node_cache().get(user_id)
+        if record is None:
+            return decimal_to_hex(user_id)
+        return record.long_name if type == "long" else record.short_name
 
     except Exception as e:
         logging.error(f"Unexpected error in get_name_from_database: {e}")
@@ -452,20 +824,8 @@ def get_name_from_database(user_id: int, type: str = "long") -> str:
 
 def is_chat_archived(user_id: int) -> int:
     try:
-        with sqlite3.connect(config.db_file_path, timeout=10.0) as db_connection:
-            db_connection.execute("PRAGMA busy_timeout=10000")
-            db_cursor = db_connection.cursor()
-            table_name = f"{str(interface_state.myNodeNum)}_nodedb"
-            nodeinfo_table = f'"{table_name}"'
-            query = f"SELECT chat_archived FROM {nodeinfo_table} WHERE user_id = ?"
-            db_cursor.execute(query, (user_id,))
-            result = db_cursor.fetchone()
-
-            return result[0] if result else 0
-
-    except sqlite3.Error as e:
-        logging.error(f"SQLite error in is_chat_archived: {e}")
-        return "Unknown"
+        record = get_node_cache().get(user_id)
+        return record.chat_archived if record else 0
 
     except Exception as e:
         logging.error(f"Unexpected error in is_chat_archived: {e}")
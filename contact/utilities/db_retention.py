@@ -0,0 +1,146 @@
+import json
+import logging
+import sqlite3
+import time
+from typing import List, Optional, Tuple
+
+import contact.ui.default_config as config
+from contact.utilities.db_schema import enable_incremental_vacuum
+
+
+PRUNE_BATCH_ROWS = 500
+VACUUM_PAGES_PER_PASS = 256
+RETENTION_INTERVAL_SECONDS = 300.0
+RETENTION_BACKLOG_SECONDS = 1.0
+
+ARCHIVE_COLUMNS = ("id", "my_node", "channel", "user_id", "message_text", "timestamp", "ack_type", "packet_id", "reply_id")
+
+
+def _config_number(value: object, cast, name: str):
+    try:
+        number = cast(value or 0)
+    except (TypeError, ValueError):
+        logging.warning(f"Ignoring invalid message retention setting {name}={value!r}")
+        return 0
+    return max(number, 0)
+
+
+def retention_limits() -> Tuple[float, int, str]:
+    """Return (max_age_days, max_rows_per_channel, archive_file_path); zero disables a limit."""
+    return (
+        _config_number(config.retention_max_age_days, float, "max_age_days"),
+        _config_number(config.retention_max_rows_per_channel, int, "max_rows_per_channel"),
+        (config.retention_archive_file_path or "").strip(),
+    )
+
+
+def _expired_cutoff_id(
+    db_cursor: sqlite3.Cursor, my_node: int, channel: str, oldest_timestamp: Optional[float], max_rows_per_channel: int
+) -> Optional[int]:
+    """Return the id of the newest message in a channel outside the policy; it and every older row go.
+
+    Each limit is its own range lookup on a channel index, and the larger id
+    wins, so no query has to test both limits row by row.
+    """
+    cutoffs = []
+    if oldest_timestamp is not None:
+        db_cursor.execute(
+            "SELECT MAX(id) FROM messages WHERE my_node = ? AND channel = ? AND timestamp < ?",
+            (my_node, channel, oldest_timestamp),
+        )
+        cutoffs.append(db_cursor.fetchone()[0])
+    if max_rows_per_channel:
+        # The newest row that falls outside the per-channel cap.
+        db_cursor.execute(
+            "SELECT id FROM messages WHERE my_node = ? AND channel = ? ORDER BY id DESC LIMIT 1 OFFSET ?",
+            (my_node, channel, max_rows_per_channel),
+        )
+        row = db_cursor.fetchone()
+        cutoffs.append(row[0] if row is not None else None)
+    cutoffs = [cutoff for cutoff in cutoffs if cutoff is not None]
+    return max(cutoffs) if cutoffs else None
+
+
+def _expired_messages(
+    db_cursor: sqlite3.Cursor, max_age_days: float, max_rows_per_channel: int, now: float, limit: int
+) -> List[tuple]:
+    """Collect up to ``limit`` messages outside the policy, oldest first within each channel."""
+    oldest_timestamp = now - max_age_days * 86400 if max_age_days else None
+    expired: List[tuple] = []
+    channels = db_cursor.execute("SELECT DISTINCT my_node, channel FROM messages").fetchall()
+    for my_node, channel in channels:
+        if len(expired) >= limit:
+            break
+        cutoff_id = _expired_cutoff_id(db_cursor, my_node, channel, oldest_timestamp, max_rows_per_channel)
+        if cutoff_id is None:
+            continue
+        db_cursor.execute(
+            f"""
+            SELECT {", ".join(ARCHIVE_COLUMNS)} FROM messages
+            WHERE my_node = ? AND channel = ? AND id <= ?
+            ORDER BY id LIMIT ?
+            """,
+            (my_node, channel, cutoff_id, limit - len(expired)),
+        )
+        expired.extend(db_cursor.fetchall())
+    return expired
+
+
+def _archive_messages(archive_file_path: str, rows: List[tuple]) -> None:
+    with open(archive_file_path, "a", encoding="utf-8") as archive_file:
+        for row in rows:
+            archive_file.write(json.dumps(dict(zip(ARCHIVE_COLUMNS, row)), ensure_ascii=False) + "\n")
+
+
+def prune_messages(
+    db_cursor: sqlite3.Cursor,
+    max_age_days: float = 0,
+    max_rows_per_channel: int = 0,
+    archive_file_path: str = "",
+    now: Optional[float] = None,
+    limit: int = PRUNE_BATCH_ROWS,
+) -> int:
+    """Delete up to ``limit`` messages outside the retention policy and return how many went.
+
+    Rows are appended to ``archive_file_path`` as JSON lines before they are
+    deleted, so a failed delete can at worst archive a row twice.
+    """
+    if not max_age_days and not max_rows_per_channel:
+        return 0
+    rows = _expired_messages(db_cursor, max_age_days, max_rows_per_channel, time.time() if now is None else now, limit)
+    if not rows:
+        return 0
+    if archive_file_path:
+        _archive_messages(archive_file_path, rows)
+    db_cursor.executemany("DELETE FROM messages WHERE id = ?", [(row[0],) for row in rows])
+    return len(rows)
+
+
+def reclaim_free_pages(db_cursor: sqlite3.Cursor, pages: int = VACUUM_PAGES_PER_PASS) -> int:
+    """Return up to ``pages`` free pages to the filesystem and report how many were released.
+
+    Only databases in incremental auto-vacuum mode release anything.
+    """
+    free_pages = db_cursor.execute("PRAGMA freelist_count").fetchone()[0]
+    if not free_pages:
+        return 0
+    # incremental_vacuum frees one page per step, and sqlite3 steps a
+    # statement without result columns only once, so run it once per page.
+    for _ in range(min(free_pages, pages)):
+        db_cursor.execute("PRAGMA incremental_vacuum(1)")
+    return free_pages - db_cursor.execute("PRAGMA freelist_count").fetchone()[0]
+
+
+def apply_message_retention(db_cursor: sqlite3.Cursor) -> bool:
+    """Run one bounded pruning and vacuum pass. Returns True while a backlog remains."""
+    max_age_days, max_rows_per_channel, archive_file_path = retention_limits()
+    if (max_age_days or max_rows_per_channel) and not db_cursor.connection.in_transaction:
+        # Databases created before incremental auto-vacuum need one full VACUUM
+        # to switch; it runs here on the writer thread, and only once retention
+        # gives it pages to reclaim.
+        enable_incremental_vacuum(db_cursor.connection)
+    pruned = prune_messages(db_cursor, max_age_days, max_rows_per_channel, archive_file_path)
+    if pruned:
+        logging.info(f"Pruned {pruned} messages outside the retention policy")
+    reclaimed = reclaim_free_pages(db_cursor)
+    return pruned >= PRUNE_BATCH_ROWS or reclaimed >= VACUUM_PAGES_PER_PASS
@@ -0,0 +1,189 @@
+import logging
+import re
+import sqlite3
+from typing import Callable, List
+
+LEGACY_MESSAGE_TABLE = re.compile(r"^(\d+)_(.*)_messages$")
+LEGACY_MESSAGE_COLUMNS = ("user_id", "message_text", "timestamp", "ack_type", "packet_id", "reply_id")
+
+
+NODE_TABLE_SCHEMA = """
+    user_id TEXT PRIMARY KEY,
+    long_name TEXT,
+    short_name TEXT,
+    hw_model TEXT,
+    is_licensed TEXT,
+    role TEXT,
+    public_key TEXT,
+    chat_archived INTEGER
+"""
+
+
+def node_table_name(my_node: int) -> str:
+    return f'"{my_node}_nodedb"'  # Quote in case of numeric names
+
+
+def prepare_node_table(db_cursor: sqlite3.Cursor, my_node: int) -> None:
+    """Create or upgrade the node table for one local node.
+
+    Node tables are per local node, so they are prepared when that node's
+    directory is first loaded rather than by a global migration.
+    """
+    table_name = node_table_name(my_node)
+    db_cursor.execute(f"CREATE TABLE IF NOT EXISTS {table_name} ({NODE_TABLE_SCHEMA})")
+    table_columns = {row[1] for row in db_cursor.execute(f"PRAGMA table_info({table_name})")}
+    if "chat_archived" not in table_columns:
+        db_cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN chat_archived INTEGER")
+
+
+def _create_messages_table(db_cursor: sqlite3.Cursor) -> None:
+    db_cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY,
+            my_node INTEGER NOT NULL,
+            channel TEXT NOT NULL,
+            user_id TEXT,
+            message_text TEXT,
+            timestamp INTEGER,
+            ack_type TEXT,
+            packet_id INTEGER,
+            reply_id INTEGER
+        )
+        """
+    )
+    db_cursor.execute("CREATE INDEX IF NOT EXISTS messages_by_channel ON messages (my_node, channel, id)")
+    db_cursor.execute("CREATE INDEX IF NOT EXISTS messages_by_packet_id ON messages (packet_id)")
+    db_cursor.execute("CREATE INDEX IF NOT EXISTS messages_by_channel_time ON messages (my_node, channel, timestamp)")
+
+
+def _import_legacy_message_tables(db_cursor: sqlite3.Cursor) -> None:
+    """Copy every "<myNodeNum>_<channel>_messages" table into messages, oldest first, then drop it."""
+    legacy_tables = [
+        row[0] for row in db_cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE '%_messages'")
+    ]
+    for table_name in legacy_tables:
+        match = LEGACY_MESSAGE_TABLE.match(table_name)
+        if not match:
+            continue
+        my_node, channel = int(match.group(1)), match.group(2)
+        quoted_table_name = '"' + table_name.replace('"', '""') + '"'
+
+        table_columns = {row[1] for row in db_cursor.execute(f"PRAGMA table_info({quoted_table_name})")}
+        selected = ", ".join(column if column in table_columns else "NULL" for column in LEGACY_MESSAGE_COLUMNS)
+        db_cursor.execute(
+            f"""
+            INSERT INTO messages (my_node, channel, {", ".join(LEGACY_MESSAGE_COLUMNS)})
+            SELECT ?, ?, {selected} FROM {quoted_table_name} ORDER BY rowid
+            """,
+            (my_node, channel),
+        )
+        logging.info(f"Imported {db_cursor.rowcount} messages from legacy table {table_name}")
+        db_cursor.execute(f"DROP TABLE {quoted_table_name}")
+
+
+def _migrate_to_single_message_table(db_cursor: sqlite3.Cursor) -> None:
+    _create_messages_table(db_cursor)
+    _import_legacy_message_tables(db_cursor)
+
+
+def _add_message_search_index(db_cursor: sqlite3.Cursor) -> None:
+    """Index message text with an external-content FTS5 table kept in sync by triggers."""
+    try:
+        db_cursor.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+                message_text,
+                content='messages',
+                content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+            """
+        )
+    except sqlite3.OperationalError as e:
+        # Some SQLite builds ship without FTS5; search falls back to LIKE there.
+        logging.warning(f"SQLite FTS5 is unavailable, message search will not be indexed: {e}")
+        return
+
+    db_cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+            INSERT INTO messages_fts (rowid, message_text) VALUES (new.id, new.message_text);
+        END
+        """
+    )
+    db_cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+            INSERT INTO messages_fts (messages_fts, rowid, message_text) VALUES ('delete', old.id, old.message_text);
+        END
+        """
+    )
+    db_cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF message_text ON messages BEGIN
+            INSERT INTO messages_fts (messages_fts, rowid, message_text) VALUES ('delete', old.id, old.message_text);
+            INSERT INTO messages_fts (rowid, message_text) VALUES (new.id, new.message_text);
+        END
+        """
+    )
+    db_cursor.execute("INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')")
+
+
+def has_message_search_index(db_cursor: sqlite3.Cursor) -> bool:
+    db_cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages_fts'")
+    return db_cursor.fetchone() is not None
+
+
+# Append to MIGRATIONS when the shared on-disk layout changes. The index of
+# the last applied migration is stored in SQLite's PRAGMA user_version.
+MIGRATIONS: List[Callable[[sqlite3.Cursor], None]] = [
+    _migrate_to_single_message_table,  # 1
+    _add_message_search_index,  # 2
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def migrate_schema(db_connection: sqlite3.Connection) -> None:
+    """Bring the database up to SCHEMA_VERSION, applying each pending migration in one transaction."""
+    if db_connection.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+        return
+
+    db_cursor = db_connection.cursor()
+    db_cursor.execute("BEGIN IMMEDIATE")
+    try:
+        # Re-read under the write lock in case another connection migrated first.
+        version = db_cursor.execute("PRAGMA user_version").fetchone()[0]
+        for target_version in range(version + 1, SCHEMA_VERSION + 1):
+            logging.info(f"Migrating database schema to version {target_version}")
+            MIGRATIONS[target_version - 1](db_cursor)
+            db_cursor.execute(f"PRAGMA user_version = {target_version}")
+        db_connection.commit()
+    except BaseException:
+        db_connection.rollback()
+        raise
+
+
+def request_incremental_vacuum(db_connection: sqlite3.Connection) -> None:
+    """Ask for incremental auto-vacuum, which a database without tables adopts at once.
+
+    Existing databases keep their mode until enable_incremental_vacuum runs.
+    """
+    db_connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
+
+def enable_incremental_vacuum(db_connection: sqlite3.Connection) -> None:
+    """Switch the database to incremental auto-vacuum so pruned pages can be reclaimed in steps.
+
+    auto_vacuum cannot change inside a transaction and only takes effect on
+    an existing database after a full VACUUM. That VACUUM rewrites the whole
+    file, so call this from background maintenance, never at startup.
+    """
+    if db_connection.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:  # INCREMENTAL
+        return
+    db_connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    try:
+        db_connection.execute("VACUUM")
+    except sqlite3.OperationalError as e:
+        # Another connection holds the database; retry on the next maintenance pass.
+        logging.warning(f"Could not enable incremental vacuum: {e}")
@@ -0,0 +1,263 @@
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from functools import partial
+from typing import Callable, Dict, List, Optional, Union
+
+from contact.utilities.db_handler import (
+    db_transaction,
+    merge_node_info,
+    nodeinfo_from_packet,
+    write_ack_naks,
+    write_message,
+    write_node_record,
+)
+from contact.utilities.db_retention import (
+    RETENTION_BACKLOG_SECONDS,
+    RETENTION_INTERVAL_SECONDS,
+    apply_message_retention,
+)
+
+
+DB_WRITE_QUEUE_SIZE = 10000
+DB_WRITE_BATCH_ROWS = 200
+DB_WRITE_BATCH_SECONDS = 0.05
+
+DbWrite = Callable[[sqlite3.Cursor], None]
+# Periodic housekeeping run on the writer thread; returns True while work remains.
+DbMaintenance = Callable[[sqlite3.Cursor], bool]
+
+
+class AckNakWrite:
+    """Queued ACK/NAK update. Adjacent ones in a batch are applied with one executemany."""
+
+    __slots__ = ("packet_id", "ack")
+
+    def __init__(self, packet_id: int, ack: str) -> None:
+        self.packet_id = packet_id
+        self.ack = ack
+
+    def __call__(self, db_cursor: sqlite3.Cursor) -> None:
+        write_ack_naks(db_cursor, [(self.packet_id, self.ack)])
+
+
+def _coalesce_ack_writes(batch: List[DbWrite]) -> List[DbWrite]:
+    """Merge runs of consecutive ACK updates, keeping their order relative to other writes."""
+    coalesced: List[DbWrite] = []
+    run: List[AckNakWrite] = []
+    for write in batch + [None]:
+        if isinstance(write, AckNakWrite):
+            run.append(write)
+            continue
+        if len(run) == 1:
+            coalesced.append(run[0])
+        elif run:
+            coalesced.append(partial(write_ack_naks, updates=[(ack.packet_id, ack.ack) for ack in run]))
+        run = []
+        if write is not None:
+            coalesced.append(write)
+    return coalesced
+
+
+class DbWriter:
+    """Write-behind queue that persists messages and node updates off the UI/RX threads.
+
+    Queued writes are applied in FIFO order by one background thread, grouped
+    into a single transaction every ``batch_seconds`` or ``batch_rows`` writes,
+    whichever comes first. While the writer is not running, submitted writes
+    are applied immediately on the calling thread.
+
+    An optional ``maintenance`` task runs on the same thread when the writer
+    starts and then every ``maintenance_seconds``, or every
+    ``maintenance_backlog_seconds`` while it reports unfinished work, so it
+    never competes with queued writes for the database.
+    """
+
+    def __init__(
+        self,
+        max_queue: int = DB_WRITE_QUEUE_SIZE,
+        batch_rows: int = DB_WRITE_BATCH_ROWS,
+        batch_seconds: float = DB_WRITE_BATCH_SECONDS,
+        maintenance: Optional[DbMaintenance] = None,
+        maintenance_seconds: float = RETENTION_INTERVAL_SECONDS,
+        maintenance_backlog_seconds: float = RETENTION_BACKLOG_SECONDS,
+    ) -> None:
+        self.batch_rows = batch_rows
+        self.batch_seconds = batch_seconds
+        self.maintenance = maintenance
+        self.maintenance_seconds = maintenance_seconds
+        self.maintenance_backlog_seconds = maintenance_backlog_seconds
+        self._next_maintenance = 0.0
+        self._queue: "queue.Queue[object]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._stop_marker = object()
+        self._state_lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        with self._state_lock:
+            if self.running:
+                return
+            self._next_maintenance = time.monotonic()
+            self._thread = threading.Thread(target=self._run, name="contact-db-writer", daemon=True)
+            self._thread.start()
+
+    def submit(self, write: DbWrite) -> None:
+        """Queue a write, applying it synchronously if the writer is stopped or saturated."""
+        if self.running:
+            try:
+                self._queue.put_nowait(write)
+                return
+            except queue.Full:
+                logging.warning("Database write queue is full; writing synchronously")
+                # Drain first so this write still lands after everything already queued.
+                self.flush()
+        self._apply([write])
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every write queued before this call has been committed."""
+        if not self.running:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        """Commit outstanding writes and stop the background thread."""
+        with self._state_lock:
+            thread = self._thread
+            if thread is None:
+                return
+            if thread.is_alive():
+                self._queue.put(self._stop_marker)
+                thread.join(timeout)
+                if thread.is_alive():
+                    logging.warning("Database writer did not stop within %s seconds", timeout)
+                    return
+            self._thread = None
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            try:
+                item = self._queue.get(timeout=self._until_maintenance())
+            except queue.Empty:
+                self._maintain()
+                continue
+            batch: List[DbWrite] = []
+            flushed: List[threading.Event] = []
+            deadline = time.monotonic() + self.batch_seconds
+
+            while True:
+                if item is self._stop_marker:
+                    stopping = True
+                    break
+                if isinstance(item, threading.Event):
+                    flushed.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_rows:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            self._apply(_coalesce_ack_writes(batch))
+            for event in flushed:
+                event.set()
+            if not stopping and self._until_maintenance() == 0:
+                # A busy queue must not starve maintenance.
+                self._maintain()
+
+    def _until_maintenance(self) -> Optional[float]:
+        if self.maintenance is None:
+            return None
+        return max(0.0, self._next_maintenance - time.monotonic())
+
+    def _maintain(self) -> None:
+        backlog = False
+        try:
+            with db_transaction() as db_cursor:
+                backlog = self.maintenance(db_cursor)
+        except Exception as e:
+            logging.error(f"Database maintenance failed: {e}")
+        delay = self.maintenance_backlog_seconds if backlog else self.maintenance_seconds
+        self._next_maintenance = time.monotonic() + delay
+
+    def _apply(self, batch: List[DbWrite]) -> None:
+        if not batch:
+            return
+        try:
+            with db_transaction() as db_cursor:
+                for write in batch:
+                    write(db_cursor)
+            return
+        except Exception as e:
+            if len(batch) == 1:
+                logging.error(f"Database write failed: {e}")
+                return
+            logging.warning(f"Batched database write failed, retrying individually: {e}")
+
+        # One bad row should not cost the rest of the batch.
+        for write in batch:
+            try:
+                with db_transaction() as db_cursor:
+                    write(db_cursor)
+            except Exception as e:
+                logging.error(f"Database write failed: {e}")
+
+
+db_writer = DbWriter(maintenance=apply_message_retention)
+
+
+def queue_message_save(
+    channel: Union[str, int],
+    user_id: Union[str, int],
+    message_text: str,
+    packet_id: Optional[int] = None,
+    reply_id: Optional[int] = None,
+    timestamp: Optional[int] = None,
+) -> int:
+    """Queue a message for saving and return the timestamp it will be stored with (now unless given)."""
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    db_writer.submit(
+        partial(
+            write_message,
+            channel=channel,
+            user_id=user_id,
+            message_text=message_text,
+            timestamp=timestamp,
+            packet_id=packet_id,
+            reply_id=reply_id,
+        )
+    )
+    return timestamp
+
+
+def queue_ack_nak_update(packet_id: int, ack: str) -> None:
+    """Queue an ACK state change for the sent message with this packet id."""
+    db_writer.submit(AckNakWrite(packet_id, ack))
+
+
+def queue_node_info_update(user_id: Union[int, str], **fields: object) -> None:
+    """Update the node cache now and queue the merged record for saving."""
+    record = merge_node_info(user_id, **fields)
+    db_writer.submit(partial(write_node_record, user_id=user_id, record=record))
+
+
+def queue_nodeinfo_save(packet: Dict[str, object]) -> None:
+    try:
+        node_info = nodeinfo_from_packet(packet)
+    except KeyError as e:
+        logging.error(f"Incomplete nodeinfo packet: {e}")
+        return
+    queue_node_info_update(**node_info)
@@ -1,11 +1,10 @@
 import os
-import sqlite3
 import tempfile
 from dataclasses import dataclass
 from typing import Dict, List, Tuple, Union
 
 import contact.ui.default_config as config
-from contact.utilities.db_handler import get_table_name
+from contact.utilities.db_handler import channel_key, close_db_connections, db_transaction
 from contact.utilities.singleton import interface_state
 
 
@@ -126,38 +125,29 @@ def configure_demo_database(base_dir: str = "") -> str:
     os.makedirs(base_dir, exist_ok=True)
 
     db_path = os.path.join(base_dir, DEMO_DB_FILENAME)
-    if os.path.exists(db_path):
-        os.remove(db_path)
+    # A stale WAL left beside a fresh database would be replayed into it.
+    stale_paths = [path for path in (db_path, db_path + "-wal", db_path + "-shm") if os.path.exists(path)]
+    if stale_paths:
+        # Pooled connections would otherwise keep writing to the unlinked file.
+        close_db_connections()
+        for path in stale_paths:
+            os.remove(path)
 
     config.db_file_path = db_path
     return db_path
 
 
 def seed_demo_messages() -> None:
-    schema = """
-        user_id TEXT,
-        message_text TEXT,
-        timestamp INTEGER,
-        ack_type TEXT
-    """
-
-    with sqlite3.connect(config.db_file_path, timeout=10.0) as db_connection:
-        db_connection.execute("PRAGMA busy_timeout=10000")
-        cursor = db_connection.cursor()
-
+    with db_transaction() as cursor:
         for channel_name, rows in _demo_messages().items():
-            table_name = get_table_name(channel_name)
-            cursor.execute(f"CREATE TABLE IF NOT EXISTS {table_name} ({schema})")
             cursor.executemany(
-                f"""
-                INSERT INTO {table_name} (user_id, message_text, timestamp, ack_type)
-                VALUES (?, ?, ?, ?)
+                """
+                INSERT INTO messages (my_node, channel, user_id, message_text, timestamp, ack_type)
+                VALUES (?, ?, ?, ?, ?, ?)
                 """,
-                rows,
+                [(DEMO_LOCAL_NODE_NUM, channel_key(channel_name), *row) for row in rows],
             )
 
-        db_connection.commit()
-
 
 def _build_node(
     node_num: int,
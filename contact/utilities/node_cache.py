@@ -0,0 +1,130 @@
+import logging
+import threading
+from dataclasses import dataclass, fields, replace
+from typing import Callable, Dict, Hashable, Iterable, List, Mapping, Optional, Tuple, Union
+
+from contact.utilities.utils import decimal_to_hex
+
+
+@dataclass(frozen=True)
+class NodeRecord:
+    long_name: str
+    short_name: str
+    hw_model: str
+    is_licensed: Union[str, int]
+    role: str
+    public_key: str
+    chat_archived: int
+
+
+NODE_RECORD_FIELDS = tuple(field.name for field in fields(NodeRecord))
+
+# Called with the user ids whose records changed, or None when any record may have.
+NodeCacheListener = Callable[[Optional[List[str]]], None]
+
+
+def default_node_record(user_id: Union[int, str]) -> NodeRecord:
+    """Placeholder values used for nodes we have not received nodeinfo from."""
+    hex_suffix = str(decimal_to_hex(int(user_id))[-4:])
+    return NodeRecord(
+        long_name="Meshtastic " + hex_suffix,
+        short_name=hex_suffix,
+        hw_model="UNSET",
+        is_licensed="0",
+        role="CLIENT",
+        public_key="",
+        chat_archived=0,
+    )
+
+
+def stored_is_licensed(value: object) -> object:
+    """Return is_licensed as the TEXT column reads it back, so a reloaded record compares equal.
+
+    The interface reports a bool, which SQLite stores as "1" or "0".
+    """
+    if isinstance(value, (bool, int)):
+        return str(int(value))
+    return value
+
+
+class NodeCache:
+    """In-memory mirror of the node table, keyed by the stringified node number.
+
+    The cache is bound to a key (database path and local node number) so a
+    reconnect to another radio or database reloads it instead of serving
+    another node's directory. Listeners hear about every change, so views
+    derived from the records can be kept instead of being rebuilt per draw.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.RLock()
+        self._records: Dict[str, NodeRecord] = {}
+        self._key: Optional[Hashable] = None
+        self._listeners: List[NodeCacheListener] = []
+
+    def add_listener(self, listener: NodeCacheListener) -> None:
+        self._listeners.append(listener)
+
+    def _notify(self, user_ids: Optional[List[str]]) -> None:
+        for listener in self._listeners:
+            try:
+                listener(user_ids)
+            except Exception:
+                logging.exception("Node cache listener failed")
+
+    def is_loaded_for(self, key: Hashable) -> bool:
+        return self._key is not None and self._key == key
+
+    def load(self, key: Hashable, rows: Iterable[Mapping[str, object]]) -> None:
+        records = {}
+        for row in rows:
+            values = {name: row.get(name) for name in NODE_RECORD_FIELDS}
+            if values["chat_archived"] is None:
+                # Rows written before the column existed were never archived.
+                values["chat_archived"] = 0
+            records[str(row["user_id"])] = NodeRecord(**values)
+        with self.lock:
+            self._records = records
+            self._key = key
+        self._notify(None)
+
+    def clear(self) -> None:
+        with self.lock:
+            self._records = {}
+            self._key = None
+        self._notify(None)
+
+    def get(self, user_id: Union[int, str]) -> Optional[NodeRecord]:
+        return self._records.get(str(user_id))
+
+    def _merge(self, user_id: Union[int, str], updates: Mapping[str, object]) -> Tuple[NodeRecord, bool]:
+        changes = {name: value for name, value in updates.items() if value is not None}
+        if "is_licensed" in changes:
+            changes["is_licensed"] = stored_is_licensed(changes["is_licensed"])
+        existing = self._records.get(str(user_id))
+        record = replace(existing or default_node_record(user_id), **changes)
+        self._records[str(user_id)] = record
+        return record, record != existing
+
+    def merge(self, user_id: Union[int, str], **updates: object) -> NodeRecord:
+        """Apply non-None updates over the cached record (or defaults) and return the result."""
+        with self.lock:
+            record, changed = self._merge(user_id, updates)
+        if changed:
+            self._notify([str(user_id)])
+        return record
+
+    def merge_many(self, updates: Iterable[Tuple[Union[int, str], Mapping[str, object]]]) -> List[Tuple[str, NodeRecord]]:
+        """Merge several nodes at once and return only the (user_id, record) pairs that changed."""
+        changed = []
+        with self.lock:
+            for user_id, fields_update in updates:
+                record, record_changed = self._merge(user_id, fields_update)
+                if record_changed:
+                    changed.append((str(user_id), record))
+        if changed:
+            self._notify([user_id for user_id, _record in changed])
+        return changed
+
+    def short_names(self) -> Dict[str, str]:
+        return {user_id: record.short_name for user_id, record in self._records.items()}
@@ -0,0 +1,98 @@
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+
+UNKNOWN_HOPS = 100
+
+SortKey = Tuple[Any, ...]
+# The local node sorts ahead of every other key.
+LOCAL_NODE_KEY: SortKey = (0,)
+
+
+class NodeOrder:
+    """Node numbers in node-list order, kept sorted as single nodes change.
+
+    The order is: the local node, then favourites, then the rest, with
+    ignored nodes last. Within each group nodes follow the ``node_sort``
+    setting, and ties keep the order in which nodes were first seen.
+    Updating one node moves only that node, found by bisection, instead of
+    re-sorting the whole mesh. ``node_nums`` is changed in place, so callers
+    may hold on to it between updates; a rebuild replaces it.
+    """
+
+    def __init__(self) -> None:
+        self.node_nums: List[int] = []
+        self._entries: List[SortKey] = []  # Parallel to node_nums
+        self._keys: Dict[int, SortKey] = {}
+        self._first_seen: Dict[int, int] = {}
+        self._my_node_num: Optional[int] = None
+        self._node_sort: Optional[str] = None
+        self._built = False
+
+    def is_built_for(self, my_node_num: Optional[int], node_sort: str) -> bool:
+        return self._built and self._my_node_num == my_node_num and self._node_sort == node_sort
+
+    def _sort_key(self, node_num: int, node: Mapping[str, Any]) -> SortKey:
+        if self._node_sort == "lastHeard":
+            last_heard = node.get("lastHeard")
+            criterion = -last_heard if isinstance(last_heard, int) else 0
+        elif self._node_sort == "name":
+            criterion = (node.get("user") or {}).get("longName", "")
+        elif self._node_sort == "hops":
+            criterion = node.get("hopsAway", UNKNOWN_HOPS)
+        else:
+            criterion = 0
+        return (
+            1,
+            bool(node.get("isIgnored", False)),
+            not node.get("isFavorite", False),
+            criterion,
+            self._first_seen.setdefault(node_num, len(self._first_seen)),
+        )
+
+    def rebuild(self, nodes: Iterable[Mapping[str, Any]], my_node_num: Optional[int], node_sort: str) -> None:
+        """Order every node from scratch, e.g. after a reconnect or a change of ``node_sort``."""
+        self._my_node_num = my_node_num
+        self._node_sort = node_sort
+        self._first_seen = {}
+        keys = {my_node_num: LOCAL_NODE_KEY}
+        for node in nodes:
+            if node["num"] != my_node_num:
+                keys[node["num"]] = self._sort_key(node["num"], node)
+        ordered = sorted(keys.items(), key=lambda item: item[1])
+        self._keys = keys
+        self.node_nums = [node_num for node_num, _key in ordered]
+        self._entries = [key for _node_num, key in ordered]
+        self._built = True
+
+    def update(self, node_num: int, node: Mapping[str, Any]) -> bool:
+        """Move one node to its place for its current values. Returns True if the order changed."""
+        if node_num == self._my_node_num:
+            return False
+        key = self._sort_key(node_num, node)
+        old_key = self._keys.get(node_num)
+        if key == old_key:
+            return False
+
+        old_index = None
+        if old_key is not None:
+            old_index = bisect_left(self._entries, old_key)
+            del self._entries[old_index]
+            del self.node_nums[old_index]
+        index = bisect_left(self._entries, key)
+        self._entries.insert(index, key)
+        self.node_nums.insert(index, node_num)
+        self._keys[node_num] = key
+        return index != old_index
+
+    def remove(self, node_num: int) -> None:
+        """Drop a node, e.g. after it was deleted from the node database."""
+        key = self._keys.pop(node_num, None)
+        if key is None:
+            return
+        index = bisect_left(self._entries, key)
+        del self._entries[index]
+        del self.node_nums[index]
+
+
+node_order = NodeOrder()
@@ -11,6 +11,7 @@ from meshtastic.protobuf import config_pb2, mesh_pb2, portnums_pb2
 import contact.ui.default_config as config
 from contact.utilities.singleton import ui_state, interface_state
 import contact.utilities.telemetry_beautifier as tb
+from contact.utilities.node_order import node_order
 
 NEW_MODEM_PRESET_NAMES = {
     14: "TINY_FAST",
@@ -90,39 +91,36 @@ def get_channels():
 
 def get_node_list():
     if interface_state.interface.nodes:
-        my_node_num = interface_state.myNodeNum
-
-        def node_sort(node):
-            if config.node_sort == "lastHeard":
-                return -node["lastHeard"] if ("lastHeard" in node and isinstance(node["lastHeard"], int)) else 0
-            elif config.node_sort == "name":
-                return node["user"]["longName"]
-            elif config.node_sort == "hops":
-                return node["hopsAway"] if "hopsAway" in node else 100
-            else:
-                return node
-
-        sorted_nodes = sorted(interface_state.interface.nodes.values(), key=node_sort)
-
-        # Move favorite nodes to the beginning
-        sorted_nodes = sorted(
-            sorted_nodes, key=lambda node: node["isFavorite"] if "isFavorite" in node else False, reverse=True
-        )
-
-        # Move ignored nodes to the end
-        sorted_nodes = sorted(sorted_nodes, key=lambda node: node["isIgnored"] if "isIgnored" in node else False)
-
-        node_list = [node["num"] for node in sorted_nodes if node["num"] != my_node_num]
-        return [my_node_num] + node_list  # Ensuring your node is always first
+        node_order.rebuild(interface_state.interface.nodes.values(), interface_state.myNodeNum, config.node_sort)
+        # Shared, not copied: node_order moves single nodes within this list in place.
+        return node_order.node_nums
     return []
 
 
-def refresh_node_list():
-    new_node_list = get_node_list()
-    if new_node_list != ui_state.node_list:
-        ui_state.node_list = new_node_list
+def refresh_node_list(node_num: Optional[int] = None) -> bool:
+    """Bring ui_state.node_list up to date and report whether it changed.
+
+    Given the node a packet came from, only that node is moved; otherwise
+    the whole list is ordered again.
+    """
+    if node_num is not None and node_order.is_built_for(interface_state.myNodeNum, config.node_sort):
+        node = (interface_state.interface.nodesByNum or {}).get(node_num)
+        if node is None or not node_order.update(node_num, node):
+            return False
+        ui_state.node_list = node_order.node_nums
         return True
-    return False
+
+    old_node_list = ui_state.node_list
+    ui_state.node_list = get_node_list()
+    return ui_state.node_list != old_node_list
+
+
+def remove_from_node_list(node_num: int) -> None:
+    """Drop a node from ui_state.node_list, keeping the node order it shares in step."""
+    if ui_state.node_list is node_order.node_nums:
+        node_order.remove(node_num)
+    elif node_num in ui_state.node_list:
+        ui_state.node_list.remove(node_num)
 
 
 def get_nodeNum():
@@ -214,23 +212,66 @@ def build_reply_prefix(prefix: str, message: str) -> str:
     return f"<Re: {sender}: {excerpt}> "
 
 
+def set_message_packet_ids(channel, packet_ids):
+    """Replace a channel's packet ids and re-point the packet id index at their new positions."""
+    index = ui_state.message_index_by_packet_id
+    for packet_id in ui_state.message_packet_ids.get(channel, ()):
+        if packet_id is not None and index.get(packet_id, (None,))[0] == channel:
+            del index[packet_id]
+    ui_state.message_packet_ids[channel] = packet_ids
+    for position, packet_id in enumerate(packet_ids):
+        if packet_id is not None:
+            index[packet_id] = (channel, position)
+
+
+def find_message_by_packet_id(packet_id):
+    """Return (channel, index) of the loaded message sent as packet_id, or None."""
+    if packet_id is None:
+        return None
+    location = ui_state.message_index_by_packet_id.get(packet_id)
+    if location is None:
+        return None
+    channel, index = location
+    packet_ids = ui_state.message_packet_ids.get(channel, [])
+    if index >= len(packet_ids) or packet_ids[index] != packet_id:
+        return None
+    return location
+
+
 def get_reply_context(reply_id):
     """Find the locally displayed message referred to by a Meshtastic reply ID."""
-    for channel, packet_ids in ui_state.message_packet_ids.items():
-        for index, packet_id in enumerate(packet_ids):
-            if packet_id == reply_id and index < len(ui_state.all_messages.get(channel, [])):
-                prefix, message = ui_state.all_messages[channel][index]
-                return build_reply_prefix(prefix, message)
-    return ""
+    location = find_message_by_packet_id(reply_id)
+    if location is None:
+        return ""
+    channel, index = location
+    messages = ui_state.all_messages.get(channel, [])
+    if index >= len(messages):
+        return ""
+    prefix, message = messages[index]
+    return build_reply_prefix(prefix, message)
+
+
+def live_message_key(timestamp, user_id, message_text):
+    """Identify a message by the values it is saved with, as they read back from the database."""
+    return int(timestamp), str(user_id), message_text
+
 
+def add_new_message(channel_id, prefix, message, packet_id=None, saved_as=None):
+    if ui_state.has_newer_messages.get(channel_id, False):
+        # The channel is scrolled back past evicted pages; the message is
+        # saved and shows up when those pages are loaded again.
+        return
 
-def add_new_message(channel_id, prefix, message, packet_id=None):
     if channel_id not in ui_state.all_messages:
         ui_state.all_messages[channel_id] = []
 
     packet_ids = ui_state.message_packet_ids.setdefault(channel_id, [])
     while len(packet_ids) < len(ui_state.all_messages[channel_id]):
         packet_ids.append(None)
+    # Live messages are saved asynchronously, so their database row id is unknown.
+    rowids = ui_state.message_rowids.setdefault(channel_id, [])
+    while len(rowids) < len(ui_state.all_messages[channel_id]):
+        rowids.append(None)
 
     # Timestamp handling
     current_timestamp = time.time()
@@ -253,11 +294,33 @@ def add_new_message(channel_id, prefix, message, packet_id=None):
     if last_hour != current_hour:
         ui_state.all_messages[channel_id].append((f"-- {current_hour} --", ""))
         packet_ids.append(None)
+        rowids.append(None)
 
     # Add the message
     ts_str = time.strftime("[%H:%M:%S] ")
-    ui_state.all_messages[channel_id].append((f"{ts_str}{prefix}", message))
+    entry = (f"{ts_str}{prefix}", message)
+    ui_state.all_messages[channel_id].append(entry)
     packet_ids.append(packet_id)
+    rowids.append(None)
+    if saved_as is not None:
+        # Lets search results find the message before its row id is known.
+        ui_state.live_messages.setdefault(channel_id, {})[live_message_key(*saved_as)] = entry
+    if packet_id is not None:
+        ui_state.message_index_by_packet_id[packet_id] = (channel_id, len(packet_ids) - 1)
+
+
+# These portnumbers carry information visible elswhere in the app, so we just note them in the logs
+PAYLOAD_LABELS = {
+    "TEXT_MESSAGE_APP": "✉️",
+    "NODEINFO_APP": "Name identification payload",
+    "TRACEROUTE_APP": "Traceroute payload",
+}
+
+# Protobuf factory for each portnum name, resolved once instead of for every packet.
+_payload_factories = {
+    name: protocols[value].protobufFactory if value in protocols else None
+    for name, value in portnums_pb2.PortNum.items()
+}
 
 
 def parse_protobuf(packet: dict) -> Union[str, dict]:
@@ -270,18 +333,18 @@ def parse_protobuf(packet: dict) -> Union[str, dict]:
         if isinstance(payload, str):
             return payload
 
-        # These portnumbers carry information visible elswhere in the app, so we just note them in the logs
-        if portnum == "TEXT_MESSAGE_APP":
-            return "✉️"
-        elif portnum == "NODEINFO_APP":
-            return "Name identification payload"
-        elif portnum == "TRACEROUTE_APP":
-            return "Traceroute payload"
+        label = PAYLOAD_LABELS.get(portnum)
+        if label is not None:
+            return label
 
-        handler = protocols.get(portnums_pb2.PortNum.Value(portnum)) if portnum is not None else None
-        if handler is not None and handler.protobufFactory is not None:
+        if portnum is None:
+            return None
+        if portnum not in _payload_factories:
+            return payload
+        factory = _payload_factories[portnum]
+        if factory is not None:
             try:
-                pb = handler.protobufFactory()
+                pb = factory()
                 pb.ParseFromString(bytes(payload))
 
                 # If we have position payload
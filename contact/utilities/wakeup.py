@@ -0,0 +1,83 @@
+import os
+import selectors
+import sys
+import threading
+from typing import Optional
+
+
+# selectors cannot wait on a Windows console handle, only on sockets.
+TERMINAL_WAIT_SUPPORTED = sys.platform != "win32"
+
+
+class Wakeup:
+    """Self-pipe that lets other threads interrupt the UI thread while it waits for input."""
+
+    def __init__(self) -> None:
+        self._read_fd: Optional[int] = None
+        self._write_fd: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def fileno(self) -> int:
+        """Return the end of the pipe to wait on, creating the pipe on first use."""
+        with self._lock:
+            if self._read_fd is None:
+                self._read_fd, self._write_fd = os.pipe()
+                os.set_blocking(self._read_fd, False)
+                os.set_blocking(self._write_fd, False)
+            return self._read_fd
+
+    def notify(self) -> None:
+        """Wake the waiting thread. Safe to call from any thread, and a no-op until someone waits."""
+        # Held so close() cannot free the descriptor, and the OS reuse it, mid-write.
+        with self._lock:
+            if self._write_fd is None:
+                return
+            try:
+                os.write(self._write_fd, b"\0")
+            except BlockingIOError:
+                # A full pipe already holds a pending wakeup.
+                pass
+
+    def drain(self) -> None:
+        """Consume pending wakeups so the next wait blocks again."""
+        with self._lock:
+            if self._read_fd is None:
+                return
+            try:
+                while os.read(self._read_fd, 4096):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def close(self) -> None:
+        with self._lock:
+            for fd in (self._read_fd, self._write_fd):
+                if fd is not None:
+                    os.close(fd)
+            self._read_fd = self._write_fd = None
+
+
+class InputWaiter:
+    """Waits until a terminal has input or a Wakeup fires, whichever comes first."""
+
+    def __init__(self, input_fd: int, wakeup: Wakeup) -> None:
+        self._wakeup = wakeup
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(input_fd, selectors.EVENT_READ, "input")
+        self._selector.register(wakeup.fileno(), selectors.EVENT_READ, "wakeup")
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        """Block for up to ``timeout`` seconds (forever when None). Returns True if input is ready."""
+        input_ready = False
+        for key, _events in self._selector.select(timeout):
+            if key.data == "wakeup":
+                self._wakeup.drain()
+            else:
+                input_ready = True
+        return input_ready
+
+    def close(self) -> None:
+        self._selector.close()
+
+
+ui_wakeup = Wakeup()
@@ -1,10 +1,13 @@
+import time
 import unittest
+from collections import deque
 from types import SimpleNamespace
 from unittest import mock
 
 import contact.ui.default_config as config
 from contact.ui import contact_ui
 from contact.ui.nav_utils import text_width
+from contact.ui.ui_state import PacketLogEntry
 from contact.utilities.singleton import ui_state
 
 from tests.test_support import reset_singletons, restore_config, snapshot_config
@@ -105,11 +108,9 @@ class ContactUiTests(unittest.TestCase):
 
     def test_process_pending_ui_updates_draws_requested_windows(self) -> None:
         stdscr = mock.Mock()
-        ui_state.redraw_channels = True
-        ui_state.redraw_messages = True
-        ui_state.redraw_nodes = True
-        ui_state.redraw_packetlog = True
-        ui_state.scroll_messages_to_bottom = True
+        contact_ui.request_ui_redraw(
+            channels=True, messages=True, nodes=True, packetlog=True, scroll_messages_to_bottom=True
+        )
 
         with mock.patch.object(contact_ui, "draw_channel_list") as draw_channel_list:
             with mock.patch.object(contact_ui, "draw_messages_window") as draw_messages_window:
@@ -124,22 +125,17 @@ class ContactUiTests(unittest.TestCase):
 
     def test_process_pending_ui_updates_full_redraw_uses_handle_resize(self) -> None:
         stdscr = mock.Mock()
-        ui_state.redraw_full_ui = True
-        ui_state.redraw_channels = True
-        ui_state.redraw_messages = True
+        contact_ui.request_ui_redraw(full=True, channels=True, messages=True)
 
         with mock.patch.object(contact_ui, "handle_resize") as handle_resize:
             contact_ui.process_pending_ui_updates(stdscr)
 
         handle_resize.assert_called_once_with(stdscr, False)
-        self.assertFalse(ui_state.redraw_channels)
-        self.assertFalse(ui_state.redraw_messages)
+        self.assertEqual(ui_state.damaged_panes, set())
 
     def test_process_pending_ui_updates_preserves_selection_when_scrolling_to_new_messages(self) -> None:
         stdscr = mock.Mock()
-        ui_state.redraw_messages = True
-        ui_state.scroll_messages_to_bottom = True
-        ui_state.preserve_message_selection = True
+        contact_ui.request_ui_redraw(messages=True, scroll_messages_to_bottom=True, preserve_message_selection=True)
 
         with mock.patch.object(contact_ui, "draw_messages_window") as draw_messages_window:
             contact_ui.process_pending_ui_updates(stdscr)
@@ -147,6 +143,127 @@ class ContactUiTests(unittest.TestCase):
         draw_messages_window.assert_called_once_with(True, preserve_selection=True)
         self.assertFalse(ui_state.preserve_message_selection)
 
+    def test_process_pending_ui_updates_coalesces_damage_within_a_frame(self) -> None:
+        stdscr = mock.Mock()
+
+        with mock.patch.object(contact_ui, "draw_packetlog_win") as draw_packetlog_win:
+            contact_ui.request_ui_redraw(packetlog=True)
+            contact_ui.process_pending_ui_updates(stdscr, now=100.0)
+            for offset in (0.01, 0.02, 0.03):
+                contact_ui.request_ui_redraw(packetlog=True)
+                contact_ui.process_pending_ui_updates(stdscr, now=100.0 + offset)
+            self.assertEqual(draw_packetlog_win.call_count, 1)
+            self.assertEqual(ui_state.damaged_panes, {contact_ui.PANE_PACKETLOG})
+
+            contact_ui.process_pending_ui_updates(stdscr, now=100.0 + contact_ui.FRAME_INTERVAL_SECONDS)
+
+        self.assertEqual(draw_packetlog_win.call_count, 2)
+        self.assertEqual(ui_state.damaged_panes, set())
+
+    def test_input_wait_ends_at_the_next_frame_only_while_damaged(self) -> None:
+        self.assertEqual(contact_ui.input_wait_seconds(), contact_ui.IDLE_WAIT_SECONDS)
+
+        ui_state.last_frame_time = time.monotonic()
+        contact_ui.request_ui_redraw(nodes=True)
+
+        self.assertLessEqual(contact_ui.input_wait_seconds(), contact_ui.FRAME_INTERVAL_SECONDS)
+
+    def test_polled_input_timeout_stays_short_enough_to_notice_redraws(self) -> None:
+        self.assertEqual(contact_ui.polled_input_timeout_ms(), int(contact_ui.POLL_INPUT_SECONDS * 1000))
+
+        ui_state.last_frame_time = time.monotonic()
+        contact_ui.request_ui_redraw(nodes=True)
+
+        self.assertLessEqual(contact_ui.polled_input_timeout_ms(), int(contact_ui.FRAME_INTERVAL_SECONDS * 1000))
+
+    def test_main_ui_closes_the_input_waiter_when_the_loop_exits(self) -> None:
+        with mock.patch.object(contact_ui, "InputWaiter") as input_waiter, mock.patch.object(
+            contact_ui, "run_main_loop", side_effect=SystemExit
+        ), mock.patch.object(contact_ui.sys.stdin, "fileno", return_value=0):
+            with self.assertRaises(SystemExit):
+                contact_ui.main_ui(mock.Mock())
+
+        input_waiter.return_value.close.assert_called_once_with()
+
+    def test_main_ui_polls_without_a_waiter_where_the_terminal_cannot_be_waited_on(self) -> None:
+        with mock.patch.object(contact_ui, "TERMINAL_WAIT_SUPPORTED", False), mock.patch.object(
+            contact_ui, "InputWaiter"
+        ) as input_waiter, mock.patch.object(contact_ui, "run_main_loop") as run_main_loop:
+            contact_ui.main_ui(mock.Mock())
+
+        input_waiter.assert_not_called()
+        self.assertIsNone(run_main_loop.call_args.args[1])
+
+    def test_request_ui_redraw_wakes_the_main_loop(self) -> None:
+        with mock.patch.object(contact_ui.ui_wakeup, "notify") as notify:
+            contact_ui.request_ui_redraw(messages=True)
+
+        notify.assert_called_once_with()
+
+    def test_batched_frame_stages_refreshes_for_one_terminal_update(self) -> None:
+        channel_win = mock.Mock()
+        nodes_win = mock.Mock()
+
+        with mock.patch.object(contact_ui.curses, "doupdate") as doupdate:
+            with contact_ui.batched_frame():
+                contact_ui.refresh_window(channel_win)
+                with contact_ui.batched_frame():
+                    contact_ui.refresh_window(nodes_win)
+                doupdate.assert_not_called()
+
+        doupdate.assert_called_once_with()
+        channel_win.noutrefresh.assert_called_once_with()
+        nodes_win.noutrefresh.assert_called_once_with()
+        channel_win.refresh.assert_not_called()
+
+    def test_draw_messages_window_does_not_rerender_packet_log(self) -> None:
+        ui_state.channel_list = ["Primary"]
+        ui_state.all_messages = {"Primary": [("-- 12:00 --", "")]}
+        ui_state.display_log = True
+        self.setup_message_pad()
+        contact_ui.messages_win.getbegyx.return_value = (0, 0)
+        contact_ui.channel_win = mock.Mock()
+        contact_ui.channel_win.getmaxyx.return_value = (10, 10)
+
+        with mock.patch.object(contact_ui, "paint_frame"):
+            with mock.patch.object(contact_ui, "get_color", return_value=0):
+                with mock.patch.object(contact_ui, "draw_frame_title"):
+                    with mock.patch.object(contact_ui, "draw_window_arrows"):
+                        with mock.patch.object(contact_ui, "draw_packetlog_win") as draw_packetlog_win:
+                            contact_ui.draw_messages_window()
+
+        draw_packetlog_win.assert_not_called()
+        contact_ui.packetlog_win.touchwin.assert_called_once_with()
+
+    def test_packet_log_redraw_reuses_formatted_rows(self) -> None:
+        ui_state.display_log = True
+        ui_state.current_window = 1
+        ui_state.packet_buffer = deque([PacketLogEntry({"from": 1, "to": 4294967295, "decoded": {"portnum": "TEXT"}})])
+        contact_ui.packetlog_win = mock.Mock()
+        contact_ui.packetlog_win.getmaxyx.return_value = (6, 80)
+        contact_ui.entry_win = mock.Mock()
+
+        with mock.patch.object(contact_ui, "paint_frame"), mock.patch.object(contact_ui.curses, "curs_set"):
+            with mock.patch.object(contact_ui, "get_color", return_value=0):
+                with mock.patch.object(contact_ui, "get_name_from_database", return_value="AAAA"):
+                    with mock.patch.object(contact_ui, "parse_protobuf", return_value="payload") as parse_protobuf:
+                        contact_ui.draw_packetlog_win()
+                        contact_ui.draw_packetlog_win()
+
+        parse_protobuf.assert_called_once()
+        row = ui_state.packet_buffer[0].row
+        self.assertEqual(row.split(), ["AAAA", "BROADCAST", "TEXT", "payload"])
+        contact_ui.packetlog_win.addstr.assert_called_with(2, 1, row[:77], 0)
+
+    def test_message_range_at_bisects_ranges_with_gaps(self) -> None:
+        ranges = [(0, 2, 0), (3, 4, 0), (4, 7, 0)]
+
+        self.assertEqual(
+            [contact_ui.message_range_at(ranges, line) for line in range(8)],
+            [0, 0, None, 1, 2, 2, 2, None],
+        )
+        self.assertIsNone(contact_ui.message_range_at([], 0))
+
     def test_draw_messages_resizes_pad_once(self) -> None:
         ui_state.channel_list = ["Primary"]
         ui_state.all_messages = {"Primary": [("[10:00] RX: ", "one"), ("[10:01] RX: ", "two")]}
@@ -167,6 +284,92 @@ class ContactUiTests(unittest.TestCase):
 
         contact_ui.messages_pad.resize.assert_called_once_with(2, 40)
 
+    def draw_primary_messages(self) -> None:
+        with mock.patch.object(contact_ui, "paint_frame"):
+            with mock.patch.object(contact_ui, "get_color", return_value=0):
+                with mock.patch.object(contact_ui, "refresh_pad"):
+                    with mock.patch.object(contact_ui, "draw_packetlog_win"):
+                        with mock.patch.object(contact_ui, "draw_window_arrows"):
+                            contact_ui.draw_messages_window()
+
+    def setup_message_pad(self) -> None:
+        ui_state.channel_list = ["Primary"]
+        contact_ui.messages_pad = mock.Mock()
+        contact_ui.messages_pad.getmaxyx.return_value = (2, 40)
+        contact_ui.messages_win = mock.Mock()
+        contact_ui.messages_win.getmaxyx.return_value = (10, 40)
+        contact_ui.packetlog_win = mock.Mock()
+        contact_ui.packetlog_win.getmaxyx.return_value = (1, 40)
+
+    def test_draw_messages_only_lays_out_appended_message(self) -> None:
+        self.setup_message_pad()
+        ui_state.all_messages = {"Primary": [("[10:00] RX: ", "one"), ("[10:01] RX: ", "two")]}
+        self.draw_primary_messages()
+        contact_ui.messages_pad.reset_mock()
+
+        ui_state.all_messages["Primary"].append(("[10:02] RX: ", "three"))
+        contact_ui.wrap_message.cache_clear()
+        with mock.patch.object(contact_ui, "wrap_text", wraps=contact_ui.wrap_text) as wrap_text:
+            self.draw_primary_messages()
+
+        wrap_text.assert_called_once()
+        contact_ui.messages_pad.erase.assert_not_called()
+        contact_ui.messages_pad.resize.assert_called_once_with(3, 40)
+        contact_ui.messages_pad.addstr.assert_called_once_with(2, 1, "[10:02] RX: three", 0)
+        self.assertEqual(ui_state.message_line_ranges["Primary"], [(0, 1, 0), (1, 2, 0), (2, 3, 0)])
+
+    def test_draw_messages_redraws_from_an_edited_message(self) -> None:
+        self.setup_message_pad()
+        ui_state.all_messages = {"Primary": [("[10:00] RX: ", "one"), ("[10:01] TX: ", "two")]}
+        self.draw_primary_messages()
+        contact_ui.messages_pad.reset_mock()
+
+        ui_state.all_messages["Primary"][1] = ("[10:01] TX ok: ", "two")
+        self.draw_primary_messages()
+
+        contact_ui.messages_pad.move.assert_called_once_with(1, 0)
+        contact_ui.messages_pad.clrtobot.assert_called_once_with()
+        contact_ui.messages_pad.addstr.assert_called_once_with(1, 1, "[10:01] TX ok: two", 0)
+
+    def test_draw_messages_lays_out_everything_after_prepend_or_resize(self) -> None:
+        self.setup_message_pad()
+        ui_state.all_messages = {"Primary": [("[10:00] RX: ", "one")]}
+        self.draw_primary_messages()
+
+        ui_state.all_messages["Primary"].insert(0, ("[09:59] RX: ", "zero"))
+        contact_ui.messages_pad.reset_mock()
+        self.draw_primary_messages()
+        contact_ui.messages_pad.erase.assert_called_once_with()
+        self.assertEqual(contact_ui.messages_pad.addstr.call_count, 2)
+
+        contact_ui.messages_win.getmaxyx.return_value = (10, 30)
+        contact_ui.messages_pad.reset_mock()
+        self.draw_primary_messages()
+        contact_ui.messages_pad.erase.assert_called_once_with()
+        self.assertEqual(contact_ui.messages_pad.addstr.call_count, 2)
+
+    def test_find_message_index_uses_row_id_or_the_values_a_live_message_was_saved_with(self) -> None:
+        ui_state.all_messages = {
+            "Primary": [
+                ("-- 2026-01-01 10:00 --", ""),
+                ("[10:00:00] >> [6] B1G1: ", "storm warning"),
+            ]
+        }
+        ui_state.message_rowids = {"Primary": [None, 7]}
+        contact_ui.add_new_message(
+            "Primary", ">> [6] B1G1: ", "storm warning", saved_as=(1767261900, 456, "storm warning")
+        )
+        live_index = len(ui_state.all_messages["Primary"]) - 1
+        contact_ui.add_new_message("Primary", ">> [2] C2D2: ", "no storm warning", saved_as=(1767261950, 789, "no storm"))
+        stored = contact_ui.MessageSearchHit(7, "Primary", "456", "storm warning", 1767261600)
+        live = contact_ui.MessageSearchHit(8, "Primary", "456", "storm warning", 1767261900)
+        unsaved = contact_ui.MessageSearchHit(9, "Primary", "456", "storm warning", 1767262000)
+
+        self.assertEqual(contact_ui.find_message_index("Primary", stored), 1)
+        self.assertEqual(contact_ui.find_message_index("Primary", live), live_index)
+        # Another message ending in the same text is not mistaken for it.
+        self.assertIsNone(contact_ui.find_message_index("Primary", unsaved))
+
     def test_build_reply_prefix_includes_sender_and_five_character_excerpt(self) -> None:
         reply = contact_ui.build_reply_prefix(
             "[06:27:25] >> [6] B1G1: ",
@@ -205,6 +408,29 @@ class ContactUiTests(unittest.TestCase):
         self.assertEqual(ui_state.reply_id, 1234)
         self.assertEqual(ui_state.reply_context, "<Re: B1G1: Good > ")
 
+    def test_handle_ctrl_r_uses_the_selected_copy_of_a_repeated_message(self) -> None:
+        ui_state.current_window = 1
+        ui_state.channel_list = ["Primary"]
+        ui_state.all_messages = {"Primary": [("[06:27:25] >> [6] B1G1: ", "ping"), ("[06:27:25] >> [6] B1G1: ", "ping")]}
+        ui_state.message_packet_ids = {"Primary": [1, 2]}
+        ui_state.selected_message = 1
+        contact_ui.messages_win = mock.Mock()
+        contact_ui.messages_win.getmaxyx.return_value = (10, 80)
+
+        contact_ui.handle_ctrl_r("")
+
+        self.assertEqual(ui_state.reply_id, 2)
+
+    def test_wrap_message_is_memoized_per_width(self) -> None:
+        contact_ui.wrap_message.cache_clear()
+        with mock.patch.object(contact_ui, "wrap_text", wraps=contact_ui.wrap_text) as wrap_text:
+            first = contact_ui.wrap_message("[10:00] RX: ", "hello there", 20)
+            second = contact_ui.wrap_message("[10:00] RX: ", "hello there", 20)
+            contact_ui.wrap_message("[10:00] RX: ", "hello there", 30)
+
+        self.assertEqual(first, second)
+        self.assertEqual(wrap_text.call_count, 2)
+
     def test_handle_ctrl_r_clears_an_existing_reply(self) -> None:
         ui_state.current_window = 1
         ui_state.reply_id = 1234
@@ -330,6 +556,7 @@ class ContactUiTests(unittest.TestCase):
         ui_state.node_list = [101, 202]
         ui_state.selected_node = 1
         ui_state.start_index = [0, 0, 0]
+        ui_state.rendered_node_rows = {0, 1}
         contact_ui.nodes_pad = mock.Mock()
         contact_ui.nodes_pad.getmaxyx.return_value = (4, 20)
         contact_ui.nodes_win = mock.Mock()
@@ -370,6 +597,58 @@ class ContactUiTests(unittest.TestCase):
         text = contact_ui.channel_pad.addstr.call_args.args[2]
         self.assertEqual(len(text), 16)
 
+    def test_draw_channel_list_renders_rows_near_the_selection_from_cached_labels(self) -> None:
+        ui_state.channel_list = ["Primary"] + list(range(1000, 1300))
+        ui_state.selected_channel = 200
+        ui_state.current_window = 0
+        contact_ui.channel_pad = mock.Mock()
+        contact_ui.channel_win = mock.Mock()
+        contact_ui.channel_win.getmaxyx.return_value = (12, 30)
+
+        with mock.patch.object(contact_ui, "get_color", return_value=1):
+            with mock.patch.object(contact_ui, "paint_frame"):
+                with mock.patch.object(contact_ui, "refresh_pad"):
+                    with mock.patch.object(contact_ui, "draw_window_arrows"):
+                        with mock.patch.object(contact_ui, "is_chat_archived", return_value=0) as is_chat_archived:
+                            with mock.patch.object(contact_ui, "get_name_from_database", side_effect=lambda num, type: str(num)):
+                                contact_ui.draw_channel_list()
+                                contact_ui.draw_channel_list()
+
+        reach = 10 + contact_ui.LIST_OVERSCAN_ROWS
+        rows = [call.args[0] for call in contact_ui.channel_pad.addstr.call_args_list]
+        self.assertEqual(rows, list(range(200 - reach, 200 + reach)) * 2)
+        self.assertEqual(is_chat_archived.call_count, 300)
+        self.assertEqual(ui_state.channel_rows[1], "1000")
+
+    def test_node_record_changes_drop_cached_labels_and_request_redraw(self) -> None:
+        ui_state.channel_labels = {456: "Old Name", 789: None}
+        ui_state.node_row_labels = {456: "🔓 Old Name"}
+
+        with mock.patch.object(contact_ui, "request_ui_redraw") as request_ui_redraw:
+            contact_ui.handle_node_records_changed(["456", "999"])
+            # The listener may run off the UI thread, so it leaves the labels alone.
+            self.assertIn(456, ui_state.channel_labels)
+            request_ui_redraw.assert_not_called()
+
+            contact_ui.apply_node_record_changes()
+
+        self.assertEqual(ui_state.channel_labels, {789: None})
+        self.assertEqual(ui_state.node_row_labels, {})
+        request_ui_redraw.assert_called_once_with(channels=True, nodes=True)
+
+    def test_node_cache_reload_drops_every_label_on_the_ui_thread(self) -> None:
+        ui_state.channel_labels = {456: "Old Name"}
+        ui_state.node_row_labels = {456: "🔓 Old Name"}
+
+        with mock.patch.object(contact_ui, "request_ui_redraw") as request_ui_redraw:
+            contact_ui.handle_node_records_changed(["456"])
+            contact_ui.handle_node_records_changed(None)
+            contact_ui.apply_node_record_changes()
+            contact_ui.apply_node_record_changes()
+
+        self.assertEqual((ui_state.channel_labels, ui_state.node_row_labels), ({}, {}))
+        request_ui_redraw.assert_called_once_with(channels=True, nodes=True)
+
     def test_draw_node_list_reserves_scroll_arrow_column(self) -> None:
         ui_state.node_list = [101]
         ui_state.current_window = 2
@@ -392,6 +671,58 @@ class ContactUiTests(unittest.TestCase):
         self.assertEqual(text_width(text), 16)
         self.assertIn("…", text)
 
+    def draw_nodes(self, node_count: int, selected_node: int = 0):
+        ui_state.node_list = list(range(node_count))
+        ui_state.selected_node = selected_node
+        ui_state.current_window = 2
+        contact_ui.nodes_pad = mock.Mock()
+        contact_ui.nodes_win = mock.Mock()
+        contact_ui.nodes_win.getmaxyx.return_value = (12, 30)
+        contact_ui.entry_win = mock.Mock()
+        interface = mock.Mock()
+        interface.nodesByNum = {num: {"user": {"longName": f"Node {num}"}} for num in range(node_count)}
+        patches = [
+            mock.patch("contact.ui.contact_ui.interface_state.interface", interface),
+            mock.patch.object(contact_ui, "get_node_row_color", return_value=1),
+            mock.patch.object(contact_ui.curses, "curs_set"),
+            mock.patch.object(contact_ui, "paint_frame"),
+            mock.patch.object(contact_ui, "refresh_pad"),
+            mock.patch.object(contact_ui, "draw_window_arrows"),
+            mock.patch.object(contact_ui, "move_main_highlight"),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        contact_ui.draw_node_list()
+        return interface
+
+    def drawn_node_rows(self):
+        return sorted(call.args[0] for call in contact_ui.nodes_pad.addstr.call_args_list)
+
+    def test_draw_node_list_renders_only_rows_near_the_selection(self) -> None:
+        self.draw_nodes(1000, selected_node=500)
+
+        reach = 10 + contact_ui.LIST_OVERSCAN_ROWS
+        self.assertEqual(self.drawn_node_rows(), list(range(500 - reach, 500 + reach)))
+        contact_ui.nodes_pad.resize.assert_called_once_with(1001, 30)
+
+    def test_select_node_draws_rows_scrolled_into_view_once(self) -> None:
+        self.draw_nodes(1000)
+        contact_ui.nodes_pad.addstr.reset_mock()
+
+        contact_ui.select_node(25)
+        contact_ui.select_node(24)
+
+        self.assertEqual(self.drawn_node_rows(), list(range(20, 45)))
+
+    def test_node_row_labels_are_cached_until_invalidated(self) -> None:
+        interface = self.draw_nodes(3)
+        interface.nodesByNum[1]["user"] = {"longName": "Renamed", "publicKey": "key"}
+
+        self.assertEqual(contact_ui.node_row_label(1), "🔓 Node 1")
+        contact_ui.invalidate_node_rows(1)
+        self.assertEqual(contact_ui.node_row_label(1), "🔐 Renamed")
+
     def test_handle_resize_single_pane_keeps_full_width_windows(self) -> None:
         stdscr = mock.Mock()
         stdscr.getmaxyx.return_value = (24, 80)
@@ -2,12 +2,14 @@ import os
 import sqlite3
 import tempfile
 import unittest
+from unittest import mock
 
 import contact.ui.default_config as config
-from contact.utilities import db_handler
+from contact.utilities import db_handler, db_schema
+from contact.utilities.node_cache import NodeCache
 from contact.utilities.demo_data import DEMO_LOCAL_NODE_NUM, build_demo_interface
 from contact.utilities.singleton import interface_state, ui_state
-from contact.utilities.utils import decimal_to_hex
+from contact.utilities.utils import decimal_to_hex, find_message_by_packet_id
 
 from tests.test_support import reset_singletons, restore_config, snapshot_config
 
@@ -23,53 +25,54 @@ class DbHandlerTests(unittest.TestCase):
             "ack_implicit_str",
             "ack_unknown_str",
             "nak_str",
+            "max_loaded_messages",
         )
         self.tempdir = tempfile.TemporaryDirectory()
         config.db_file_path = os.path.join(self.tempdir.name, "client.db")
         interface_state.myNodeNum = 123
 
     def tearDown(self) -> None:
+        db_handler.close_db_connections()
         self.tempdir.cleanup()
         restore_config(self.saved_config)
         reset_singletons()
 
+    def create_legacy_message_table(
+        self, table_name: str, rows, columns: str = "user_id, message_text, timestamp, ack_type"
+    ) -> None:
+        """Build a pre-migration per-channel table before db_handler opens the database."""
+        placeholders = ", ".join("?" for _ in columns.split(","))
+        with sqlite3.connect(config.db_file_path) as conn:
+            conn.execute(f'CREATE TABLE "{table_name}" ({columns})')
+            conn.executemany(f'INSERT INTO "{table_name}" VALUES ({placeholders})', rows)
+
+    def fetch_messages(self, columns: str = "user_id, message_text, ack_type"):
+        with sqlite3.connect(config.db_file_path) as conn:
+            return conn.execute(f"SELECT {columns} FROM messages ORDER BY id").fetchall()
+
     def test_save_message_to_db_and_update_ack_roundtrip(self) -> None:
-        timestamp = db_handler.save_message_to_db("Primary", "123", "hello")
+        timestamp = db_handler.save_message_to_db("Primary", "123", "hello", packet_id=41)
+        db_handler.save_message_to_db("Primary", "123", "hello", packet_id=42)
 
         self.assertIsInstance(timestamp, int)
 
-        db_handler.update_ack_nak("Primary", timestamp, "hello", "Ack")
+        db_handler.update_ack_nak(42, "Ack")
 
-        with sqlite3.connect(config.db_file_path) as conn:
-            row = conn.execute('SELECT user_id, message_text, ack_type FROM "123_Primary_messages"').fetchone()
-
-        self.assertEqual(row, ("123", "hello", "Ack"))
+        self.assertEqual(self.fetch_messages(), [("123", "hello", None), ("123", "hello", "Ack")])
 
     def test_message_ids_are_migrated_and_reloaded_with_history(self) -> None:
-        db_handler.ensure_table_exists(
-            '"123_Primary_messages"',
-            "user_id TEXT, message_text TEXT, timestamp INTEGER, ack_type TEXT",
-        )
-        with sqlite3.connect(config.db_file_path) as conn:
-            conn.execute(
-                'INSERT INTO "123_Primary_messages" VALUES (?, ?, ?, ?)',
-                ("456", "original message", 1700000000, None),
-            )
+        self.create_legacy_message_table("123_Primary_messages", [("456", "original message", 1700000000, None)])
 
         db_handler.save_message_to_db("Primary", "456", "reply", packet_id=902, reply_id=901)
         with sqlite3.connect(config.db_file_path) as conn:
-            columns = {row[1] for row in conn.execute('PRAGMA table_info("123_Primary_messages")')}
             stored_ids = conn.execute(
-                'SELECT packet_id, reply_id FROM "123_Primary_messages" WHERE message_text = ?', ("reply",)
+                "SELECT packet_id, reply_id FROM messages WHERE message_text = ?", ("reply",)
             ).fetchone()
-            conn.execute(
-                'UPDATE "123_Primary_messages" SET packet_id = ? WHERE message_text = ?', (901, "original message")
-            )
+            conn.execute("UPDATE messages SET packet_id = ? WHERE message_text = ?", (901, "original message"))
             conn.commit()
 
         db_handler.load_messages_from_db()
 
-        self.assertTrue({"packet_id", "reply_id"}.issubset(columns))
         self.assertEqual(stored_ids, (902, 901))
         self.assertEqual([packet_id for packet_id in ui_state.message_packet_ids["Primary"] if packet_id], [901, 902])
         self.assertEqual(
@@ -99,35 +102,16 @@ class DbHandlerTests(unittest.TestCase):
         self.assertEqual(db_handler.is_chat_archived(user_id), 0)
 
     def test_load_messages_from_db_populates_channels_and_messages(self) -> None:
+        self.create_legacy_message_table(
+            "123_Primary_messages",
+            [("123", "sent", 1700000000, "Ack"), ("456", "reply", 1700000001, None)],
+        )
+        self.create_legacy_message_table("123_789_messages", [("789", "hidden", 1700000002, None)])
+
         db_handler.update_node_info_in_db(123, long_name="Local Node", short_name="ME")
         db_handler.update_node_info_in_db(456, long_name="Remote Node", short_name="RM")
         db_handler.update_node_info_in_db(789, long_name="Archived", short_name="AR", chat_archived=1)
 
-        db_handler.ensure_table_exists(
-            '"123_Primary_messages"',
-            """
-            user_id TEXT,
-            message_text TEXT,
-            timestamp INTEGER,
-            ack_type TEXT
-            """,
-        )
-        db_handler.ensure_table_exists(
-            '"123_789_messages"',
-            """
-            user_id TEXT,
-            message_text TEXT,
-            timestamp INTEGER,
-            ack_type TEXT
-            """,
-        )
-
-        with sqlite3.connect(config.db_file_path) as conn:
-            conn.execute('INSERT INTO "123_Primary_messages" VALUES (?, ?, ?, ?)', ("123", "sent", 1700000000, "Ack"))
-            conn.execute('INSERT INTO "123_Primary_messages" VALUES (?, ?, ?, ?)', ("456", "reply", 1700000001, None))
-            conn.execute('INSERT INTO "123_789_messages" VALUES (?, ?, ?, ?)', ("789", "hidden", 1700000002, None))
-            conn.commit()
-
         ui_state.channel_list = []
         ui_state.all_messages = {}
 
@@ -146,15 +130,8 @@ class DbHandlerTests(unittest.TestCase):
 
     def test_message_history_is_loaded_in_bounded_pages(self) -> None:
         db_handler.update_node_info_in_db(456, long_name="Remote Node", short_name="RM")
-        db_handler.ensure_table_exists(
-            '"123_Primary_messages"',
-            "user_id TEXT, message_text TEXT, timestamp INTEGER, ack_type TEXT",
-        )
-        with sqlite3.connect(config.db_file_path) as conn:
-            conn.executemany(
-                'INSERT INTO "123_Primary_messages" VALUES (?, ?, ?, ?)',
-                [("456", f"message-{i}", 1700000000 + i, None) for i in range(7)],
-            )
+        for i in range(7):
+            db_handler.save_message_to_db("Primary", "456", f"message-{i}")
 
         db_handler.load_messages_from_db(page_size=3)
 
@@ -181,22 +158,41 @@ class DbHandlerTests(unittest.TestCase):
         self.assertEqual(len(separators), 3)
 
     def test_message_table_channel_name_may_contain_underscores(self) -> None:
-        db_handler.ensure_node_table_exists()
-        db_handler.ensure_table_exists(
-            '"123_My_Channel_messages"',
-            "user_id TEXT, message_text TEXT, timestamp INTEGER, ack_type TEXT",
-        )
-        with sqlite3.connect(config.db_file_path) as conn:
-            conn.execute(
-                'INSERT INTO "123_My_Channel_messages" VALUES (?, ?, ?, ?)',
-                ("123", "hello", 1700000000, None),
-            )
+        self.create_legacy_message_table("123_My_Channel_messages", [("123", "hello", 1700000000, None)])
 
         db_handler.load_messages_from_db()
 
         self.assertIn("My_Channel", ui_state.channel_list)
         self.assertEqual(ui_state.all_messages["My_Channel"][-1][1], "hello")
 
+    def test_legacy_message_tables_are_imported_once_and_dropped(self) -> None:
+        self.create_legacy_message_table(
+            "123_Primary_messages",
+            [("456", "first", 1700000000), ("456", "second", 1700000001)],
+            columns="user_id, message_text, timestamp",
+        )
+        self.create_legacy_message_table("321_Primary_messages", [("654", "other radio", 1700000002, "Ack")])
+
+        db_handler.load_messages_from_db()
+        db_handler.close_db_connections()
+        db_handler.load_messages_from_db()
+
+        self.assertEqual(
+            self.fetch_messages("my_node, channel, user_id, message_text, ack_type"),
+            [
+                (123, "Primary", "456", "first", None),
+                (123, "Primary", "456", "second", None),
+                (321, "Primary", "654", "other radio", "Ack"),
+            ],
+        )
+        with sqlite3.connect(config.db_file_path) as conn:
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+            indexes = {row[1] for row in conn.execute("PRAGMA index_list(messages)")}
+        self.assertNotIn("123_Primary_messages", tables)
+        self.assertNotIn("321_Primary_messages", tables)
+        self.assertTrue({"messages_by_channel", "messages_by_packet_id", "messages_by_channel_time"}.issubset(indexes))
+        self.assertEqual([message for _, message in ui_state.all_messages["Primary"] if message], ["first", "second"])
+
     def test_init_nodedb_inserts_nodes_from_interface(self) -> None:
         interface_state.interface = build_demo_interface()
         interface_state.myNodeNum = DEMO_LOCAL_NODE_NUM
@@ -204,3 +200,223 @@ class DbHandlerTests(unittest.TestCase):
         db_handler.init_nodedb()
 
         self.assertEqual(db_handler.get_name_from_database(2701131778, "short"), "SAT2")
+
+    def test_init_nodedb_only_writes_changed_nodes(self) -> None:
+        interface_state.interface = build_demo_interface()
+        interface_state.myNodeNum = DEMO_LOCAL_NODE_NUM
+        db_handler.update_node_info_in_db(2701131778, chat_archived=1)
+        db_handler.init_nodedb()
+
+        interface_state.interface.nodesByNum[2701131779]["user"]["shortName"] = "NEW"
+        statements = []
+        db_handler.get_db_connection().set_trace_callback(statements.append)
+        db_handler.init_nodedb()
+
+        self.assertEqual(len([sql for sql in statements if "INSERT INTO" in sql]), 1)
+        self.assertFalse([sql for sql in statements if sql.lstrip().startswith("SELECT")])
+        self.assertEqual(db_handler.get_name_from_database(2701131779, "short"), "NEW")
+        self.assertEqual(db_handler.is_chat_archived(2701131778), 1)
+        with sqlite3.connect(config.db_file_path) as conn:
+            row = conn.execute(
+                f'SELECT short_name FROM "{DEMO_LOCAL_NODE_NUM}_nodedb" WHERE user_id = ?', ("2701131779",)
+            ).fetchone()
+        self.assertEqual(row, ("NEW",))
+
+    def test_init_nodedb_writes_nothing_after_reloading_unchanged_nodes(self) -> None:
+        interface_state.interface = build_demo_interface()
+        interface_state.myNodeNum = DEMO_LOCAL_NODE_NUM
+        db_handler.init_nodedb()
+        # A restart reloads the cache from disk, where is_licensed reads back as text.
+        db_handler.node_cache.clear()
+        db_handler.get_node_cache()
+
+        statements = []
+        db_handler.get_db_connection().set_trace_callback(statements.append)
+        db_handler.init_nodedb()
+
+        self.assertFalse([sql for sql in statements if "INSERT INTO" in sql])
+
+    def test_node_lookups_are_served_from_cache_after_first_load(self) -> None:
+        db_handler.update_node_info_in_db(456, long_name="Remote Node", short_name="RM", chat_archived=1)
+
+        with mock.patch.object(db_handler, "db_transaction", side_effect=AssertionError("unexpected SQL")):
+            self.assertEqual(db_handler.get_name_from_database(456, "long"), "Remote Node")
+            self.assertEqual(db_handler.get_name_from_database(456, "short"), "RM")
+            self.assertEqual(db_handler.is_chat_archived(456), 1)
+            self.assertEqual(db_handler.get_name_from_database(789, "short"), decimal_to_hex(789))
+
+    def test_node_cache_reloads_from_disk_for_another_local_node(self) -> None:
+        db_handler.update_node_info_in_db(456, long_name="Remote Node", short_name="RM")
+        with sqlite3.connect(config.db_file_path) as conn:
+            conn.execute(f'CREATE TABLE "321_nodedb" ({db_schema.NODE_TABLE_SCHEMA})')
+            conn.execute('INSERT INTO "321_nodedb" (user_id, long_name, short_name) VALUES (?, ?, ?)', ("456", "Other", "OT"))
+
+        interface_state.myNodeNum = 321
+
+        self.assertEqual(db_handler.get_name_from_database(456, "short"), "OT")
+        self.assertEqual(db_handler.is_chat_archived(456), 0)
+
+    def test_node_cache_tells_listeners_which_records_changed(self) -> None:
+        cache = NodeCache()
+        notifications = []
+        cache.add_listener(notifications.append)
+
+        cache.load("key", [])
+        cache.merge(456, long_name="Remote Node")
+        cache.merge(456, long_name="Remote Node")
+        cache.merge_many([(456, {"short_name": "RM"}), (789, {}), ("789", {})])
+
+        self.assertEqual(notifications, [None, ["456"], ["456", "789"]])
+
+    def test_hot_write_paths_do_not_check_the_schema(self) -> None:
+        db_handler.get_node_cache()
+        statements = []
+        db_handler.get_db_connection().set_trace_callback(statements.append)
+
+        db_handler.save_message_to_db("Primary", "456", "hello")
+        db_handler.update_node_info_in_db(456, short_name="RM")
+
+        # Statements run inside triggers and virtual tables are traced with a leading "--",
+        # and SQLite checks data_version itself when FTS5 reads an auto-vacuum database.
+        top_level = [sql for sql in statements if not sql.startswith("--") and "data_version" not in sql]
+        self.assertFalse([sql for sql in top_level if "PRAGMA" in sql or "CREATE" in sql or "ALTER" in sql])
+        with sqlite3.connect(config.db_file_path) as conn:
+            self.assertEqual(conn.execute("PRAGMA user_version").fetchone()[0], db_schema.SCHEMA_VERSION)
+
+    def test_connection_is_reused_until_database_path_changes(self) -> None:
+        first = db_handler.get_db_connection()
+
+        self.assertIs(db_handler.get_db_connection(), first)
+        self.assertEqual(first.execute("PRAGMA journal_mode").fetchone()[0].lower(), "wal")
+
+        config.db_file_path = os.path.join(self.tempdir.name, "other.db")
+
+        self.assertIsNot(db_handler.get_db_connection(), first)
+
+    def test_close_db_connections_forces_reconnect(self) -> None:
+        first = db_handler.get_db_connection()
+
+        db_handler.close_db_connections()
+
+        second = db_handler.get_db_connection()
+        self.assertIsNot(second, first)
+        self.assertEqual(second.execute("SELECT 1").fetchone(), (1,))
+
+    def test_search_messages_matches_every_channel_of_this_node(self) -> None:
+        self.create_legacy_message_table("123_Primary_messages", [("456", "weather looks stormy", 1700000000, None)])
+        db_handler.save_message_to_db(789, "456", "stormy night on the ridge")
+        db_handler.save_message_to_db("Primary", "456", "sunny again")
+        interface_state.myNodeNum = 321
+        db_handler.save_message_to_db("Primary", "456", "stormy elsewhere")
+        interface_state.myNodeNum = 123
+
+        hits = db_handler.search_messages("storm")
+
+        self.assertCountEqual(
+            [(hit.channel, hit.message_text) for hit in hits],
+            [(789, "stormy night on the ridge"), ("Primary", "weather looks stormy")],
+        )
+        self.assertEqual([hit.message_text for hit in db_handler.search_messages("ridge storm")], ["stormy night on the ridge"])
+        self.assertEqual(db_handler.search_messages("  "), [])
+
+    def test_search_messages_falls_back_to_like_without_an_index(self) -> None:
+        db_handler.save_message_to_db("Primary", "456", "snake_case name")
+        db_handler.save_message_to_db("Primary", "456", "snakeXcase name")
+
+        with mock.patch.object(db_handler, "has_message_search_index", return_value=False):
+            hits = db_handler.search_messages("snake_case")
+
+        self.assertEqual([hit.message_text for hit in hits], ["snake_case name"])
+
+    def test_load_messages_through_extends_history_to_a_search_hit(self) -> None:
+        for index in range(db_handler.MESSAGE_PAGE_SIZE + 20):
+            db_handler.save_message_to_db("Primary", "456", "needle" if index == 10 else f"message {index}")
+        db_handler.load_messages_from_db()
+        hit = db_handler.search_messages("needle")[0]
+        self.assertNotIn(hit.message_id, ui_state.message_rowids["Primary"])
+
+        self.assertTrue(db_handler.load_messages_through("Primary", hit.message_id, context=2))
+
+        rowids = ui_state.message_rowids["Primary"]
+        self.assertIn(hit.message_id, rowids)
+        self.assertEqual([rowid for rowid in rowids if rowid][:3], [hit.message_id - 2, hit.message_id - 1, hit.message_id])
+        self.assertTrue(ui_state.has_older_messages["Primary"])
+        self.assertEqual(len(ui_state.message_rowids["Primary"]), len(ui_state.all_messages["Primary"]))
+
+    def save_numbered_messages(self, count: int) -> None:
+        with db_handler.db_transaction() as db_cursor:
+            for index in range(count):
+                db_handler.write_message(db_cursor, "Primary", "456", f"message {index}", 1700000000 + index)
+
+    def loaded_texts(self):
+        return [message for prefix, message in ui_state.all_messages["Primary"] if not prefix.startswith("--")]
+
+    def test_scrolling_back_evicts_newest_pages_beyond_the_cap(self) -> None:
+        config.max_loaded_messages = "0"  # Clamped to two pages.
+        page = db_handler.MESSAGE_PAGE_SIZE
+        self.save_numbered_messages(page * 5)
+        db_handler.load_messages_from_db()
+
+        for _ in range(3):
+            db_handler.load_older_messages("Primary")
+
+        texts = self.loaded_texts()
+        self.assertLessEqual(len(ui_state.all_messages["Primary"]), db_handler.loaded_message_limit())
+        self.assertEqual(texts[0], f"message {page}")
+        self.assertTrue(ui_state.has_newer_messages["Primary"])
+        self.assertEqual(ui_state.newest_message_rowid["Primary"], ui_state.message_rowids["Primary"][-1])
+        self.assertTrue(ui_state.all_messages["Primary"][0][0].startswith("--"))
+
+    def test_packet_id_index_follows_messages_as_pages_load_and_evict(self) -> None:
+        config.max_loaded_messages = "0"  # Clamped to two pages.
+        page = db_handler.MESSAGE_PAGE_SIZE
+        with db_handler.db_transaction() as db_cursor:
+            for index in range(page * 3):
+                db_handler.write_message(
+                    db_cursor, "Primary", "456", f"message {index}", 1700000000 + index, packet_id=5000 + index
+                )
+        db_handler.load_messages_from_db()
+
+        db_handler.load_older_messages("Primary")
+        db_handler.load_older_messages("Primary")
+
+        channel, index = find_message_by_packet_id(5000)
+        self.assertEqual(ui_state.all_messages[channel][index][1], "message 0")
+        self.assertIsNone(find_message_by_packet_id(5000 + page * 3 - 1))
+        self.assertEqual(len(ui_state.message_index_by_packet_id), len(self.loaded_texts()))
+
+    def test_scrolling_forward_reloads_evicted_pages_and_evicts_oldest(self) -> None:
+        config.max_loaded_messages = "0"
+        page = db_handler.MESSAGE_PAGE_SIZE
+        self.save_numbered_messages(page * 5)
+        db_handler.load_messages_from_db()
+        for _ in range(4):
+            db_handler.load_older_messages("Primary")
+
+        while db_handler.load_newer_messages("Primary"):
+            self.assertLessEqual(len(ui_state.all_messages["Primary"]), db_handler.loaded_message_limit() + 1)
+
+        texts = self.loaded_texts()
+        self.assertEqual(texts[-1], f"message {page * 5 - 1}")
+        self.assertEqual(texts, [f"message {index}" for index in range(page * 5 - len(texts), page * 5)])
+        self.assertFalse(ui_state.has_newer_messages["Primary"])
+        self.assertTrue(ui_state.has_older_messages["Primary"])
+        self.assertEqual(len(ui_state.message_rowids["Primary"]), len(ui_state.all_messages["Primary"]))
+
+    def test_load_messages_through_recentres_on_a_distant_message(self) -> None:
+        config.max_loaded_messages = "0"
+        page = db_handler.MESSAGE_PAGE_SIZE
+        self.save_numbered_messages(page * 5)
+        db_handler.load_messages_from_db()
+        with sqlite3.connect(config.db_file_path) as conn:
+            message_id = conn.execute("SELECT id FROM messages WHERE message_text = 'message 7'").fetchone()[0]
+
+        self.assertTrue(db_handler.load_messages_through("Primary", message_id, context=2))
+
+        self.assertEqual(self.loaded_texts()[:3], [f"message {index}" for index in (5, 6, 7)])
+        self.assertEqual(len(self.loaded_texts()), 2 + page)
+        self.assertTrue(ui_state.has_newer_messages["Primary"])
+
+        self.assertTrue(db_handler.load_newest_messages("Primary"))
+        self.assertEqual(self.loaded_texts()[-1], f"message {page * 5 - 1}")
+        self.assertFalse(ui_state.has_newer_messages["Primary"])
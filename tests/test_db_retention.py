@@ -0,0 +1,213 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import contact.ui.default_config as config
+from contact.utilities import db_handler, db_retention, db_writer
+from contact.utilities.singleton import interface_state
+
+from tests.test_support import reset_singletons, restore_config, snapshot_config
+
+
+class DbRetentionTests(unittest.TestCase):
+    def setUp(self) -> None:
+        reset_singletons()
+        self.saved_config = snapshot_config(
+            "db_file_path",
+            "retention_max_age_days",
+            "retention_max_rows_per_channel",
+            "retention_archive_file_path",
+        )
+        self.tempdir = tempfile.TemporaryDirectory()
+        config.db_file_path = os.path.join(self.tempdir.name, "client.db")
+        config.retention_max_age_days = "0"
+        config.retention_max_rows_per_channel = "0"
+        config.retention_archive_file_path = ""
+        interface_state.myNodeNum = 123
+
+    def tearDown(self) -> None:
+        db_handler.close_db_connections()
+        self.tempdir.cleanup()
+        restore_config(self.saved_config)
+        reset_singletons()
+
+    def insert_messages(self, channel: str, timestamps) -> None:
+        with db_handler.db_transaction() as db_cursor:
+            for timestamp in timestamps:
+                db_handler.write_message(db_cursor, channel, "456", f"at {timestamp}", timestamp)
+
+    def fetch_texts(self, channel: str):
+        with sqlite3.connect(config.db_file_path) as conn:
+            return [
+                row[0]
+                for row in conn.execute("SELECT message_text FROM messages WHERE channel = ? ORDER BY id", (channel,))
+            ]
+
+    def test_new_database_uses_incremental_auto_vacuum(self) -> None:
+        connection = db_handler.get_db_connection()
+
+        self.assertEqual(connection.execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+
+    def test_existing_database_is_not_vacuumed_when_opened(self) -> None:
+        with sqlite3.connect(config.db_file_path) as conn:
+            conn.execute("CREATE TABLE unrelated (value)")
+
+        connection = db_handler.get_db_connection()
+
+        self.assertEqual(connection.execute("PRAGMA auto_vacuum").fetchone()[0], 0)
+
+    def test_existing_database_is_switched_to_incremental_auto_vacuum_by_retention(self) -> None:
+        with sqlite3.connect(config.db_file_path) as conn:
+            conn.execute("CREATE TABLE unrelated (value)")
+        config.retention_max_rows_per_channel = "10"
+
+        with db_handler.db_transaction() as db_cursor:
+            db_retention.apply_message_retention(db_cursor)
+
+        connection = db_handler.get_db_connection()
+        self.assertEqual(connection.execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+
+    def test_existing_database_keeps_its_vacuum_mode_without_retention(self) -> None:
+        with sqlite3.connect(config.db_file_path) as conn:
+            conn.execute("CREATE TABLE unrelated (value)")
+
+        with db_handler.db_transaction() as db_cursor:
+            db_retention.apply_message_retention(db_cursor)
+
+        connection = db_handler.get_db_connection()
+        self.assertEqual(connection.execute("PRAGMA auto_vacuum").fetchone()[0], 0)
+
+    def test_threads_opening_a_new_path_migrate_it_once(self) -> None:
+        migrations = []
+        barrier = threading.Barrier(4)
+
+        def migrate(db_connection):
+            migrations.append(db_connection)
+            time.sleep(0.05)
+
+        def open_connection():
+            barrier.wait()
+            db_handler.get_db_connection()
+
+        with mock.patch.object(db_handler, "migrate_schema", side_effect=migrate):
+            threads = [threading.Thread(target=open_connection) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(5)
+
+        self.assertEqual(len(migrations), 1)
+
+    def test_prune_keeps_newest_rows_per_channel(self) -> None:
+        self.insert_messages("Primary", range(1, 11))
+        self.insert_messages("Other", [1, 2])
+
+        with db_handler.db_transaction() as db_cursor:
+            pruned = db_retention.prune_messages(db_cursor, max_rows_per_channel=3)
+
+        self.assertEqual(pruned, 7)
+        self.assertEqual(self.fetch_texts("Primary"), ["at 8", "at 9", "at 10"])
+        self.assertEqual(self.fetch_texts("Other"), ["at 1", "at 2"])
+
+    def test_prune_removes_messages_older_than_max_age(self) -> None:
+        now = 1_700_000_000
+        self.insert_messages("Primary", [now - 3 * 86400, now - 86400 // 2, now])
+
+        with db_handler.db_transaction() as db_cursor:
+            pruned = db_retention.prune_messages(db_cursor, max_age_days=1, now=now)
+
+        self.assertEqual(pruned, 1)
+        self.assertEqual(self.fetch_texts("Primary"), [f"at {now - 86400 // 2}", f"at {now}"])
+
+    def test_prune_applies_whichever_limit_removes_more(self) -> None:
+        now = 1_700_000_000
+        self.insert_messages("Primary", [now - 5 * 86400, now - 4 * 86400, now - 3 * 86400, now - 60, now])
+        self.insert_messages("Other", [now - 60, now - 50, now - 40, now - 30])
+
+        with db_handler.db_transaction() as db_cursor:
+            pruned = db_retention.prune_messages(db_cursor, max_age_days=1, max_rows_per_channel=3, now=now)
+
+        self.assertEqual(pruned, 4)
+        self.assertEqual(self.fetch_texts("Primary"), [f"at {now - 60}", f"at {now}"])
+        self.assertEqual(self.fetch_texts("Other"), [f"at {now - 50}", f"at {now - 40}", f"at {now - 30}"])
+
+    def test_prune_queries_use_channel_index_ranges(self) -> None:
+        self.insert_messages("Primary", [1, 2, 3])
+        plans, statements = [], []
+        with db_handler.db_transaction() as db_cursor:
+            connection = db_cursor.connection
+            connection.set_trace_callback(statements.append)
+            db_retention.prune_messages(db_cursor, max_age_days=1, max_rows_per_channel=1, now=10 * 86400)
+            connection.set_trace_callback(None)
+            for statement in statements:
+                if statement.lstrip().startswith("SELECT") and "channel = " in statement:
+                    plans.extend(row[-1] for row in db_cursor.execute("EXPLAIN QUERY PLAN " + statement))
+
+        self.assertTrue(plans)
+        self.assertTrue(all("USING" in plan and "INDEX" in plan for plan in plans), plans)
+
+    def test_prune_archives_rows_before_deleting_them(self) -> None:
+        archive_file_path = os.path.join(self.tempdir.name, "archive.jsonl")
+        self.insert_messages("Primary", [1, 2, 3])
+
+        with db_handler.db_transaction() as db_cursor:
+            db_retention.prune_messages(db_cursor, max_rows_per_channel=1, archive_file_path=archive_file_path)
+
+        with open(archive_file_path, encoding="utf-8") as archive_file:
+            archived = [json.loads(line) for line in archive_file]
+        self.assertEqual([row["message_text"] for row in archived], ["at 1", "at 2"])
+        self.assertEqual(archived[0]["channel"], "Primary")
+        self.assertEqual(archived[0]["my_node"], 123)
+
+    def test_prune_is_bounded_per_pass_and_keeps_search_index_in_sync(self) -> None:
+        self.insert_messages("Primary", range(1, 21))
+
+        with db_handler.db_transaction() as db_cursor:
+            first = db_retention.prune_messages(db_cursor, max_rows_per_channel=5, limit=10)
+        with db_handler.db_transaction() as db_cursor:
+            second = db_retention.prune_messages(db_cursor, max_rows_per_channel=5, limit=10)
+
+        self.assertEqual((first, second), (10, 5))
+        self.assertEqual(len(self.fetch_texts("Primary")), 5)
+        self.assertEqual(db_handler.search_messages("at 3"), [])
+
+    def test_apply_message_retention_reads_config_and_reclaims_space(self) -> None:
+        config.retention_max_rows_per_channel = "1"
+        with db_handler.db_transaction() as db_cursor:
+            for index in range(200):
+                db_handler.write_message(db_cursor, "Primary", "456", "x" * 1000, index)
+
+        with db_handler.db_transaction() as db_cursor:
+            db_retention.apply_message_retention(db_cursor)
+            free_pages = db_cursor.execute("PRAGMA freelist_count").fetchone()[0]
+
+        self.assertEqual(self.fetch_texts("Primary"), ["x" * 1000])
+        self.assertEqual(free_pages, 0)
+
+    def test_invalid_retention_settings_disable_the_limit(self) -> None:
+        config.retention_max_age_days = "soon"
+        config.retention_max_rows_per_channel = "-4"
+
+        self.assertEqual(db_retention.retention_limits(), (0, 0, ""))
+
+    def test_writer_runs_maintenance_when_started(self) -> None:
+        config.retention_max_rows_per_channel = "2"
+        self.insert_messages("Primary", [1, 2, 3, 4])
+        writer = db_writer.DbWriter(batch_seconds=0.01, maintenance=db_retention.apply_message_retention)
+
+        writer.start()
+        try:
+            self.assertTrue(writer.flush(timeout=5))
+        finally:
+            writer.stop()
+
+        self.assertEqual(self.fetch_texts("Primary"), ["at 3", "at 4"])
+
+
+if __name__ == "__main__":
+    unittest.main()
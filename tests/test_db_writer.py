@@ -0,0 +1,108 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+import contact.ui.default_config as config
+from contact.utilities import db_handler, db_writer
+from contact.utilities.singleton import interface_state
+
+from tests.test_support import reset_singletons, restore_config, snapshot_config
+
+
+class DbWriterTests(unittest.TestCase):
+    def setUp(self) -> None:
+        reset_singletons()
+        self.saved_config = snapshot_config("db_file_path")
+        self.tempdir = tempfile.TemporaryDirectory()
+        config.db_file_path = os.path.join(self.tempdir.name, "client.db")
+        interface_state.myNodeNum = 123
+        self.writer = db_writer.DbWriter(batch_seconds=0.01)
+        self.writer_patch = mock.patch.object(db_writer, "db_writer", self.writer)
+        self.writer_patch.start()
+
+    def tearDown(self) -> None:
+        self.writer.stop()
+        self.writer_patch.stop()
+        db_handler.close_db_connections()
+        self.tempdir.cleanup()
+        restore_config(self.saved_config)
+        reset_singletons()
+
+    def fetch_messages(self, channel: str):
+        with sqlite3.connect(config.db_file_path) as conn:
+            return conn.execute(
+                "SELECT user_id, message_text, ack_type FROM messages WHERE channel = ? ORDER BY id", (channel,)
+            ).fetchall()
+
+    def test_writes_apply_synchronously_when_writer_is_not_running(self) -> None:
+        timestamp = db_writer.queue_message_save("Primary", "123", "hello")
+
+        self.assertIsInstance(timestamp, int)
+        self.assertEqual(self.fetch_messages("Primary"), [("123", "hello", None)])
+
+    def test_queued_writes_are_committed_in_order_on_flush(self) -> None:
+        self.writer.start()
+
+        db_writer.queue_message_save("Primary", "123", "hello", packet_id=5)
+        db_writer.queue_ack_nak_update(5, "Ack")
+        db_writer.queue_node_info_update(456, long_name="Remote Node", short_name="RM")
+
+        self.assertTrue(self.writer.flush(timeout=5))
+        self.assertEqual(self.fetch_messages("Primary"), [("123", "hello", "Ack")])
+        self.assertEqual(db_handler.get_name_from_database(456, "short"), "RM")
+
+    def test_stop_commits_pending_writes(self) -> None:
+        self.writer.start()
+        for index in range(50):
+            db_writer.queue_message_save("Primary", "123", f"message {index}")
+
+        self.writer.stop()
+
+        self.assertFalse(self.writer.running)
+        self.assertEqual(len(self.fetch_messages("Primary")), 50)
+
+    def test_failed_write_does_not_discard_rest_of_batch(self) -> None:
+        def broken_write(db_cursor) -> None:
+            raise sqlite3.OperationalError("boom")
+
+        def message_write(user_id: str, text: str):
+            return lambda db_cursor: db_handler.write_message(db_cursor, "Primary", user_id, text, timestamp=1)
+
+        with mock.patch.object(db_writer.logging, "error") as log_error:
+            self.writer._apply([message_write("1", "a"), broken_write, message_write("2", "b")])
+
+        log_error.assert_called_once()
+        self.assertEqual(self.fetch_messages("Primary"), [("1", "a", None), ("2", "b", None)])
+
+    def test_adjacent_ack_updates_are_applied_in_one_statement(self) -> None:
+        for packet_id in range(1, 4):
+            db_writer.queue_message_save("Primary", "123", f"message {packet_id}", packet_id=packet_id)
+        message_write = mock.Mock()
+
+        coalesced = db_writer._coalesce_ack_writes(
+            [db_writer.AckNakWrite(1, "Ack"), db_writer.AckNakWrite(2, "Nak"), message_write, db_writer.AckNakWrite(3, "Ack")]
+        )
+        self.writer._apply(coalesced)
+
+        self.assertEqual(len(coalesced), 3)
+        self.assertIs(coalesced[1], message_write)
+        self.assertEqual(
+            self.fetch_messages("Primary"),
+            [("123", "message 1", "Ack"), ("123", "message 2", "Nak"), ("123", "message 3", "Ack")],
+        )
+
+    def test_queue_nodeinfo_save_stores_packet_user(self) -> None:
+        packet = {
+            "from": 789,
+            "decoded": {"user": {"longName": "Packet Node", "shortName": "PK", "hwModel": "TBEAM"}},
+        }
+
+        db_writer.queue_nodeinfo_save(packet)
+
+        self.assertEqual(db_handler.get_name_from_database(789, "long"), "Packet Node")
+
+
+if __name__ == "__main__":
+    unittest.main()
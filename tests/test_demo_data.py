@@ -1,3 +1,4 @@
+import os
 import tempfile
 import unittest
 from unittest import mock
@@ -5,7 +6,13 @@ from unittest import mock
 import contact.__main__ as entrypoint
 import contact.ui.default_config as config
 from contact.utilities.db_handler import get_name_from_database
-from contact.utilities.demo_data import DEMO_CHANNELS, DEMO_LOCAL_NODE_NUM, build_demo_interface, configure_demo_database
+from contact.utilities.demo_data import (
+    DEMO_CHANNELS,
+    DEMO_DB_FILENAME,
+    DEMO_LOCAL_NODE_NUM,
+    build_demo_interface,
+    configure_demo_database,
+)
 from contact.utilities.singleton import interface_state, ui_state
 
 from tests.test_support import reset_singletons, restore_config, snapshot_config
@@ -27,6 +34,17 @@ class DemoDataTests(unittest.TestCase):
         self.assertEqual([channel.settings.name for channel in interface.getNode("^local").channels], DEMO_CHANNELS)
         self.assertIn(DEMO_LOCAL_NODE_NUM, interface.nodesByNum)
 
+    def test_configure_demo_database_removes_the_previous_database_and_its_wal(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = os.path.join(tmpdir, DEMO_DB_FILENAME)
+            for path in (db_path, db_path + "-wal", db_path + "-shm"):
+                with open(path, "w") as stale:
+                    stale.write("stale")
+
+            self.assertEqual(configure_demo_database(tmpdir), db_path)
+
+            self.assertEqual(os.listdir(tmpdir), [])
+
     def test_initialize_globals_seed_demo_populates_ui_state_and_db(self) -> None:
         interface_state.interface = build_demo_interface()
 
@@ -0,0 +1,35 @@
+import unittest
+
+from contact.ui import display_width
+
+
+class DisplayWidthTests(unittest.TestCase):
+    def test_text_width_counts_wide_characters_twice(self) -> None:
+        self.assertEqual(display_width.text_width("ping"), 4)
+        self.assertEqual(display_width.text_width("漢字 ok"), 7)
+        self.assertEqual(display_width.text_width("é…"), 2)
+
+    def test_slice_to_width_never_splits_a_wide_character(self) -> None:
+        self.assertEqual(display_width.slice_to_width("a漢字", 2), "a")
+        self.assertEqual(display_width.slice_to_width("a漢字", 3), "a漢")
+        self.assertEqual(display_width.slice_to_width("abc", 0), "")
+
+    def test_pad_to_width_fills_the_cell_left_by_a_wide_character(self) -> None:
+        self.assertEqual(display_width.pad_to_width("a漢字", 4), "a漢 ")
+        self.assertEqual(display_width.pad_to_width("ab", 4), "ab  ")
+
+    def test_truncate_with_ellipsis_pads_or_clips(self) -> None:
+        self.assertEqual(display_width.truncate_with_ellipsis("漢字", 6), "漢字  ")
+        self.assertEqual(display_width.truncate_with_ellipsis("漢字漢字", 6), "漢字… ")
+        self.assertEqual(display_width.truncate_with_ellipsis("abc", 1), "…")
+
+    def test_split_text_to_width_chunks(self) -> None:
+        self.assertEqual(display_width.split_text_to_width_chunks("abcdefg", 3), ["abc", "def", "g"])
+        self.assertEqual(display_width.split_text_to_width_chunks("漢字a漢", 3), ["漢", "字a", "漢"])
+        # A character wider than the chunk cannot be placed; the rest is dropped as before.
+        self.assertEqual(display_width.split_text_to_width_chunks("a漢b", 1), ["a"])
+        self.assertEqual(display_width.split_text_to_width_chunks("", 3), [""])
+
+
+if __name__ == "__main__":
+    unittest.main()
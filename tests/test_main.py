@@ -144,7 +144,7 @@ class MainRuntimeTests(unittest.TestCase):
         self.assertEqual(interface_state.myNodeNum, 123)
         get_channels.assert_called_once_with()
         get_node_list.assert_called_once_with()
-        subscribe.assert_called_once_with(entrypoint.on_receive, "meshtastic.receive")
+        subscribe.assert_called_once_with(entrypoint.queue_packet, "meshtastic.receive")
         init_nodedb.assert_called_once_with()
         seed_demo_messages.assert_called_once_with()
         load_messages.assert_called_once_with()
@@ -181,10 +181,14 @@ class MainRuntimeTests(unittest.TestCase):
 
         with mock.patch.object(entrypoint.sys, "argv", ["contact"]):
             with mock.patch.object(entrypoint.curses, "wrapper") as wrapper:
-                entrypoint.start()
+                with mock.patch.object(entrypoint.db_writer, "stop") as stop_writer:
+                    with mock.patch.object(entrypoint.packet_worker, "stop") as stop_worker:
+                        entrypoint.start()
 
         wrapper.assert_called_once_with(entrypoint.main)
         interface.close.assert_called_once_with()
+        stop_worker.assert_called_once_with()
+        stop_writer.assert_called_once_with()
 
     def test_start_does_not_crash_when_wrapper_returns_without_interface(self) -> None:
         interface_state.interface = None
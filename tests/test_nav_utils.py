@@ -15,6 +15,10 @@ class NavUtilsTests(unittest.TestCase):
     def test_wrap_text_splits_wide_characters_by_display_width(self) -> None:
         self.assertEqual(wrap_text("🔐🔐🔐", 4), ["🔐", "🔐", "🔐"])
 
+    def test_text_width_counts_ascii_and_wide_characters(self) -> None:
+        self.assertEqual(nav_utils.text_width("abc\t"), 4)
+        self.assertEqual(nav_utils.text_width("a🔐b"), 4)
+
     def test_truncate_with_ellipsis_respects_display_width(self) -> None:
         self.assertEqual(truncate_with_ellipsis("🔐Alpha", 5), "🔐Al…")
 
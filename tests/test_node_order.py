@@ -0,0 +1,103 @@
+import random
+import unittest
+
+from contact.utilities.node_order import NodeOrder
+
+
+def full_sort(nodes, my_node_num, node_sort):
+    """The three stable sorts the node list was built with before NodeOrder."""
+
+    def node_sort_key(node):
+        if node_sort == "lastHeard":
+            return -node["lastHeard"] if isinstance(node.get("lastHeard"), int) else 0
+        if node_sort == "name":
+            return node["user"]["longName"]
+        return node.get("hopsAway", 100)
+
+    sorted_nodes = sorted(nodes, key=node_sort_key)
+    sorted_nodes = sorted(sorted_nodes, key=lambda node: node.get("isFavorite", False), reverse=True)
+    sorted_nodes = sorted(sorted_nodes, key=lambda node: node.get("isIgnored", False))
+    return [my_node_num] + [node["num"] for node in sorted_nodes if node["num"] != my_node_num]
+
+
+def random_node(rng, num):
+    node = {"num": num, "user": {"longName": rng.choice(["Alpha", "Bravo", "Charlie"])}}
+    if rng.random() < 0.9:
+        node["lastHeard"] = rng.randrange(1000)
+    if rng.random() < 0.8:
+        node["hopsAway"] = rng.randrange(5)
+    node["isFavorite"] = rng.random() < 0.1
+    node["isIgnored"] = rng.random() < 0.1
+    return node
+
+
+class NodeOrderTests(unittest.TestCase):
+    def test_rebuild_puts_local_node_first_then_favorites_and_ignored_last(self) -> None:
+        nodes = [
+            {"num": 1, "lastHeard": 10},
+            {"num": 2, "lastHeard": 50, "isIgnored": True},
+            {"num": 3, "lastHeard": 20, "isFavorite": True},
+            {"num": 4, "lastHeard": 30},
+        ]
+        order = NodeOrder()
+
+        order.rebuild(nodes, 1, "lastHeard")
+
+        self.assertEqual(order.node_nums, [1, 3, 4, 2])
+
+    def test_update_moves_only_the_changed_node(self) -> None:
+        nodes = {num: {"num": num, "lastHeard": num} for num in range(1, 6)}
+        order = NodeOrder()
+        order.rebuild(nodes.values(), 1, "lastHeard")
+
+        nodes[2]["lastHeard"] = 100
+        self.assertTrue(order.update(2, nodes[2]))
+        self.assertEqual(order.node_nums, [1, 2, 5, 4, 3])
+        self.assertFalse(order.update(2, nodes[2]))
+
+    def test_update_reports_no_change_when_a_node_keeps_its_place(self) -> None:
+        nodes = {num: {"num": num, "lastHeard": num * 10} for num in range(1, 4)}
+        order = NodeOrder()
+        order.rebuild(nodes.values(), 1, "lastHeard")
+
+        nodes[3]["lastHeard"] = 35
+
+        self.assertFalse(order.update(3, nodes[3]))
+        self.assertEqual(order.node_nums, [1, 3, 2])
+
+    def test_remove_drops_the_node_in_place(self) -> None:
+        nodes = {num: {"num": num, "lastHeard": num} for num in range(1, 5)}
+        order = NodeOrder()
+        order.rebuild(nodes.values(), 1, "lastHeard")
+        shared = order.node_nums
+
+        order.remove(3)
+        order.remove(99)
+
+        self.assertIs(order.node_nums, shared)
+        self.assertEqual(shared, [1, 4, 2])
+        nodes[2]["lastHeard"] = 100
+        self.assertTrue(order.update(2, nodes[2]))
+        self.assertEqual(shared, [1, 2, 4])
+
+    def test_updates_match_a_full_sort(self) -> None:
+        for node_sort in ("lastHeard", "name", "hops"):
+            rng = random.Random(node_sort)
+            nodes = {num: random_node(rng, num) for num in range(60)}
+            order = NodeOrder()
+            order.rebuild(list(nodes.values())[:40], 0, node_sort)
+            first_seen = list(range(40))
+
+            for _ in range(300):
+                num = rng.randrange(60)
+                nodes[num] = random_node(rng, num)
+                order.update(num, nodes[num])
+                if num not in first_seen:
+                    first_seen.append(num)
+
+            with self.subTest(node_sort=node_sort):
+                self.assertEqual(order.node_nums, full_sort([nodes[num] for num in first_seen], 0, node_sort))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+from unittest import mock
+
+from contact.message_handlers import rx_handler
+from contact.message_handlers.packet_dedup import PacketDeduplicator
+from contact.utilities.singleton import interface_state
+
+from tests.test_support import reset_singletons
+
+
+class PacketDeduplicatorTests(unittest.TestCase):
+    def test_repeated_packet_is_dropped_and_counted(self) -> None:
+        dedup = PacketDeduplicator()
+        packet = {"from": 222, "id": 7}
+
+        self.assertTrue(dedup.is_new(packet, now=0))
+        self.assertFalse(dedup.is_new(dict(packet), now=1))
+        self.assertTrue(dedup.is_new({"from": 333, "id": 7}, now=2))
+
+        self.assertEqual((dedup.hits, dedup.misses), (1, 2))
+        self.assertEqual(dedup.reception(222, 7).copies, 2)
+
+    def test_repeats_record_best_hops_and_snr(self) -> None:
+        dedup = PacketDeduplicator()
+
+        dedup.is_new({"from": 222, "id": 7, "hopStart": 3, "hopLimit": 0, "rxSnr": 2.5}, now=0)
+        dedup.is_new({"from": 222, "id": 7, "hopStart": 3, "hopLimit": 2, "rxSnr": -4.0}, now=1)
+        dedup.is_new({"from": 222, "id": 7, "rxSnr": 6.0}, now=2)
+
+        seen = dedup.reception(222, 7)
+        self.assertEqual((seen.best_hops, seen.best_snr, seen.copies), (1, 6.0, 3))
+
+    def test_observe_reports_copies_over_a_better_path(self) -> None:
+        dedup = PacketDeduplicator()
+
+        first = dedup.observe({"from": 222, "id": 7, "hopStart": 3, "hopLimit": 0, "rxSnr": 2.5}, now=0)
+        worse = dedup.observe({"from": 222, "id": 7, "hopStart": 3, "hopLimit": 0, "rxSnr": 1.0}, now=1)
+        better = dedup.observe({"from": 222, "id": 7, "hopStart": 3, "hopLimit": 2, "rxSnr": 1.0}, now=2)
+
+        self.assertEqual((first.is_new, worse.is_new, worse.improved), (True, False, False))
+        self.assertEqual(better, (False, True, 1, 2.5))
+
+    def test_entries_expire_after_ttl(self) -> None:
+        dedup = PacketDeduplicator(ttl_seconds=10)
+
+        self.assertTrue(dedup.is_new({"from": 222, "id": 7}, now=0))
+        self.assertTrue(dedup.is_new({"from": 222, "id": 7}, now=10))
+        self.assertFalse(dedup.is_new({"from": 222, "id": 7}, now=15))
+
+    def test_least_recently_seen_entry_is_evicted_when_full(self) -> None:
+        dedup = PacketDeduplicator(max_entries=2)
+
+        dedup.is_new({"from": 1, "id": 1}, now=0)
+        dedup.is_new({"from": 2, "id": 2}, now=1)
+        dedup.is_new({"from": 1, "id": 1}, now=2)
+        dedup.is_new({"from": 3, "id": 3}, now=3)
+
+        self.assertIsNotNone(dedup.reception(1, 1))
+        self.assertIsNone(dedup.reception(2, 2))
+        self.assertTrue(dedup.is_new({"from": 2, "id": 2}, now=4))
+
+    def test_packets_without_id_are_never_treated_as_repeats(self) -> None:
+        dedup = PacketDeduplicator()
+
+        self.assertTrue(dedup.is_new({"from": 222}, now=0))
+        self.assertTrue(dedup.is_new({"from": 222}, now=1))
+        self.assertEqual((dedup.hits, dedup.misses), (0, 0))
+
+    def test_queue_packet_drops_repeats_before_handling(self) -> None:
+        packet = {"from": 222, "id": 7, "decoded": {"portnum": "TEXT_MESSAGE_APP", "payload": b"hi"}}
+
+        with mock.patch.object(rx_handler, "packet_deduplicator", PacketDeduplicator()):
+            with mock.patch.object(rx_handler.packet_worker, "submit") as submit:
+                rx_handler.queue_packet(packet, interface=None)
+                rx_handler.queue_packet(dict(packet), interface=None)
+
+        submit.assert_called_once_with(packet, None)
+
+    def test_better_copy_updates_the_senders_node_entry(self) -> None:
+        reset_singletons()
+        self.addCleanup(reset_singletons)
+        node = {"num": 222, "hopsAway": 3, "snr": -10.0}
+        interface_state.interface = mock.Mock(nodesByNum={222: node})
+        packet = {"from": 222, "id": 7, "hopStart": 3, "hopLimit": 0, "rxSnr": -10.0}
+
+        with mock.patch.object(rx_handler, "packet_deduplicator", PacketDeduplicator()):
+            with mock.patch.object(rx_handler.packet_worker, "submit"):
+                with mock.patch.object(rx_handler, "refresh_node_list", return_value=True) as refresh_node_list:
+                    with mock.patch.object(rx_handler, "request_ui_redraw") as request_ui_redraw:
+                        rx_handler.queue_packet(packet, interface=None)
+                        rx_handler.queue_packet(dict(packet, hopLimit=2, rxSnr=4.5), interface=None)
+
+        self.assertEqual((node["hopsAway"], node["snr"]), (1, 4.5))
+        refresh_node_list.assert_called_once_with(222)
+        request_ui_redraw.assert_called_once_with(nodes=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
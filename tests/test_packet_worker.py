@@ -0,0 +1,122 @@
+import threading
+import unittest
+from unittest import mock
+
+from contact.message_handlers import rx_handler
+from contact.message_handlers.packet_worker import PacketWorker
+from contact.utilities.singleton import app_state, interface_state, ui_state
+
+from tests.test_support import reset_singletons
+
+
+class PacketWorkerTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.handled = []
+        self.worker = PacketWorker(lambda packet, interface: self.handled.append((packet, interface)))
+
+    def tearDown(self) -> None:
+        self.worker.stop()
+
+    def test_packets_are_handled_synchronously_when_worker_is_not_running(self) -> None:
+        self.worker.submit({"id": 1}, "iface")
+
+        self.assertEqual(self.handled, [({"id": 1}, "iface")])
+
+    def test_submit_returns_without_waiting_for_the_handler(self) -> None:
+        release = threading.Event()
+        worker = PacketWorker(lambda packet, interface: release.wait(5))
+        worker.start()
+        try:
+            worker.submit({"id": 1}, None)
+            self.assertFalse(release.is_set())
+        finally:
+            release.set()
+            worker.stop()
+
+    def test_queued_packets_are_handled_in_order_on_flush(self) -> None:
+        self.worker.start()
+
+        for packet_id in range(20):
+            self.worker.submit({"id": packet_id}, None)
+
+        self.assertTrue(self.worker.flush(timeout=5))
+        self.assertEqual([packet["id"] for packet, _interface in self.handled], list(range(20)))
+
+    def test_handler_errors_do_not_stop_the_worker(self) -> None:
+        def handler(packet, interface):
+            if packet["id"] == 0:
+                raise ValueError("bad packet")
+            self.handled.append(packet)
+
+        worker = PacketWorker(handler)
+        worker.start()
+        try:
+            with self.assertLogs(level="ERROR"):
+                worker.submit({"id": 0}, None)
+                worker.submit({"id": 1}, None)
+                self.assertTrue(worker.flush(timeout=5))
+        finally:
+            worker.stop()
+
+        self.assertEqual(self.handled, [{"id": 1}])
+
+    def test_tasks_run_in_order_with_packets(self) -> None:
+        self.worker.start()
+
+        self.worker.submit({"id": 1}, None)
+        self.worker.run_later(lambda: self.handled.append("task"))
+        self.worker.submit({"id": 2}, None)
+
+        self.assertTrue(self.worker.flush(timeout=5))
+        self.assertEqual(self.handled, [({"id": 1}, None), "task", ({"id": 2}, None)])
+
+    def test_stop_handles_packets_already_queued(self) -> None:
+        self.worker.start()
+        for packet_id in range(5):
+            self.worker.submit({"id": packet_id}, None)
+
+        self.worker.stop()
+
+        self.assertFalse(self.worker.running)
+        self.assertEqual(len(self.handled), 5)
+
+
+class ReceiveLockTests(unittest.TestCase):
+    def setUp(self) -> None:
+        reset_singletons()
+
+    def tearDown(self) -> None:
+        reset_singletons()
+
+    def test_text_message_is_decoded_and_saved_outside_the_ui_lock(self) -> None:
+        interface_state.myNodeNum = 111
+        ui_state.channel_list = ["Primary"]
+        ui_state.all_messages = {"Primary": []}
+        packet = {
+            "from": 222,
+            "to": 999,
+            "id": 7,
+            "decoded": {"portnum": "TEXT_MESSAGE_APP", "payload": b"hello"},
+        }
+        lock_held = {}
+
+        def record(name):
+            def side_effect(*args, **kwargs):
+                lock_held[name] = app_state.lock.locked()
+                return "NODE"
+
+            return side_effect
+
+        with mock.patch.object(rx_handler, "refresh_node_list", return_value=False):
+            with mock.patch.object(rx_handler, "request_ui_redraw"):
+                with mock.patch.object(rx_handler, "get_name_from_database", side_effect=record("name")):
+                    with mock.patch.object(rx_handler, "queue_message_save", side_effect=record("save")):
+                        with mock.patch.object(rx_handler, "bot_respond"):
+                            rx_handler.on_receive(packet, interface=None)
+
+        self.assertEqual(lock_held, {"name": False, "save": False})
+        self.assertEqual(ui_state.all_messages["Primary"][-1][1], "hello")
+
+
+if __name__ == "__main__":
+    unittest.main()
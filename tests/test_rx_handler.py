@@ -3,7 +3,9 @@ from unittest import mock
 
 import contact.ui.default_config as config
 from contact.message_handlers import rx_handler
+from contact.message_handlers.packet_processors import PacketProcessor, packet_processors
 from contact.utilities.singleton import interface_state, menu_state, ui_state
+from contact.utilities.utils import set_message_packet_ids
 
 from tests.test_support import reset_singletons, restore_config, snapshot_config
 
@@ -11,7 +13,7 @@ from tests.test_support import reset_singletons, restore_config, snapshot_config
 class RxHandlerTests(unittest.TestCase):
     def setUp(self) -> None:
         reset_singletons()
-        self.saved_config = snapshot_config("notification_sound", "message_prefix")
+        self.saved_config = snapshot_config("notification_sound", "message_prefix", "packet_log_depth")
         config.notification_sound = "False"
 
     def tearDown(self) -> None:
@@ -36,7 +38,7 @@ class RxHandlerTests(unittest.TestCase):
         with mock.patch.object(rx_handler, "refresh_node_list", return_value=True):
             with mock.patch.object(rx_handler, "request_ui_redraw") as request_ui_redraw:
                 with mock.patch.object(rx_handler, "add_notification") as add_notification:
-                    with mock.patch.object(rx_handler, "save_message_to_db") as save_message_to_db:
+                    with mock.patch.object(rx_handler, "queue_message_save") as queue_message_save:
                         with mock.patch.object(rx_handler, "get_name_from_database", return_value="SAT2"):
                             rx_handler.on_receive(packet, interface=None)
 
@@ -52,7 +54,14 @@ class RxHandlerTests(unittest.TestCase):
             ],
         )
         add_notification.assert_not_called()
-        save_message_to_db.assert_called_once_with("Primary", 222, "hello", packet_id=None, reply_id=None)
+        queue_message_save.assert_called_once_with(
+            "Primary", 222, "hello", packet_id=None, reply_id=None, timestamp=mock.ANY
+        )
+        # Search results find the message by the values it is saved with.
+        timestamp = queue_message_save.call_args.kwargs["timestamp"]
+        self.assertIs(
+            ui_state.live_messages["Primary"][(timestamp, "222", "hello")], ui_state.all_messages["Primary"][-1]
+        )
         self.assertEqual(ui_state.all_messages["Primary"][-1][1], "hello")
         self.assertIn("SAT2:", ui_state.all_messages["Primary"][-1][0])
         self.assertIn("[2]", ui_state.all_messages["Primary"][-1][0])
@@ -74,7 +83,7 @@ class RxHandlerTests(unittest.TestCase):
 
         with mock.patch.object(rx_handler, "refresh_node_list", return_value=False):
             with mock.patch.object(rx_handler, "request_ui_redraw") as request_ui_redraw:
-                with mock.patch.object(rx_handler, "save_message_to_db"):
+                with mock.patch.object(rx_handler, "queue_message_save"):
                     with mock.patch.object(rx_handler, "get_name_from_database", return_value="SAT2"):
                         rx_handler.on_receive(packet, interface=None)
 
@@ -101,8 +110,8 @@ class RxHandlerTests(unittest.TestCase):
         with mock.patch.object(rx_handler, "refresh_node_list", return_value=False):
             with mock.patch.object(rx_handler, "request_ui_redraw") as request_ui_redraw:
                 with mock.patch.object(rx_handler, "add_notification") as add_notification:
-                    with mock.patch.object(rx_handler, "update_node_info_in_db") as update_node_info_in_db:
-                        with mock.patch.object(rx_handler, "save_message_to_db") as save_message_to_db:
+                    with mock.patch.object(rx_handler, "queue_node_info_update") as queue_node_info_update:
+                        with mock.patch.object(rx_handler, "queue_message_save") as queue_message_save:
                             with mock.patch.object(rx_handler, "get_name_from_database", return_value="SAT2"):
                                 rx_handler.on_receive(packet, interface=None)
 
@@ -110,14 +119,14 @@ class RxHandlerTests(unittest.TestCase):
         self.assertIn(222, ui_state.all_messages)
         request_ui_redraw.assert_called_once_with(channels=True)
         add_notification.assert_called_once_with(1)
-        update_node_info_in_db.assert_called_once_with(222, chat_archived=False)
-        save_message_to_db.assert_called_once_with(222, 222, "dm", packet_id=None, reply_id=None)
+        queue_node_info_update.assert_called_once_with(222, chat_archived=False)
+        queue_message_save.assert_called_once_with(222, 222, "dm", packet_id=None, reply_id=None, timestamp=mock.ANY)
 
     def test_on_receive_displays_context_for_native_reply_id(self) -> None:
         interface_state.myNodeNum = 111
         ui_state.channel_list = ["Primary"]
         ui_state.all_messages = {"Primary": [("[06:00:00] >> SAT2: ", "hello world")]}
-        ui_state.message_packet_ids = {"Primary": [900]}
+        set_message_packet_ids("Primary", [900])
         ui_state.selected_channel = 0
         packet = {
             "id": 901,
@@ -131,13 +140,13 @@ class RxHandlerTests(unittest.TestCase):
 
         with mock.patch.object(rx_handler, "refresh_node_list", return_value=False):
             with mock.patch.object(rx_handler, "request_ui_redraw"):
-                with mock.patch.object(rx_handler, "save_message_to_db") as save_message_to_db:
+                with mock.patch.object(rx_handler, "queue_message_save") as queue_message_save:
                     with mock.patch.object(rx_handler, "get_name_from_database", return_value="NODE"):
                         rx_handler.on_receive(packet, interface=None)
 
         self.assertEqual(ui_state.all_messages["Primary"][-1][1], "<Re: SAT2: hello> hi")
         self.assertEqual(ui_state.message_packet_ids["Primary"][-1], 901)
-        save_message_to_db.assert_called_once_with("Primary", 222, "hi", packet_id=901, reply_id=900)
+        queue_message_save.assert_called_once_with("Primary", 222, "hi", packet_id=901, reply_id=900, timestamp=mock.ANY)
 
     def test_on_receive_trims_packet_buffer_even_when_packet_is_undecoded(self) -> None:
         ui_state.packet_buffer = list(range(25))
@@ -149,5 +158,52 @@ class RxHandlerTests(unittest.TestCase):
 
         request_ui_redraw.assert_called_once_with(packetlog=True)
         self.assertEqual(len(ui_state.packet_buffer), 20)
-        self.assertEqual(ui_state.packet_buffer[-1], {"id": "new"})
+        self.assertEqual(ui_state.packet_buffer[-1].packet, {"id": "new"})
+        self.assertEqual(ui_state.packet_buffer[-1].row.split(), ["UNKNOWN", "UNKNOWN", "NO", "KEY", "NO", "KEY"])
         self.assertTrue(menu_state.need_redraw)
+
+    def test_registered_processor_runs_its_phases_around_the_ui_lock(self) -> None:
+        calls = []
+
+        def phase(name):
+            def record(*args):
+                calls.append((name, args, rx_handler.app_state.lock.locked()))
+                return name
+
+            return record
+
+        processor = PacketProcessor(
+            decode=phase("decode"), apply=phase("apply"), complete=phase("complete"), needs_db=True, needs_ui=True
+        )
+        packet = {"from": 222, "decoded": {"portnum": "RANGE_TEST_APP"}}
+
+        with mock.patch.dict(packet_processors, {"RANGE_TEST_APP": processor}):
+            with mock.patch.object(rx_handler, "refresh_node_list", return_value=False):
+                rx_handler.on_receive(packet, interface=None)
+
+        self.assertEqual(
+            calls,
+            [
+                ("decode", (packet,), False),
+                ("apply", ("decode",), True),
+                ("complete", (packet, "decode", "apply"), False),
+            ],
+        )
+
+    def test_processor_must_declare_phases_for_the_access_it_needs(self) -> None:
+        with self.assertRaises(ValueError):
+            PacketProcessor(decode=dict, needs_ui=True)
+        with self.assertRaises(ValueError):
+            PacketProcessor(decode=dict, apply=dict, needs_ui=True, needs_bot=True)
+
+    def test_packet_log_depth_follows_config(self) -> None:
+        config.packet_log_depth = "3"
+
+        with mock.patch.object(rx_handler, "request_ui_redraw"):
+            for packet_id in range(5):
+                rx_handler.on_receive({"id": packet_id}, interface=None)
+
+        self.assertEqual([entry.packet["id"] for entry in ui_state.packet_buffer], [2, 3, 4])
+        self.assertEqual(ui_state.packet_buffer.maxlen, 3)
+        # The log is hidden, so rows are left for the first draw to format.
+        self.assertTrue(all(entry.row is None for entry in ui_state.packet_buffer))
@@ -7,6 +7,7 @@ from meshtastic import BROADCAST_NUM
 import contact.ui.default_config as config
 from contact.message_handlers import tx_handler
 from contact.utilities.singleton import interface_state, ui_state
+from contact.utilities.utils import set_message_packet_ids
 
 from tests.test_support import reset_singletons, restore_config, snapshot_config
 
@@ -30,7 +31,7 @@ class TxHandlerTests(unittest.TestCase):
         ui_state.channel_list = ["Primary"]
         ui_state.all_messages = {"Primary": []}
 
-        with mock.patch.object(tx_handler, "save_message_to_db", return_value=999) as save_message_to_db:
+        with mock.patch.object(tx_handler, "queue_message_save", return_value=999) as queue_message_save:
             with mock.patch("contact.message_handlers.tx_handler.time.strftime", return_value="[00:00:00] "):
                 tx_handler.send_message("hello", channel=0)
 
@@ -42,12 +43,41 @@ class TxHandlerTests(unittest.TestCase):
             onResponse=tx_handler.onAckNak,
             channelIndex=0,
         )
-        save_message_to_db.assert_called_once_with("Primary", 111, "hello", packet_id="req-1", reply_id=None)
+        queue_message_save.assert_called_once_with(
+            "Primary", 111, "hello", packet_id="req-1", reply_id=None, timestamp=mock.ANY
+        )
         self.assertEqual(tx_handler.ack_naks["req-1"]["channel"], "Primary")
         self.assertEqual(tx_handler.ack_naks["req-1"]["messageIndex"], 1)
-        self.assertEqual(tx_handler.ack_naks["req-1"]["timestamp"], 999)
         self.assertEqual(ui_state.all_messages["Primary"][-1][1], "hello")
 
+    def test_send_message_while_scrolled_back_reloads_the_newest_messages_first(self) -> None:
+        interface = mock.Mock()
+        interface.sendText.return_value = SimpleNamespace(id="req-4")
+        interface_state.interface = interface
+        interface_state.myNodeNum = 111
+        ui_state.channel_list = ["Primary"]
+        ui_state.all_messages = {"Primary": [("-- 2026-01-01 10:00 --", ""), ("[10:00:00] >> old: ", "old message")]}
+        ui_state.has_newer_messages = {"Primary": True}
+        newest = [("-- 2026-01-01 11:00 --", ""), ("[11:00:00] >> new: ", "newer"), ("[11:01:00] >> new: ", "newest")]
+
+        def load_newest(channel):
+            ui_state.all_messages[channel] = list(newest)
+            ui_state.has_newer_messages[channel] = False
+            return True
+
+        with mock.patch.object(tx_handler, "queue_message_save"):
+            with mock.patch.object(tx_handler.db_writer, "flush") as flush:
+                with mock.patch.object(
+                    tx_handler, "load_newest_messages", side_effect=load_newest
+                ) as load_newest_messages:
+                    tx_handler.send_message("hi there", channel=0)
+
+        flush.assert_called_once_with(timeout=1.0)
+        load_newest_messages.assert_called_once_with("Primary")
+        messages = ui_state.all_messages["Primary"]
+        self.assertEqual(messages[-1][1], "hi there")
+        self.assertEqual(messages[tx_handler.ack_naks["req-4"]["messageIndex"]][1], "hi there")
+
     def test_send_message_to_direct_node_uses_node_as_destination(self) -> None:
         interface = mock.Mock()
         interface.sendText.return_value = SimpleNamespace(id="req-2")
@@ -56,7 +86,7 @@ class TxHandlerTests(unittest.TestCase):
         ui_state.channel_list = [222]
         ui_state.all_messages = {222: []}
 
-        with mock.patch.object(tx_handler, "save_message_to_db", return_value=123):
+        with mock.patch.object(tx_handler, "queue_message_save", return_value=123):
             with mock.patch("contact.message_handlers.tx_handler.time.strftime", return_value="[00:00:00] "):
                 tx_handler.send_message("dm", channel=0)
 
@@ -78,7 +108,7 @@ class TxHandlerTests(unittest.TestCase):
         ui_state.channel_list = ["Primary"]
         ui_state.all_messages = {"Primary": []}
 
-        with mock.patch.object(tx_handler, "save_message_to_db", return_value=123):
+        with mock.patch.object(tx_handler, "queue_message_save", return_value=123):
             tx_handler.send_message("hello", channel=0, reply_id=77, reply_context="<Re: NODE: hello> ")
 
         self.assertEqual(interface.sendText.call_args.kwargs["text"], "hello")
@@ -90,33 +120,67 @@ class TxHandlerTests(unittest.TestCase):
         ui_state.channel_list = ["Primary"]
         ui_state.selected_channel = 0
         ui_state.all_messages = {"Primary": [("pending", "hello")]}
-        tx_handler.ack_naks["req"] = {"channel": "Primary", "messageIndex": 0, "timestamp": 55, "dbMessage": "hello"}
+        tx_handler.ack_naks["req"] = {"channel": "Primary", "messageIndex": 0}
 
         packet = {"from": 222, "decoded": {"requestId": "req", "routing": {"errorReason": "NONE"}}}
 
-        with mock.patch.object(tx_handler, "update_ack_nak") as update_ack_nak:
+        with mock.patch.object(tx_handler, "queue_ack_nak_update") as queue_ack_nak_update:
             with mock.patch("contact.message_handlers.tx_handler.time.strftime", return_value="[01:02:03] "):
                 with mock.patch("contact.ui.contact_ui.request_ui_redraw") as request_ui_redraw:
                     tx_handler.onAckNak(packet)
 
-        update_ack_nak.assert_called_once_with("Primary", 55, "hello", "Ack")
+        queue_ack_nak_update.assert_called_once_with("req", "Ack")
         request_ui_redraw.assert_called_once_with(messages=True)
         self.assertIn(config.sent_message_prefix, ui_state.all_messages["Primary"][0][0])
         self.assertIn(config.ack_str, ui_state.all_messages["Primary"][0][0])
 
+    def test_on_ack_nak_finds_message_shifted_by_loaded_history(self) -> None:
+        interface_state.myNodeNum = 111
+        ui_state.channel_list = ["Primary"]
+        ui_state.selected_channel = 0
+        ui_state.all_messages = {"Primary": [("older", "page"), ("pending", "hello")]}
+        set_message_packet_ids("Primary", [None, "req"])
+        tx_handler.ack_naks["req"] = {"channel": "Primary", "messageIndex": 0}
+
+        packet = {"from": 222, "decoded": {"requestId": "req", "routing": {"errorReason": "NONE"}}}
+
+        with mock.patch.object(tx_handler, "queue_ack_nak_update") as queue_ack_nak_update:
+            with mock.patch("contact.ui.contact_ui.request_ui_redraw"):
+                tx_handler.onAckNak(packet)
+
+        queue_ack_nak_update.assert_called_once_with("req", "Ack")
+        self.assertEqual(ui_state.all_messages["Primary"][0], ("older", "page"))
+        self.assertIn(config.ack_str, ui_state.all_messages["Primary"][1][0])
+
+    def test_on_ack_nak_for_evicted_message_only_updates_database(self) -> None:
+        ui_state.channel_list = ["Primary"]
+        ui_state.all_messages = {"Primary": [("older", "page")]}
+        ui_state.message_packet_ids = {"Primary": [None]}
+        tx_handler.ack_naks["req"] = {"channel": "Primary", "messageIndex": 3}
+
+        packet = {"from": 222, "decoded": {"requestId": "req", "routing": {"errorReason": "NONE"}}}
+
+        with mock.patch.object(tx_handler, "queue_ack_nak_update") as queue_ack_nak_update:
+            with mock.patch("contact.ui.contact_ui.request_ui_redraw") as request_ui_redraw:
+                tx_handler.onAckNak(packet)
+
+        queue_ack_nak_update.assert_called_once_with("req", "Ack")
+        request_ui_redraw.assert_not_called()
+        self.assertEqual(ui_state.all_messages["Primary"], [("older", "page")])
+
     def test_on_ack_nak_uses_implicit_marker_for_self_ack(self) -> None:
         interface_state.myNodeNum = 111
         ui_state.channel_list = ["Primary"]
         ui_state.selected_channel = 0
         ui_state.all_messages = {"Primary": [("pending", "hello")]}
-        tx_handler.ack_naks["req"] = {"channel": "Primary", "messageIndex": 0, "timestamp": 55, "dbMessage": "hello"}
+        tx_handler.ack_naks["req"] = {"channel": "Primary", "messageIndex": 0}
 
         packet = {"from": 111, "decoded": {"requestId": "req", "routing": {"errorReason": "NONE"}}}
 
-        with mock.patch.object(tx_handler, "update_ack_nak") as update_ack_nak:
+        with mock.patch.object(tx_handler, "queue_ack_nak_update") as queue_ack_nak_update:
             with mock.patch("contact.message_handlers.tx_handler.time.strftime", return_value="[01:02:03] "):
                 with mock.patch("contact.ui.contact_ui.request_ui_redraw"):
                     tx_handler.onAckNak(packet)
 
-        update_ack_nak.assert_called_once_with("Primary", 55, "hello", "Implicit")
+        queue_ack_nak_update.assert_called_once_with("req", "Implicit")
         self.assertIn(config.ack_implicit_str, ui_state.all_messages["Primary"][0][0])
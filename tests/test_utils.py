@@ -1,7 +1,7 @@
 import unittest
 from unittest import mock
 
-from meshtastic.protobuf import config_pb2
+from meshtastic.protobuf import config_pb2, mesh_pb2
 
 import contact.ui.default_config as config
 from contact.utilities.demo_data import DEMO_LOCAL_NODE_NUM, build_demo_interface
@@ -12,7 +12,10 @@ from contact.utilities.utils import (
     add_new_message,
     get_channels,
     get_node_list,
+    get_reply_context,
     parse_protobuf,
+    refresh_node_list,
+    remove_from_node_list,
 )
 
 from tests.test_support import reset_singletons, restore_config, snapshot_config
@@ -39,6 +42,57 @@ class UtilsTests(unittest.TestCase):
         self.assertEqual(node_list[0], DEMO_LOCAL_NODE_NUM)
         self.assertEqual(node_list[-1], 0xA1000008)
 
+    def test_refresh_node_list_moves_the_sender_without_reordering_everything(self) -> None:
+        config.node_sort = "lastHeard"
+        interface = build_demo_interface()
+        interface_state.interface = interface
+        interface_state.myNodeNum = DEMO_LOCAL_NODE_NUM
+        refresh_node_list()
+        node_list = ui_state.node_list
+        sender = node_list[-2]
+        interface.nodesByNum[sender]["lastHeard"] = 2**31
+
+        with mock.patch("contact.utilities.utils.get_node_list") as get_node_list_mock:
+            self.assertTrue(refresh_node_list(sender))
+
+        get_node_list_mock.assert_not_called()
+        # The sender was moved within the shared list rather than into a copy.
+        self.assertIs(ui_state.node_list, node_list)
+        self.assertEqual(ui_state.node_list, get_node_list())
+
+    def test_remove_from_node_list_keeps_the_shared_order_in_step(self) -> None:
+        config.node_sort = "lastHeard"
+        interface = build_demo_interface()
+        interface_state.interface = interface
+        interface_state.myNodeNum = DEMO_LOCAL_NODE_NUM
+        refresh_node_list()
+        removed = ui_state.node_list[3]
+        del interface.nodesByNum[removed]
+
+        remove_from_node_list(removed)
+        interface.nodesByNum[ui_state.node_list[-2]]["lastHeard"] = 2**31
+        refresh_node_list(ui_state.node_list[-2])
+
+        self.assertNotIn(removed, ui_state.node_list)
+        self.assertEqual(ui_state.node_list, get_node_list())
+
+    def test_get_reply_context_uses_packet_ids_indexed_by_add_new_message(self) -> None:
+        ui_state.all_messages = {"MediumFast": [], 222: []}
+        add_new_message("MediumFast", ">> SAT2: ", "hello", packet_id=900)
+        add_new_message(222, ">> SAT3: ", "hi", packet_id=901)
+
+        self.assertEqual(get_reply_context(901), "<Re: SAT3: hi> ")
+        self.assertEqual(get_reply_context(900), "<Re: SAT2: hello> ")
+        self.assertEqual(get_reply_context(902), "")
+
+    def test_add_new_message_skips_channel_scrolled_back_past_evicted_pages(self) -> None:
+        ui_state.all_messages = {"MediumFast": [("[00:00:01] >> Old: ", "old")]}
+        ui_state.has_newer_messages = {"MediumFast": True}
+
+        add_new_message("MediumFast", ">> Test: ", "New")
+
+        self.assertEqual(ui_state.all_messages["MediumFast"], [("[00:00:01] >> Old: ", "old")])
+
     def test_add_new_message_groups_messages_by_hour(self) -> None:
         ui_state.all_messages = {"MediumFast": []}
 
@@ -140,3 +194,14 @@ class UtilsTests(unittest.TestCase):
         packet = {"decoded": {"portnum": "TEXT_MESSAGE_APP", "payload": b"hello"}}
 
         self.assertEqual(parse_protobuf(packet), "✉️")
+
+    def test_parse_protobuf_decodes_registered_payloads(self) -> None:
+        position = mesh_pb2.Position(latitude_i=515000000)
+        packet = {"decoded": {"portnum": "POSITION_APP", "payload": position.SerializeToString()}}
+
+        self.assertIn("51.5", parse_protobuf(packet))
+
+    def test_parse_protobuf_returns_payload_for_unknown_portnum(self) -> None:
+        packet = {"decoded": {"portnum": "NOT_A_PORT", "payload": b"raw"}}
+
+        self.assertEqual(parse_protobuf(packet), b"raw")
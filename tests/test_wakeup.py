@@ -0,0 +1,65 @@
+import os
+import threading
+import time
+import unittest
+
+from contact.utilities.wakeup import InputWaiter, Wakeup
+
+
+class WakeupTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.input_read_fd, self.input_write_fd = os.pipe()
+        self.wakeup = Wakeup()
+        self.waiter = InputWaiter(self.input_read_fd, self.wakeup)
+
+    def tearDown(self) -> None:
+        self.waiter.close()
+        self.wakeup.close()
+        os.close(self.input_read_fd)
+        os.close(self.input_write_fd)
+
+    def test_wait_times_out_without_input_or_wakeup(self) -> None:
+        started = time.monotonic()
+
+        self.assertFalse(self.waiter.wait(0.05))
+        self.assertGreaterEqual(time.monotonic() - started, 0.04)
+
+    def test_notify_from_another_thread_ends_the_wait(self) -> None:
+        timer = threading.Timer(0.01, self.wakeup.notify)
+        timer.start()
+        started = time.monotonic()
+        try:
+            self.assertFalse(self.waiter.wait(5))
+        finally:
+            timer.join()
+
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_wakeups_are_drained_so_the_next_wait_blocks(self) -> None:
+        for _ in range(3):
+            self.wakeup.notify()
+
+        self.waiter.wait(0)
+
+        with self.assertRaises(BlockingIOError):
+            os.read(self.wakeup.fileno(), 1)
+
+    def test_input_is_reported_ready(self) -> None:
+        os.write(self.input_write_fd, b"a")
+
+        self.assertTrue(self.waiter.wait(1))
+
+    def test_notify_before_anyone_waits_is_a_no_op(self) -> None:
+        Wakeup().notify()
+
+    def test_notify_after_close_is_a_no_op(self) -> None:
+        wakeup = Wakeup()
+        wakeup.fileno()
+        wakeup.close()
+
+        wakeup.notify()
+        wakeup.drain()
+
+
+if __name__ == "__main__":
+    unittest.main()